@@ -0,0 +1,3 @@
+from src.knowmat.cli import main
+
+main()
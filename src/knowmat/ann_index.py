@@ -0,0 +1,180 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+# Below this many vectors an exact (flat) search is faster than probing inverted lists.
+MIN_IVF_SIZE = 2048
+
+
+class IVFIndex:
+    """
+    An inverted-file (IVF) index for approximate nearest-neighbour search by cosine similarity.
+
+    Vectors are clustered with spherical k-means; a query is only compared with the vectors of
+    the `n_probe` clusters whose centroids are closest to it. Small collections are searched
+    exactly.
+    """
+
+    def __init__(
+        self,
+        vectors: np.ndarray,
+        n_lists: Optional[int] = None,
+        n_probe: int = 8,
+        iterations: int = 10,
+        seed: int = 0,
+    ):
+        """
+        Builds the index.
+
+        Args:
+            vectors (np.ndarray): Array of shape (n, d) with L2-normalized vectors.
+            n_lists (int, optional): Number of clusters. Defaults to sqrt(n); 0 forces exact search.
+            n_probe (int): Number of clusters searched per query.
+            iterations (int): Number of k-means iterations.
+            seed (int): Random seed of the k-means initialization.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.n_probe = n_probe
+        if n_lists is None:
+            n_lists = int(np.sqrt(len(vectors))) if len(vectors) >= MIN_IVF_SIZE else 0
+
+        if n_lists == 0:
+            self.vectors = vectors
+            self.ids = np.arange(len(vectors))
+            self.centroids = np.zeros((0, vectors.shape[1]), dtype=np.float32)
+            self.offsets = np.array([0, len(vectors)])
+            return
+
+        rng = np.random.default_rng(seed)
+        centroids = vectors[rng.choice(len(vectors), n_lists, replace=False)]
+        for _ in range(iterations):
+            assignment = np.argmax(vectors @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, vectors)
+            counts = np.bincount(assignment, minlength=n_lists)
+            # Re-seed empty clusters with random vectors
+            empty = counts == 0
+            sums[empty] = vectors[rng.choice(len(vectors), empty.sum())]
+            centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True)
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+
+        order = np.argsort(assignment, kind="stable")
+        self.vectors = vectors[order]
+        self.ids = order
+        self.centroids = centroids.astype(np.float32)
+        self.offsets = np.concatenate(
+            [[0], np.cumsum(np.bincount(assignment, minlength=n_lists))]
+        )
+
+    def search(self, queries: np.ndarray, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the k most similar vectors for each query.
+
+        Args:
+            queries (np.ndarray): Array of shape (q, d) (or (d,)) with L2-normalized queries.
+            k (int): Number of neighbours.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Cosine similarities and ids, both of shape (q, k).
+            Missing neighbours have id -1 and similarity -inf.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        ids = np.full((len(queries), k), -1, dtype=np.int64)
+
+        for row, query in enumerate(queries):
+            if len(self.centroids) == 0:
+                candidates = np.arange(len(self.vectors))
+            else:
+                n_probe = min(self.n_probe, len(self.centroids))
+                lists = np.argpartition(-(self.centroids @ query), n_probe - 1)[
+                    :n_probe
+                ]
+                candidates = np.concatenate(
+                    [np.arange(self.offsets[i], self.offsets[i + 1]) for i in lists]
+                )
+            similarities = self.vectors[candidates] @ query
+            top = min(k, len(candidates))
+            best = np.argpartition(-similarities, top - 1)[:top]
+            best = best[np.argsort(-similarities[best])]
+            scores[row, :top] = similarities[best]
+            ids[row, :top] = self.ids[candidates[best]]
+        return scores, ids
+
+    def recall(self, queries: np.ndarray, k: int = 1) -> float:
+        """
+        Measures recall@k of the approximate search against an exact brute-force search.
+
+        Args:
+            queries (np.ndarray): Array of shape (q, d) with L2-normalized queries.
+            k (int): Number of neighbours.
+
+        Returns:
+            float: Share of the exact k nearest neighbours that the index also returns.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        _, approximate = self.search(queries, k)
+        exact = self.ids[np.argsort(-(queries @ self.vectors.T), axis=1)[:, :k]]
+        hits = sum(len(set(a) & set(e)) for a, e in zip(approximate, exact))
+        return hits / exact.size
+
+    def estimate_recall(
+        self, sample_size: int = 200, noise: float = 0.05, k: int = 1, seed: int = 0
+    ) -> float:
+        """
+        Estimates recall@k with perturbed copies of indexed vectors as queries.
+
+        Args:
+            sample_size (int): Number of queries.
+            noise (float): Standard deviation of the Gaussian noise added to each vector.
+            k (int): Number of neighbours.
+            seed (int): Random seed.
+
+        Returns:
+            float: Estimated recall@k (1.0 for exact search).
+        """
+        if len(self.centroids) == 0:
+            return 1.0
+        rng = np.random.default_rng(seed)
+        sample = self.vectors[
+            rng.choice(len(self.vectors), min(sample_size, len(self.vectors)), False)
+        ]
+        queries = sample + rng.normal(0, noise, sample.shape).astype(np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+        return self.recall(queries, k)
+
+    def save(self, path: str):
+        """
+        Saves the index to a .npz file.
+
+        Args:
+            path (str): Output file path.
+        """
+        np.savez(
+            path,
+            vectors=self.vectors,
+            ids=self.ids,
+            centroids=self.centroids,
+            offsets=self.offsets,
+            n_probe=self.n_probe,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "IVFIndex":
+        """
+        Loads an index saved with `save`.
+
+        Args:
+            path (str): Path to the .npz file.
+
+        Returns:
+            IVFIndex: The loaded index.
+        """
+        data = np.load(path)
+        index = cls.__new__(cls)
+        index.vectors = data["vectors"]
+        index.ids = data["ids"]
+        index.centroids = data["centroids"]
+        index.offsets = data["offsets"]
+        index.n_probe = int(data["n_probe"])
+        return index
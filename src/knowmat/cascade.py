@@ -0,0 +1,175 @@
+import json
+import re
+import threading
+import time
+from typing import List, Optional
+
+from pydantic import ValidationError
+
+from src.knowmat.llm_scheduler import BATCH
+from src.knowmat.pipeline import CompositionList, Pipeline
+from src.knowmat.prompt_generator import PromptGenerator
+
+# Models tried by the cascade, fastest first.
+CASCADE_MODELS = [
+    "llama3.2:3b-instruct-fp16",
+    "llama3.1:8b-instruct-fp16",
+    "llama3.3:70b-instruct-fp16",
+]
+
+# Papers longer than this (estimated prompt tokens) skip the smallest model.
+LONG_PAPER_TOKENS = 6000
+
+# Routing decision of the most recent paper, kept per thread for parallel extraction.
+_local = threading.local()
+
+
+def model_cost(model: str) -> float:
+    """
+    Relative cost of one call to a model, taken as its size in billions of parameters.
+
+    Args:
+        model (str): Ollama model name, e.g. 'llama3.1:8b-instruct-fp16'.
+
+    Returns:
+        float: Relative cost (1.0 if the size cannot be read from the name).
+    """
+    match = re.search(r"(\d+(?:\.\d+)?)b", model.split(":")[-1].lower())
+    return float(match.group(1)) if match else 1.0
+
+
+class CascadePipeline:
+    """
+    A class to run extraction through a cascade of models, escalating to a larger model only
+    when the result of a smaller one fails validation or looks unreliable.
+    """
+
+    @staticmethod
+    def assess(
+        result: CompositionList, min_properties: int = 1, max_missing_ratio: float = 0.5
+    ) -> Optional[str]:
+        """
+        Check an extraction result with cheap confidence heuristics.
+
+        Args:
+            result (CompositionList): Validated extraction result.
+            min_properties (int): Minimum number of extracted properties.
+            max_missing_ratio (float): Maximum share of fields reported as 'not provided'.
+
+        Returns:
+            Optional[str]: The reason to escalate, or None if the result is accepted.
+        """
+        if not result.compositions:
+            return "no compositions extracted"
+
+        fields = []
+        for comp in result.compositions:
+            fields.append(comp.processing_conditions)
+            if isinstance(comp.characterization, dict):
+                fields.extend(comp.characterization.values())
+            else:
+                fields.append(comp.characterization)
+            fields.extend(
+                prop.measurement_condition for prop in comp.properties_of_composition
+            )
+
+        num_properties = sum(
+            len(comp.properties_of_composition) for comp in result.compositions
+        )
+        if num_properties < min_properties:
+            return f"only {num_properties} properties extracted"
+
+        missing = sum(
+            1
+            for field in fields
+            if field is None or str(field).strip(" .").lower() == "not provided"
+        )
+        if fields and missing / len(fields) > max_missing_ratio:
+            return f"{missing}/{len(fields)} fields 'not provided'"
+        return None
+
+    @staticmethod
+    def last_routing() -> dict:
+        """
+        Routing decision of the most recent `run_cascade` call in the current thread.
+
+        Returns:
+            dict: Models tried, reasons, final model, relative cost spent and saved, and seconds.
+        """
+        return getattr(_local, "routing", {})
+
+    @staticmethod
+    def run_cascade(
+        text: str,
+        models: List[str] = CASCADE_MODELS,
+        long_paper_tokens: int = LONG_PAPER_TOKENS,
+        min_properties: int = 1,
+        max_missing_ratio: float = 0.5,
+        priority: int = BATCH,
+    ) -> CompositionList:
+        """
+        Run the extraction with the smallest model first and escalate when needed.
+
+        Escalation happens when the output fails validation or `assess` rejects it; any other
+        error of a call (e.g. the Ollama server is unreachable) is raised. Long papers
+        start at the second model. If every model is rejected, the result of the largest model
+        that produced valid output is returned.
+
+        Args:
+            text (str): The text to analyze.
+            models (List[str]): Models to try, fastest first.
+            long_paper_tokens (int): Estimated prompt length above which the first model is skipped.
+            min_properties (int): Minimum number of extracted properties to accept a result.
+            max_missing_ratio (float): Maximum share of 'not provided' fields to accept a result.
+            priority (int): Scheduling lane of the LLM calls.
+
+        Returns:
+            CompositionList: Extracted data validated with Pydantic.
+        """
+        start_time = time.perf_counter()
+        routing = {"models_tried": [], "reasons": [], "final_model": None}
+
+        start = 0
+        if (
+            len(models) > 1
+            and PromptGenerator.estimate_tokens(text) > long_paper_tokens
+        ):
+            start = 1
+            routing["reasons"].append(f"{models[0]}: skipped, long paper")
+
+        result = None
+        error = None
+        for model in models[start:]:
+            routing["models_tried"].append(model)
+            try:
+                candidate = Pipeline.run_pipeline(text, model, priority=priority)
+            except (ValidationError, json.JSONDecodeError) as e:
+                # Only invalid output escalates; connection errors and timeouts propagate
+                error = e
+                routing["reasons"].append(f"{model}: validation failed ({e})")
+                continue
+
+            result = candidate
+            routing["final_model"] = model
+            reason = CascadePipeline.assess(
+                candidate, min_properties, max_missing_ratio
+            )
+            if reason is None:
+                routing["reasons"].append(f"{model}: accepted")
+                break
+            routing["reasons"].append(f"{model}: escalated, {reason}")
+
+        cost_spent = sum(model_cost(model) for model in routing["models_tried"])
+        routing["cost_spent"] = cost_spent
+        routing["cost_saved"] = model_cost(models[-1]) - cost_spent
+        routing["seconds"] = time.perf_counter() - start_time
+        _local.routing = routing
+        print(
+            f"Cascade: {' -> '.join(routing['reasons'])} "
+            f"(relative cost {cost_spent:g}, saved {routing['cost_saved']:g} "
+            f"vs. {models[-1]})"
+        )
+
+        if result is None:
+            raise error
+        return result
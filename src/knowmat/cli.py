@@ -0,0 +1,810 @@
+import argparse
+import csv
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Only the standard library is imported at module level: every subcommand imports what it
+# needs when it runs, so `--help` and the lightweight commands start without loading the
+# LLM client, pandas or the embedding model.
+
+# The properties.json shipped with the package.
+DEFAULT_PROPERTIES_FILE = os.path.join(os.path.dirname(__file__), "properties.json")
+
+# Start-up budget (seconds) of the lightweight commands, checked by `bench --startup`.
+STARTUP_BUDGET = 0.5
+
+# Modules that must not be imported just to build the command line parser.
+HEAVY_MODULES = ("torch", "sentence_transformers", "ollama", "pandas", "fitz")
+
+
+def cmd_parse(args):
+    """Parse the PDFs of a folder and write their cleaned text as JSON."""
+    from src.knowmat.pdf_parser import PDFParser
+
+    parsed = PDFParser.parse_folder(args.folder)
+    output = json.dumps(parsed, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Parsed {len(parsed)} PDFs to {args.output}")
+    else:
+        print(output)
+
+
+def cmd_extract(args):
+    """Extract the PDFs of a folder with the LLM pipeline and save the rows to CSV."""
+    from src.knowmat.json_extractor import JSONExtractor
+    from src.knowmat.response_parser import ResponseParser
+
+    os.makedirs(args.output_path, exist_ok=True)
+    extracted = JSONExtractor.extract(
+        args.folder,
+        args.model,
+        cascade_models=args.cascade,
+        max_workers=args.workers,
+        two_pass=args.two_pass,
+    )
+    ResponseParser.save_to_csv(extracted, args.output_path, args.output_file_name)
+
+
+def cmd_postprocess(args):
+    """Map property names and normalize units of an extracted CSV in place."""
+    from src.knowmat.post_processing import PostProcessor
+
+    processor = PostProcessor(
+        args.properties,
+        args.csv,
+        normalize_units=not args.no_units,
+        cache_dir=args.cache_dir,
+        batch_size=args.embedding_batch_size,
+        model_cache_dir=args.model_cache_dir,
+        backend=args.embedding_backend,
+        num_threads=args.embedding_threads,
+        memo=not args.no_memo,
+    )
+    processor.process_extracted_data(incremental=args.incremental)
+
+
+def cmd_remap(args):
+    """Update the mapped columns of post-processed CSVs after properties.json was edited."""
+    from src.knowmat.ontology_remap import OntologyRemapper
+
+    csv_files = sorted(
+        {path for pattern in args.csv for path in glob.glob(pattern, recursive=True)}
+    )
+    remapper = OntologyRemapper(
+        args.old,
+        args.properties,
+        cache_dir=args.cache_dir,
+        backend=args.embedding_backend,
+        num_threads=args.embedding_threads,
+        batch_size=args.embedding_batch_size,
+        model_cache_dir=args.model_cache_dir,
+    )
+    report = remapper.remap_files(csv_files, dry_run=args.dry_run)
+    for name in report["changed_names"]:
+        print(f"  {name}")
+
+
+def cmd_convert(args):
+    """Convert an extracted CSV to JSON records grouped by composition."""
+    from src.knowmat.csv_to_json import csv_to_json_records
+
+    records = csv_to_json_records(args.csv)
+    output = json.dumps(records, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+        print(f"Wrote {len(records)} records to {args.output}")
+    else:
+        print(output)
+
+
+def resolve_inputs(patterns) -> list:
+    """
+    Expands input glob patterns (recursive '**' supported); folders stand for all PDFs in them.
+
+    Args:
+        patterns (list): Glob patterns, PDF paths or folders.
+
+    Returns:
+        list: Sorted, distinct PDF paths.
+    """
+    from src.knowmat.pdf_parser import PDFParser
+
+    paths = set()
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            paths.update(PDFParser.list_pdfs(pattern))
+        else:
+            paths.update(
+                path
+                for path in glob.glob(pattern, recursive=True)
+                if path.lower().endswith(".pdf")
+            )
+    return sorted(paths)
+
+
+def finished_papers(output: str, backend: str) -> set:
+    """
+    Papers already present in the output, for `run --resume`: PDF paths for the SQLite
+    backend; for the CSV backend absolute paths, resolved from its 'path' column (relative
+    to the CSV's folder, or absolute as the watcher writes them), and file names of rows
+    written before rows carried their path.
+
+    Args:
+        output (str): Output CSV or SQLite file.
+        backend (str): 'csv' or 'sqlite'.
+
+    Returns:
+        set: Finished paths or file names.
+    """
+    if not os.path.exists(output):
+        return set()
+    if backend == "sqlite":
+        import sqlite3
+
+        conn = sqlite3.connect(output)
+        try:
+            return {path for (path,) in conn.execute("SELECT path FROM results")}
+        except sqlite3.OperationalError:
+            return set()
+        finally:
+            conn.close()
+    output_dir = os.path.dirname(os.path.abspath(output))
+    with open(output, newline="", encoding="utf-8") as f:
+        return {
+            (
+                os.path.normpath(os.path.join(output_dir, row["path"]))
+                if row.get("path")
+                else row["file name"]
+            )
+            for row in csv.DictReader(f)
+        }
+
+
+def cmd_run(args):
+    """Run the whole pipeline over a set of PDFs, saving after every chunk of papers."""
+    from src.knowmat.json_extractor import JSONExtractor
+    from src.knowmat.llm_scheduler import LLMScheduler
+    from src.knowmat.pdf_parser import ParseLimits
+
+    pdf_paths = resolve_inputs(args.input)
+    if args.resume:
+        done = finished_papers(args.output, args.backend)
+
+        def finished(path):
+            if args.backend == "sqlite":
+                return path in done
+            return os.path.abspath(path) in done or os.path.basename(path) in done
+
+        skipped = len(pdf_paths)
+        pdf_paths = [path for path in pdf_paths if not finished(path)]
+        skipped -= len(pdf_paths)
+        print(f"Resuming: {skipped} papers already in {args.output}")
+    elif os.path.exists(args.output):
+        print(f"Appending to existing {args.output} (use --resume to skip its papers)")
+    print(f"Extracting {len(pdf_paths)} papers with {args.workers} workers")
+
+    limits = ParseLimits(
+        max_bytes=int(args.max_pdf_mb * 2**20),
+        max_pages=args.max_pages,
+        spill_chars=args.spill_chars,
+        spill_dir=args.spill_dir,
+        max_chars=args.max_chars,
+    )
+    dedup = None
+    if args.dedup_index:
+        from src.knowmat.dedup import DuplicateIndex
+
+        dedup = DuplicateIndex(
+            args.dedup_index, threshold=args.dedup_threshold, action=args.dedup_action
+        )
+    if args.max_in_flight:
+        LLMScheduler.for_endpoint(None).max_in_flight = args.max_in_flight
+    output_dir = os.path.dirname(os.path.abspath(args.output))
+    os.makedirs(output_dir, exist_ok=True)
+
+    from src.knowmat.planner import (
+        ETATracker,
+        ThroughputHistory,
+        estimate_papers,
+        plan_run,
+        print_plan,
+    )
+
+    history = ThroughputHistory(args.history)
+    paper_tokens, planned_seconds = None, None
+    if args.plan:
+        paper_tokens = estimate_papers(pdf_paths)
+        plan = plan_run(paper_tokens, [args.cascade[0] if args.cascade else args.model])
+        print_plan(plan)
+        planned_seconds = plan[0]["seconds"]
+    progress = ETATracker(
+        len(pdf_paths), paper_tokens, planned_seconds=planned_seconds, history=history
+    )
+    if args.backend == "sqlite":
+        from src.knowmat.work_queue import ResultStore
+
+        store = ResultStore(args.output)
+    else:
+        from src.knowmat.response_parser import ResponseParser
+
+    for start in range(0, len(pdf_paths), args.chunk_size):
+        chunk = pdf_paths[start : start + args.chunk_size]
+        extracted = JSONExtractor.extract_files(
+            chunk,
+            args.model,
+            cascade_models=args.cascade,
+            max_workers=args.workers,
+            as_table=args.backend == "csv",
+            limits=limits,
+            dedup=dedup,
+            two_pass=args.two_pass,
+            progress=progress,
+            order=args.order,
+            split_tokens=args.split_tokens,
+        )
+        if args.backend == "sqlite":
+            for record in extracted:
+                # Under a cascade, the model whose answer was accepted
+                routing = record["stats"].get("routing", {})
+                model = routing.get("final_model") or (
+                    args.cascade[-1] if args.cascade else args.model
+                )
+                store.add(
+                    record["path"], record["file_name"], model, "cli", record["data"]
+                )
+        elif len(extracted):
+            rows = extracted.to_pandas()
+            # Paths relative to the CSV, so --resume tells apart equally named papers
+            rows["path"] = rows["path"].cat.rename_categories(
+                lambda path: os.path.relpath(os.path.abspath(path), output_dir)
+            )
+            ResponseParser.append_to_csv(rows, args.output)
+            print(f"Data appended to {args.output}")
+        print(f"Finished {min(start + args.chunk_size, len(pdf_paths))} papers")
+        history.save()
+    progress.finish()
+
+    if args.backend == "sqlite" or args.no_postprocess:
+        if args.backend == "sqlite":
+            print(f"Results stored in {args.output}; export them with work_queue.py")
+        return
+    if not os.path.exists(args.output):
+        print("Nothing extracted, skipping post-processing")
+        return
+
+    from src.knowmat.post_processing import PostProcessor
+
+    processor = PostProcessor(
+        args.properties,
+        args.output,
+        normalize_units=not args.no_units,
+        cache_dir=args.cache_dir,
+        batch_size=args.embedding_batch_size,
+        model_cache_dir=args.model_cache_dir,
+        backend=args.embedding_backend,
+        num_threads=args.embedding_threads,
+        memo=not args.no_memo,
+    )
+    # Rows mapped by earlier (resumed) runs are kept
+    processor.process_extracted_data(incremental=True)
+
+
+def cmd_plan(args):
+    """Predict the tokens and wall time of extracting PDFs with each model."""
+    from src.knowmat.planner import (
+        ThroughputHistory,
+        estimate_papers,
+        plan_run,
+        print_plan,
+    )
+
+    paper_tokens = estimate_papers(resolve_inputs(args.input))
+    print(
+        f"{len(paper_tokens)} papers, ~{sum(paper_tokens.values()):,} prompt tokens "
+        f"per configuration"
+    )
+    plan = plan_run(
+        paper_tokens,
+        args.models,
+        runs=args.runs,
+        parallel=args.parallel,
+        history=ThroughputHistory(args.history),
+    )
+    print_plan(plan)
+
+
+def cmd_watch(args):
+    """Watch folders and ingest new or changed PDFs until interrupted."""
+    from src.knowmat.pdf_parser import ParseLimits
+    from src.knowmat.watcher import IngestionService
+
+    IngestionService(
+        args.input,
+        args.output,
+        args.model,
+        args.properties,
+        ledger_path=args.ledger,
+        workers=args.workers,
+        poll_seconds=args.poll_seconds,
+        settle_seconds=args.settle_seconds,
+        limits=ParseLimits(
+            max_bytes=int(args.max_pdf_mb * 2**20), max_pages=args.max_pages
+        ),
+        cache_dir=args.cache_dir,
+    ).run(once=args.once)
+
+
+def measure_startup(commands=("--help", "convert --help", "parse --help")) -> dict:
+    """
+    Measures the wall-clock start-up time of CLI invocations, each in a fresh interpreter.
+
+    Args:
+        commands (tuple): Argument strings passed to `python -m src.knowmat`.
+
+    Returns:
+        dict: Mapping of command to seconds, plus 'heavy modules' with the heavy modules
+        loaded by building the parser (should be empty).
+    """
+    timings = {}
+    for command in commands:
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "src.knowmat", *command.split()],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        timings[command] = time.perf_counter() - start
+
+    probe = (
+        "import sys; from src.knowmat.cli import HEAVY_MODULES, build_parser; "
+        "build_parser(); print(','.join(m for m in HEAVY_MODULES if m in sys.modules))"
+    )
+    loaded = subprocess.run(
+        [sys.executable, "-c", probe], check=True, capture_output=True, text=True
+    ).stdout.strip()
+    timings["heavy modules"] = loaded.split(",") if loaded else []
+    return timings
+
+
+def compare_schemas(pdf_paths: list, model: str) -> dict:
+    """
+    Extracts each paper once with the full and once with the compact decoding schema and
+    sums the generation statistics (requires a running Ollama server).
+
+    Args:
+        pdf_paths (list): PDF files to extract.
+        model (str): The LLM model to use.
+
+    Returns:
+        dict: Per schema, the schema size and the summed 'eval_tokens' and 'eval_seconds'.
+    """
+    from src.knowmat.pdf_parser import PDFParser
+    from src.knowmat.pipeline import Pipeline
+
+    totals = {
+        schema: {
+            "schema_chars": Pipeline.schema_size(compact=schema == "compact"),
+            "eval_tokens": 0,
+            "eval_seconds": 0.0,
+        }
+        for schema in ("full", "compact")
+    }
+    for pdf_path in pdf_paths:
+        text = PDFParser.parse_pdf(pdf_path)
+        for schema, total in totals.items():
+            Pipeline.run_pipeline(text, model, schema=schema)
+            stats = Pipeline.last_stats()
+            total["eval_tokens"] += stats["eval_tokens"]
+            total["eval_seconds"] += stats["eval_seconds"]
+    return totals
+
+
+def check_embedding_parity(args) -> bool:
+    """
+    Runs `embedding_backend.parity_check` for --embedding-parity and prints the result.
+
+    Returns:
+        bool: Whether the backend passed.
+    """
+    import pandas as pd
+
+    from src.knowmat.embedding_backend import parity_check
+    from src.knowmat.post_processing import PostProcessor
+
+    candidates = PostProcessor(args.properties, args.names, memo=False).candidates
+    queries = None
+    if args.names:
+        names = pd.read_csv(args.names, usecols=["property name"])["property name"]
+        queries = candidates + list(
+            dict.fromkeys(names.dropna().str.lower().str.strip())
+        )
+    report = parity_check(
+        candidates,
+        args.embedding_parity,
+        queries=queries,
+        cache_folder=args.model_cache_dir,
+        num_threads=args.embedding_threads,
+    )
+    seconds = report["seconds"]
+    print(
+        f"{args.embedding_parity}: {report['agree']}/{report['queries']} best matches "
+        f"identical, {report['near_ties']} near ties, {len(report['failures'])} failures; "
+        f"max embedding deviation {report['max_embedding_deviation']:.4f}; "
+        f"encoding {seconds['torch']:.2f}s -> {seconds[args.embedding_parity]:.2f}s "
+        f"({seconds['torch'] / max(seconds[args.embedding_parity], 1e-9):.1f}x)"
+    )
+    for query, expected, found in report["failures"]:
+        print(f"  {query!r}: {expected!r} (torch) vs. {found!r}")
+    return report["passed"]
+
+
+def cmd_bench(args):
+    """
+    Run the model benchmark, check the CLI start-up time with --startup, compare the
+    decoding schemas with --schema, or check an embedding backend with --embedding-parity.
+    """
+    if args.embedding_parity:
+        if not check_embedding_parity(args):
+            sys.exit(1)
+        return
+
+    if args.schema:
+        pdf_paths = resolve_inputs(args.schema)
+        totals = compare_schemas(pdf_paths, args.model)
+        for schema, total in totals.items():
+            per_token = total["eval_seconds"] / max(total["eval_tokens"], 1)
+            print(
+                f"{schema:>7} schema ({total['schema_chars']} chars): "
+                f"{total['eval_tokens'] / max(len(pdf_paths), 1):.0f} tokens/paper, "
+                f"{total['eval_seconds'] / max(len(pdf_paths), 1):.2f}s/paper, "
+                f"{per_token * 1000:.1f} ms/token"
+            )
+        return
+
+    if args.startup:
+        timings = measure_startup()
+        heavy = timings.pop("heavy modules")
+        for command, seconds in timings.items():
+            print(f"python -m src.knowmat {command}: {seconds:.3f}s")
+        slow = [c for c, s in timings.items() if s > args.budget]
+        if heavy:
+            print(f"Heavy modules imported at start-up: {', '.join(heavy)}")
+        if slow or heavy:
+            print(f"Start-up regression (budget {args.budget}s)")
+            sys.exit(1)
+        print(f"Start-up within budget ({args.budget}s)")
+        return
+
+    from src.knowmat import model_extraction_benchmark
+
+    model_extraction_benchmark.main(plan_only=args.plan)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Builds the command line parser with one subcommand per pipeline stage.
+
+    Returns:
+        argparse.ArgumentParser: The parser.
+    """
+    parser = argparse.ArgumentParser(
+        prog="knowmat",
+        description="Extract structured materials data from scientific PDFs.",
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parse = subparsers.add_parser("parse", help="Extract the text of PDFs.")
+    parse.add_argument("folder", help="Folder with PDF files.")
+    parse.add_argument("--output", help="JSON output file (default: stdout).")
+    parse.set_defaults(func=cmd_parse)
+
+    extract = subparsers.add_parser("extract", help="Extract PDFs with an LLM to CSV.")
+    extract.add_argument("folder", help="Folder with PDF files.")
+    extract.add_argument("output_path", help="Output folder.")
+    extract.add_argument("output_file_name", help="Output CSV file name.")
+    extract.add_argument("--model", default="llama3.1:8b-instruct-fp16")
+    # The cascade runs single-call extractions, so it cannot be combined with two passes
+    extract_mode = extract.add_mutually_exclusive_group()
+    extract_mode.add_argument(
+        "--cascade", nargs="+", help="Run a model cascade (fastest first)."
+    )
+    extract_mode.add_argument(
+        "--two-pass",
+        action="store_true",
+        help="Discover the compositions first, then extract each one in its own call.",
+    )
+    extract.add_argument(
+        "--workers", type=int, default=1, help="Papers extracted concurrently."
+    )
+    extract.set_defaults(func=cmd_extract)
+
+    postprocess = subparsers.add_parser(
+        "postprocess", help="Map property names and normalize units of a CSV."
+    )
+    postprocess.add_argument("csv", help="Extracted CSV file (updated in place).")
+    postprocess.add_argument("--properties", default=DEFAULT_PROPERTIES_FILE)
+    postprocess.add_argument("--cache-dir", help="Directory of the property index.")
+    postprocess.add_argument(
+        "--embedding-batch-size",
+        type=int,
+        default=64,
+        help="Property names encoded per batch.",
+    )
+    postprocess.add_argument(
+        "--model-cache-dir", help="Download directory of the embedding model."
+    )
+    postprocess.add_argument(
+        "--embedding-backend",
+        choices=("torch", "int8", "onnx"),
+        default="torch",
+        help="Embedding backend: torch (GPU if available), or int8/onnx on the CPU.",
+    )
+    postprocess.add_argument(
+        "--embedding-threads", type=int, help="Embedding inference threads."
+    )
+    postprocess.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Only map rows that are not mapped yet.",
+    )
+    postprocess.add_argument(
+        "--no-memo",
+        action="store_true",
+        help="Do not use the persistent memo of property mappings.",
+    )
+    postprocess.add_argument(
+        "--no-units", action="store_true", help="Skip unit normalization."
+    )
+    postprocess.set_defaults(func=cmd_postprocess)
+
+    run = subparsers.add_parser(
+        "run", help="Run extraction and post-processing as one batch job."
+    )
+    run.add_argument(
+        "--input",
+        nargs="+",
+        required=True,
+        help="PDF glob patterns (e.g. 'data/raw/**/*.pdf') or folders.",
+    )
+    run.add_argument("--output", required=True, help="Output CSV or SQLite file.")
+    run.add_argument("--backend", choices=("csv", "sqlite"), default="csv")
+    run.add_argument("--model", default="llama3.1:8b-instruct-fp16")
+    run_mode = run.add_mutually_exclusive_group()
+    run_mode.add_argument(
+        "--cascade", nargs="+", help="Run a model cascade (fastest first)."
+    )
+    run.add_argument(
+        "--plan",
+        action="store_true",
+        help="Estimate every paper's tokens first and print the predicted duration.",
+    )
+    run.add_argument(
+        "--order",
+        choices=("input", "lpt"),
+        default="input",
+        help="Start papers in the given order or the longest first (shorter batches).",
+    )
+    run_mode.add_argument(
+        "--split-tokens",
+        type=int,
+        help="Split papers over this many estimated tokens into concurrent chunks "
+        "(single model only).",
+    )
+    run.add_argument(
+        "--history", help="Throughput history JSON (default: in ~/.cache/knowmat)."
+    )
+    run_mode.add_argument(
+        "--two-pass",
+        action="store_true",
+        help="Discover the compositions first, then extract each one in its own call.",
+    )
+    run.add_argument(
+        "--workers", type=int, default=4, help="Papers extracted concurrently."
+    )
+    run.add_argument(
+        "--max-in-flight",
+        type=int,
+        help="Upper bound on concurrent requests to the Ollama server.",
+    )
+    run.add_argument(
+        "--chunk-size",
+        type=int,
+        default=16,
+        help="Papers extracted between two saves of the output.",
+    )
+    run.add_argument("--max-pdf-mb", type=float, default=100, help="Skip larger PDFs.")
+    run.add_argument(
+        "--max-pages", type=int, default=200, help="Skip PDFs with more pages."
+    )
+    run.add_argument(
+        "--spill-chars",
+        type=int,
+        default=1_000_000,
+        help="Stream longer texts to a spill file while parsing.",
+    )
+    run.add_argument("--spill-dir", help="Directory of spill files (default: temp).")
+    run.add_argument(
+        "--max-chars",
+        type=int,
+        default=400_000,
+        help="Extract only the first characters of longer papers (the rest is dropped).",
+    )
+    run.add_argument(
+        "--dedup-index",
+        help="Near-duplicate index (SQLite); duplicates of indexed papers are not re-extracted.",
+    )
+    run.add_argument("--dedup-threshold", type=float, default=0.8)
+    run.add_argument(
+        "--dedup-action",
+        choices=("reuse", "skip", "flag"),
+        default="reuse",
+        help="Reuse the earlier extraction, skip the paper, or extract and flag it.",
+    )
+    run.add_argument(
+        "--resume", action="store_true", help="Skip papers already in the output."
+    )
+    run.add_argument("--properties", default=DEFAULT_PROPERTIES_FILE)
+    run.add_argument(
+        "--embedding-batch-size",
+        type=int,
+        default=64,
+        help="Property names encoded per batch.",
+    )
+    run.add_argument("--cache-dir", help="Directory of the property index.")
+    run.add_argument(
+        "--model-cache-dir", help="Download directory of the embedding model."
+    )
+    run.add_argument(
+        "--embedding-backend",
+        choices=("torch", "int8", "onnx"),
+        default="torch",
+        help="Embedding backend: torch (GPU if available), or int8/onnx on the CPU.",
+    )
+    run.add_argument(
+        "--embedding-threads", type=int, help="Embedding inference threads."
+    )
+    run.add_argument(
+        "--no-memo",
+        action="store_true",
+        help="Do not use the persistent memo of property mappings.",
+    )
+    run.add_argument("--no-units", action="store_true", help="Skip unit normalization.")
+    run.add_argument(
+        "--no-postprocess", action="store_true", help="Skip property mapping."
+    )
+    run.set_defaults(func=cmd_run)
+
+    remap = subparsers.add_parser(
+        "remap",
+        help="Remap post-processed CSVs after editing the properties file.",
+    )
+    remap.add_argument("csv", nargs="+", help="Post-processed CSV files or globs.")
+    remap.add_argument(
+        "--old", required=True, help="Properties file the CSVs were mapped with."
+    )
+    remap.add_argument(
+        "--properties",
+        default=DEFAULT_PROPERTIES_FILE,
+        help="The edited properties file.",
+    )
+    remap.add_argument("--cache-dir", help="Directory of the property index and memo.")
+    remap.add_argument("--embedding-batch-size", type=int, default=64)
+    remap.add_argument(
+        "--model-cache-dir", help="Download directory of the embedding model."
+    )
+    remap.add_argument(
+        "--embedding-backend", choices=("torch", "int8", "onnx"), default="torch"
+    )
+    remap.add_argument("--embedding-threads", type=int)
+    remap.add_argument(
+        "--dry-run", action="store_true", help="Only report the rows that would change."
+    )
+    remap.set_defaults(func=cmd_remap)
+
+    convert = subparsers.add_parser(
+        "convert", help="Convert an extracted CSV to JSON records."
+    )
+    convert.add_argument("csv", help="Extracted CSV file.")
+    convert.add_argument("--output", help="JSON output file (default: stdout).")
+    convert.set_defaults(func=cmd_convert)
+
+    plan = subparsers.add_parser(
+        "plan", help="Predict tokens and wall time of a run per model."
+    )
+    plan.add_argument(
+        "--input", nargs="+", required=True, help="PDF files, folders or glob patterns."
+    )
+    plan.add_argument(
+        "--models", nargs="+", default=["llama3.1:8b-instruct-fp16"], help="Models."
+    )
+    plan.add_argument("--runs", type=int, default=1, help="Runs per model.")
+    plan.add_argument(
+        "--parallel", type=int, default=1, help="Requests the server runs at once."
+    )
+    plan.add_argument(
+        "--history", help="Throughput history JSON (default: in ~/.cache/knowmat)."
+    )
+    plan.set_defaults(func=cmd_plan)
+
+    watch = subparsers.add_parser(
+        "watch", help="Ingest new or changed PDFs from watched folders."
+    )
+    watch.add_argument("--input", nargs="+", required=True, help="Folders to watch.")
+    watch.add_argument(
+        "--output", required=True, help="CSV file the rows are appended to."
+    )
+    watch.add_argument("--model", default="llama3.1:8b-instruct-fp16")
+    watch.add_argument("--workers", type=int, default=2)
+    watch.add_argument(
+        "--ledger", help="Record of processed files (default: <output>.ledger.db)."
+    )
+    watch.add_argument("--poll-seconds", type=float, default=5.0)
+    watch.add_argument(
+        "--settle-seconds",
+        type=float,
+        default=10.0,
+        help="Seconds a file must stay unchanged before it is processed.",
+    )
+    watch.add_argument("--max-pdf-mb", type=float, default=100)
+    watch.add_argument("--max-pages", type=int, default=200)
+    watch.add_argument("--properties", default=DEFAULT_PROPERTIES_FILE)
+    watch.add_argument("--cache-dir", help="Directory of the property index.")
+    watch.add_argument(
+        "--once",
+        action="store_true",
+        help="Process the files present now and exit instead of watching.",
+    )
+    watch.set_defaults(func=cmd_watch)
+
+    bench = subparsers.add_parser(
+        "bench", help="Run the model benchmark or check start-up time."
+    )
+    bench.add_argument(
+        "--startup",
+        action="store_true",
+        help="Check the start-up time of the lightweight commands instead.",
+    )
+    bench.add_argument("--budget", type=float, default=STARTUP_BUDGET)
+    bench.add_argument(
+        "--plan",
+        action="store_true",
+        help="Only print the predicted tokens and duration of the model benchmark.",
+    )
+    bench.add_argument(
+        "--schema",
+        nargs="+",
+        metavar="PDF",
+        help="Compare generated tokens and decoding time of the full and compact "
+        "schemas on these PDFs (files, folders or glob patterns).",
+    )
+    bench.add_argument("--model", default="llama3.1:8b-instruct-fp16")
+    bench.add_argument(
+        "--embedding-parity",
+        choices=("int8", "onnx"),
+        help="Check that this embedding backend finds the same best matches as the "
+        "full-precision model on the property vocabulary.",
+    )
+    bench.add_argument("--properties", default=DEFAULT_PROPERTIES_FILE)
+    bench.add_argument(
+        "--names", help="Extraction CSV whose property names are matched as well."
+    )
+    bench.add_argument("--embedding-threads", type=int)
+    bench.add_argument("--model-cache-dir")
+    bench.set_defaults(func=cmd_bench)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
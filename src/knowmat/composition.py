@@ -0,0 +1,172 @@
+import re
+import unicodedata
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+_SUBSCRIPTS = str.maketrans("₀₁₂₃₄₅₆₇₈₉₊₋", "0123456789+-")
+
+_ELEMENTS = set(
+    """H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn Ga Ge
+    As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce Pr Nd Pm Sm
+    Eu Gd Tb Dy Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn Fr Ra Ac Th Pa U
+    Np Pu Am Cm Bk Cf Es Fm Md No Lr""".split()
+)
+
+_TOKEN = re.compile(r"([A-Z][a-z]?)|(\()|(\))|(\d+(?:\.\d+)?|\.\d+)")
+
+
+def _strip_markup(composition: str) -> str:
+    """Remove LaTeX, HTML and Unicode subscript markup from a composition."""
+    text = unicodedata.normalize("NFKC", composition.translate(_SUBSCRIPTS))
+    return re.sub(r"</?sub>|\\mathrm|\\text|[$_{}]", "", text)
+
+
+def clean_formula(composition: str) -> str:
+    """
+    Strip typesetting from a formula: LaTeX ('Bi$_2$Te$_3$', 'Bi_{2}Te_{3}'), HTML subscripts,
+    Unicode subscripts ('Bi₂Te₃'), brackets and whitespace.
+
+    Args:
+        composition (str): The composition as extracted.
+
+    Returns:
+        str: The plain formula, e.g. 'Bi2Te3'.
+    """
+    text = re.sub(r"\s", "", _strip_markup(composition))
+    return text.replace("[", "(").replace("]", ")")
+
+
+@lru_cache(maxsize=None)
+def parse_formula(composition: str) -> Optional[dict]:
+    """
+    Parse a chemical formula into an element -> stoichiometry map. Nested parentheses with
+    multipliers and fractional amounts are supported ('(Bi0.5Sb1.5)Te3').
+
+    Args:
+        composition (str): The composition string.
+
+    Returns:
+        Optional[dict]: Mapping of element to amount, or None if the string is not a plain
+        formula (e.g. 'Bi2Te3 thin film' or 'Cu-doped Bi2Te3').
+    """
+    text = clean_formula(composition)
+    stack = [{}]
+    pos = 0
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if match is None:
+            return None
+        element, open_paren, close_paren, number = match.groups()
+        pos = match.end()
+        if element:
+            if element not in _ELEMENTS:
+                return None
+            amount = re.match(r"\d+(?:\.\d+)?|\.\d+", text[pos:])
+            count = float(amount.group(0)) if amount else 1.0
+            if amount:
+                pos += amount.end()
+            stack[-1][element] = stack[-1].get(element, 0.0) + count
+        elif open_paren:
+            stack.append({})
+        elif close_paren:
+            if len(stack) == 1:
+                return None
+            group = stack.pop()
+            amount = re.match(r"\d+(?:\.\d+)?|\.\d+", text[pos:])
+            factor = float(amount.group(0)) if amount else 1.0
+            if amount:
+                pos += amount.end()
+            for el, count in group.items():
+                stack[-1][el] = stack[-1].get(el, 0.0) + count * factor
+        else:
+            # A number that does not follow an element or group, e.g. a leading coefficient
+            return None
+    if len(stack) != 1 or not stack[0]:
+        return None
+    return stack[0]
+
+
+@lru_cache(maxsize=None)
+def canonicalize_composition(composition: str) -> str:
+    """
+    Return a canonical key for a composition: elements in alphabetical order with their
+    amounts ('Bi2Te3', 'Bi$_2$Te$_3$' and 'Te3Bi2' all give 'Bi2Te3'). Strings that are not
+    plain formulas fall back to their cleaned form, so they still group consistently.
+
+    Args:
+        composition (str): The composition as extracted.
+
+    Returns:
+        str: The canonical key.
+    """
+    if not isinstance(composition, str):
+        return ""
+    elements = parse_formula(composition)
+    if elements is None:
+        return re.sub(r"\s+", " ", _strip_markup(composition)).strip()
+    return "".join(
+        f"{el}{'' if amount == 1 else format(amount, 'g')}"
+        for el, amount in sorted(elements.items())
+    )
+
+
+def canonicalize_series(compositions: "pd.Series") -> "pd.Series":
+    """
+    Canonicalize a column of compositions, parsing each distinct string only once.
+
+    Args:
+        compositions (pd.Series): Compositions as extracted.
+
+    Returns:
+        pd.Series: Canonical keys with the same index.
+    """
+    import numpy as np
+    import pandas as pd
+
+    codes, uniques = pd.factorize(compositions, use_na_sentinel=False)
+    keys = np.array([canonicalize_composition(c) for c in uniques], dtype=object)
+    return pd.Series(keys[codes], index=compositions.index, name=compositions.name)
+
+
+class CompositionIndex:
+    """
+    A hash index from canonical composition keys to group ids, for O(1) grouping, joins and
+    deduplication of rows that spell the same composition differently.
+    """
+
+    def __init__(self):
+        self.group_ids = {}
+        self.variants = []
+
+    def add(self, composition: str) -> int:
+        """
+        Return the group id of a composition, creating a new group for unseen compositions.
+
+        Args:
+            composition (str): The composition as extracted.
+
+        Returns:
+            int: The group id.
+        """
+        key = canonicalize_composition(composition)
+        group_id = self.group_ids.get(key)
+        if group_id is None:
+            group_id = self.group_ids[key] = len(self.variants)
+            self.variants.append(set())
+        self.variants[group_id].add(composition)
+        return group_id
+
+    def get(self, composition: str) -> Optional[int]:
+        """
+        Look up the group id of a composition without adding it.
+
+        Returns:
+            Optional[int]: The group id, or None if no equivalent composition was added.
+        """
+        return self.group_ids.get(canonicalize_composition(composition))
+
+    def __len__(self) -> int:
+        return len(self.variants)
@@ -0,0 +1,215 @@
+import argparse
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from src.knowmat.composition import canonicalize_series
+
+# File names written by model_extraction_benchmark.main.
+RUN_FILE_PATTERN = re.compile(r"extracted_(?P<model>.+)_run(?P<run>\d+)\.csv$")
+
+# Rows of different runs describe the same measurement if these columns agree.
+KEY_COLUMNS = ["model", "file name", "canonical composition", "property", "condition"]
+
+# Values are compared after rounding to this many significant digits.
+SIGNIFICANT_DIGITS = 4
+
+
+def _round_significant(values: np.ndarray, digits: int) -> np.ndarray:
+    """Round an array to a number of significant digits (NaN and 0 stay unchanged)."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        magnitude = np.floor(np.log10(np.abs(values)))
+    magnitude = np.where(np.isfinite(magnitude), magnitude, 0)
+    factor = 10.0 ** (digits - 1 - magnitude)
+    return np.round(values * factor) / factor
+
+
+class ConsensusAggregator:
+    """
+    A class to combine repeated extraction runs into one consensus table and to report how
+    stable each model's output is across runs.
+    """
+
+    @staticmethod
+    def load_runs(folder_path: str) -> pd.DataFrame:
+        """
+        Loads all `extracted_<model>_run<N>.csv` files of a folder into one DataFrame.
+
+        Args:
+            folder_path (str): Folder with the run CSV files.
+
+        Returns:
+            pd.DataFrame: All rows with added 'model' and 'run' columns.
+        """
+        frames = []
+        for path in sorted(
+            glob.glob(os.path.join(folder_path, "extracted_*_run*.csv"))
+        ):
+            match = RUN_FILE_PATTERN.search(os.path.basename(path))
+            if match is None:
+                continue
+            frame = pd.read_csv(path)
+            frame["model"] = match.group("model")
+            frame["run"] = int(match.group("run"))
+            frames.append(frame)
+        if not frames:
+            raise FileNotFoundError(f"No run files found in {folder_path}")
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def align(runs: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the alignment key columns: canonical composition, property (standard name if
+        mapped, else the normalized extracted name), normalized measurement condition and a
+        numeric value (normalized value if available).
+
+        Args:
+            runs (pd.DataFrame): Rows loaded by `load_runs`.
+
+        Returns:
+            pd.DataFrame: The same rows with the key and 'numeric value' columns.
+        """
+        runs["canonical composition"] = canonicalize_series(
+            runs["composition"].astype(str)
+        )
+
+        extracted_name = runs["property name"].astype(str).str.lower().str.strip()
+        if "standard_property_name" in runs.columns:
+            standard_name = runs["standard_property_name"].astype("string").str.lower()
+            runs["property"] = standard_name.fillna(extracted_name)
+        else:
+            runs["property"] = extracted_name
+
+        runs["condition"] = (
+            runs["measurement condition"]
+            .fillna("not provided")
+            .astype(str)
+            .str.lower()
+            .str.replace(r"\s+", " ", regex=True)
+            .str.strip(" .")
+        )
+
+        value_column = (
+            "normalized_value" if "normalized_value" in runs.columns else "value"
+        )
+        runs["numeric value"] = pd.to_numeric(runs[value_column], errors="coerce")
+        return runs
+
+    @staticmethod
+    def aggregate(runs: pd.DataFrame) -> pd.DataFrame:
+        """
+        Computes one consensus row per (model, file, composition, property, condition).
+
+        Columns: runs_present, agreement (share of the model's runs containing the row),
+        majority_value and majority_share (most frequent value after rounding and its share),
+        median, mean and std of the values.
+
+        Args:
+            runs (pd.DataFrame): Rows prepared by `align`.
+
+        Returns:
+            pd.DataFrame: The consensus table.
+        """
+        runs_per_model = runs.groupby("model")["run"].nunique()
+        runs["rounded value"] = _round_significant(
+            runs["numeric value"].to_numpy(dtype=float), SIGNIFICANT_DIGITS
+        )
+
+        grouped = runs.groupby(KEY_COLUMNS, sort=False)
+        consensus = grouped.agg(
+            runs_present=("run", "nunique"),
+            n_values=("numeric value", "count"),
+            median=("numeric value", "median"),
+            mean=("numeric value", "mean"),
+            std=("numeric value", "std"),
+        ).reset_index()
+        consensus["agreement"] = consensus["runs_present"] / consensus["model"].map(
+            runs_per_model
+        )
+
+        votes = (
+            runs.dropna(subset=["rounded value"])
+            .groupby(KEY_COLUMNS + ["rounded value"], sort=False)
+            .size()
+            .reset_index(name="votes")
+            .sort_values("votes", ascending=False, kind="stable")
+            .drop_duplicates(KEY_COLUMNS)
+            .rename(columns={"rounded value": "majority_value"})
+        )
+        consensus = consensus.merge(votes, on=KEY_COLUMNS, how="left")
+        consensus["majority_share"] = consensus["votes"] / consensus["n_values"]
+        return consensus.drop(columns=["votes"])
+
+    @staticmethod
+    def stability_report(consensus: pd.DataFrame) -> pd.DataFrame:
+        """
+        Summarizes the run-to-run stability of each model.
+
+        Args:
+            consensus (pd.DataFrame): Table returned by `aggregate`.
+
+        Returns:
+            pd.DataFrame: Per model: number of distinct rows, mean agreement, share of rows found
+            in every run, mean majority share and median coefficient of variation.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            consensus = consensus.assign(
+                cv=consensus["std"] / consensus["mean"].abs(),
+                in_all_runs=consensus["agreement"] == 1.0,
+            )
+        return (
+            consensus.groupby("model")
+            .agg(
+                rows=("agreement", "size"),
+                mean_agreement=("agreement", "mean"),
+                share_in_all_runs=("in_all_runs", "mean"),
+                mean_majority_share=("majority_share", "mean"),
+                median_cv=("cv", "median"),
+            )
+            .reset_index()
+        )
+
+    @staticmethod
+    def run(folder_path: str, output_path: str = None) -> tuple:
+        """
+        Loads all run files of a folder and writes consensus.csv and stability_report.csv.
+
+        Args:
+            folder_path (str): Folder with the run CSV files.
+            output_path (str, optional): Output folder. Defaults to `folder_path`.
+
+        Returns:
+            tuple: (consensus, stability report) DataFrames.
+        """
+        output_path = output_path or folder_path
+        runs = ConsensusAggregator.align(ConsensusAggregator.load_runs(folder_path))
+        consensus = ConsensusAggregator.aggregate(runs)
+        report = ConsensusAggregator.stability_report(consensus)
+
+        os.makedirs(output_path, exist_ok=True)
+        consensus.to_csv(os.path.join(output_path, "consensus.csv"), index=False)
+        report.to_csv(os.path.join(output_path, "stability_report.csv"), index=False)
+        print(f"Consensus of {len(runs)} rows saved to {output_path}")
+        print(report.to_string(index=False))
+        return consensus, report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Combine repeated extraction runs into a consensus table."
+    )
+    parser.add_argument(
+        "folder", help="Folder with extracted_<model>_run<N>.csv files."
+    )
+    parser.add_argument(
+        "--output-path", help="Output folder (default: the input folder)."
+    )
+    args = parser.parse_args()
+    ConsensusAggregator.run(args.folder, args.output_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,16 @@ import csv
 import json
 import sys
 
+from src.knowmat.composition import canonicalize_composition
+
 
 def csv_to_json_records(csv_file_path):
     records = {}
     with open(csv_file_path, newline="", encoding="utf-8") as csvfile:
         reader = csv.DictReader(csvfile)
         for row in reader:
-            comp = row["composition"]
+            # Group spelling variants ('Bi2Te3', 'Bi$_2$Te$_3$', 'Bi₂Te₃') under one key.
+            comp = canonicalize_composition(row["composition"])
             if comp not in records:
                 # Initialize a new record using file_name, composition, processing condition, and characterization.
                 records[comp] = {
@@ -0,0 +1,316 @@
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Optional
+
+import numpy as np
+
+# Number of MinHash permutations; the signature of a paper is this many 32-bit values.
+NUM_PERM = 128
+
+# LSH bands (NUM_PERM / BANDS rows each). 16 bands of 8 rows make papers with a Jaccard
+# similarity above ~0.7 collide in at least one band with high probability.
+BANDS = 16
+
+# Estimated Jaccard similarity above which two papers count as the same paper.
+SIMILARITY_THRESHOLD = 0.8
+
+# Words per shingle.
+SHINGLE_SIZE = 5
+
+# Seconds a reservation of a paper that is being extracted is honoured. Older reservations
+# (of a crashed run) are ignored.
+RESERVATION_SECONDS = 900
+
+# What to do with a duplicate: reuse the earlier extraction, skip the paper, or only flag it.
+ACTIONS = ("reuse", "skip", "flag")
+
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+
+
+def shingle_hashes(text: str, size: int = SHINGLE_SIZE) -> np.ndarray:
+    """
+    Hash the word shingles of a text. Case, punctuation, hyphenation and line breaks are
+    ignored, so the preprint and the typeset version of a paper share most shingles.
+
+    Args:
+        text (str): The paper text.
+        size (int): Words per shingle.
+
+    Returns:
+        np.ndarray: Distinct 32-bit shingle hashes (uint64).
+    """
+    text = re.sub(r"-\s*\n\s*", "", text.lower())
+    words = re.findall(r"[a-z0-9]+", text)
+    shingles = {
+        " ".join(words[i : i + size]) for i in range(max(len(words) - size + 1, 1))
+    }
+    return np.fromiter(
+        (zlib.crc32(s.encode("utf-8")) for s in shingles),
+        dtype=np.uint64,
+        count=len(shingles),
+    )
+
+
+class DuplicateIndex:
+    """
+    A persisted MinHash/LSH index of extracted papers for near-duplicate detection (preprint,
+    accepted manuscript and published version of the same paper).
+
+    Each paper is reduced to a MinHash signature of its text shingles; the signature is cut
+    into bands and papers sharing a band are compared by their estimated Jaccard similarity.
+    The SQLite file stores the signatures, the band buckets and each paper's extraction, so a
+    duplicate can reuse the earlier result instead of running the LLM again. `reserve` looks
+    a paper up and indexes it in one transaction, so of two near-duplicates extracted at the
+    same time only the first is sent to the LLM; the other waits for its result.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        threshold: float = SIMILARITY_THRESHOLD,
+        action: str = "reuse",
+        num_perm: int = NUM_PERM,
+        bands: int = BANDS,
+        seed: int = 1,
+    ):
+        """
+        Opens (and if needed creates) the index database.
+
+        Args:
+            db_path (str): Path to the SQLite index file.
+            threshold (float): Estimated Jaccard similarity for a duplicate.
+            action (str): One of ACTIONS.
+            num_perm (int): Number of MinHash permutations (must stay fixed for an index).
+            bands (int): Number of LSH bands; must divide `num_perm`.
+            seed (int): Seed of the permutations (must stay fixed for an index).
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Unknown action {action!r}, expected one of {ACTIONS}")
+        if num_perm % bands:
+            raise ValueError("bands must divide num_perm")
+        self.threshold = threshold
+        self.action = action
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = np.random.default_rng(seed)
+        self.a = rng.integers(1, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, _MERSENNE_PRIME, num_perm, dtype=np.uint64)
+
+        self.lock = threading.Lock()
+        # Notified when a reservation is finished or released
+        self.condition = threading.Condition(self.lock)
+        self.conn = sqlite3.connect(
+            db_path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS papers (
+                id INTEGER PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                signature BLOB NOT NULL,
+                data TEXT,
+                seconds REAL,
+                reserved REAL
+            )""")
+        # Indexes written before reservations existed
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(papers)")}
+        if "reserved" not in columns:
+            self.conn.execute("ALTER TABLE papers ADD COLUMN reserved REAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS buckets (
+                band INTEGER NOT NULL,
+                hash INTEGER NOT NULL,
+                paper INTEGER NOT NULL
+            )""")
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS buckets_band_hash ON buckets (band, hash)"
+        )
+
+    def signature(self, text: str) -> np.ndarray:
+        """
+        MinHash signature of a text.
+
+        Args:
+            text (str): The paper text.
+
+        Returns:
+            np.ndarray: `num_perm` 32-bit minimum hashes (uint32).
+        """
+        hashes = shingle_hashes(text)
+        signature = np.full(len(self.a), _MAX_HASH, dtype=np.uint64)
+        # Chunked so long papers do not allocate a (shingles x num_perm) matrix at once
+        for start in range(0, len(hashes), 4096):
+            chunk = hashes[start : start + 4096, None]
+            permuted = ((chunk * self.a + self.b) % _MERSENNE_PRIME) & _MAX_HASH
+            signature = np.minimum(signature, permuted.min(axis=0))
+        return signature.astype(np.uint32)
+
+    def _band_hashes(self, signature: np.ndarray) -> list:
+        bands = signature.reshape(self.bands, self.rows)
+        return [zlib.crc32(band.tobytes()) for band in bands]
+
+    def query(self, signature: np.ndarray) -> Optional[dict]:
+        """
+        Find the most similar indexed paper above the threshold.
+
+        Args:
+            signature (np.ndarray): Signature from `signature`.
+
+        Returns:
+            Optional[dict]: 'id', 'file_name', 'similarity', 'data' (extraction JSON or
+            None), 'seconds' (LLM time of the earlier extraction) and 'pending' (whether it
+            is still being extracted), or None if there is no duplicate.
+        """
+        with self.lock:
+            return self._query(signature)
+
+    def _query(self, signature: np.ndarray) -> Optional[dict]:
+        band_hashes = self._band_hashes(signature)
+        candidates = {
+            paper
+            for band, band_hash in enumerate(band_hashes)
+            for (paper,) in self.conn.execute(
+                "SELECT paper FROM buckets WHERE band = ? AND hash = ?",
+                (band, band_hash),
+            )
+        }
+        stale = time.time() - RESERVATION_SECONDS
+        best = None
+        for paper in candidates:
+            row = self.conn.execute(
+                """SELECT file_name, signature, data, seconds, reserved FROM papers
+                WHERE id = ? AND (reserved IS NULL OR reserved > ?)""",
+                (paper, stale),
+            ).fetchone()
+            if row is None:
+                continue
+            file_name, blob, data, seconds, reserved = row
+            similarity = float(
+                np.mean(np.frombuffer(blob, dtype=np.uint32) == signature)
+            )
+            if similarity >= self.threshold and (
+                best is None or similarity > best["similarity"]
+            ):
+                best = {
+                    "id": paper,
+                    "file_name": file_name,
+                    "similarity": similarity,
+                    "data": data,
+                    "seconds": seconds,
+                    "pending": reserved is not None,
+                }
+        return best
+
+    def _insert(
+        self,
+        file_name: str,
+        signature: np.ndarray,
+        data: Optional[str],
+        seconds: Optional[float],
+        reserved: Optional[float],
+    ) -> int:
+        paper = self.conn.execute(
+            """INSERT INTO papers (file_name, signature, data, seconds, reserved)
+            VALUES (?, ?, ?, ?, ?)""",
+            (file_name, signature.astype(np.uint32).tobytes(), data, seconds, reserved),
+        ).lastrowid
+        self.conn.executemany(
+            "INSERT INTO buckets VALUES (?, ?, ?)",
+            [(band, h, paper) for band, h in enumerate(self._band_hashes(signature))],
+        )
+        return paper
+
+    def add(
+        self,
+        file_name: str,
+        signature: np.ndarray,
+        data: Optional[str] = None,
+        seconds: Optional[float] = None,
+    ) -> None:
+        """
+        Index a paper.
+
+        Args:
+            file_name (str): Name of the PDF file.
+            signature (np.ndarray): Signature from `signature`.
+            data (str, optional): The extraction as JSON, reused for later duplicates.
+            seconds (float, optional): LLM time the extraction took.
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._insert(file_name, signature, data, seconds, None)
+            self.conn.execute("COMMIT")
+
+    def reserve(self, file_name: str, signature: np.ndarray) -> tuple:
+        """
+        Look up a paper and, if it has no duplicate, index it as being extracted, in one
+        transaction. Concurrent duplicates (in this or another process) then find the
+        reservation instead of starting a second extraction. Finish the reservation with
+        `finish`, or `release` it if the extraction fails.
+
+        Args:
+            file_name (str): Name of the PDF file.
+            signature (np.ndarray): Signature from `signature`.
+
+        Returns:
+            tuple: (duplicate, reservation): the duplicate as returned by `query` and None,
+            or None and the id of the reservation.
+        """
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                duplicate = self._query(signature)
+                reservation = None
+                if duplicate is None:
+                    reservation = self._insert(
+                        file_name, signature, None, None, time.time()
+                    )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return duplicate, reservation
+
+    def finish(self, reservation: int, data: str, seconds: float) -> None:
+        """Store the extraction of a reserved paper for later duplicates."""
+        with self.condition:
+            self.conn.execute(
+                "UPDATE papers SET data = ?, seconds = ?, reserved = NULL WHERE id = ?",
+                (data, seconds, reservation),
+            )
+            self.condition.notify_all()
+
+    def release(self, reservation: int) -> None:
+        """Remove a reservation whose extraction failed, so a duplicate can take over."""
+        with self.condition:
+            self.conn.execute("BEGIN IMMEDIATE")
+            self.conn.execute("DELETE FROM buckets WHERE paper = ?", (reservation,))
+            self.conn.execute("DELETE FROM papers WHERE id = ?", (reservation,))
+            self.conn.execute("COMMIT")
+            self.condition.notify_all()
+
+    def wait(self, paper: int, timeout: float = RESERVATION_SECONDS) -> None:
+        """
+        Block until a reserved paper is finished or released, or `timeout` passes. The index
+        is re-read every second, so reservations of other processes are seen as well.
+
+        Args:
+            paper (int): Id of the reserved paper (the duplicate's 'id').
+            timeout (float): Upper bound in seconds.
+        """
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while True:
+                row = self.conn.execute(
+                    "SELECT reserved FROM papers WHERE id = ?", (paper,)
+                ).fetchone()
+                remaining = deadline - time.monotonic()
+                if row is None or row[0] is None or remaining <= 0:
+                    return
+                self.condition.wait(min(remaining, 1.0))
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM papers").fetchone()[0]
@@ -0,0 +1,185 @@
+import os
+import time
+from typing import Optional
+
+import numpy as np
+
+EMBEDDING_MODEL = "all-distilroberta-v1"  # or any other suitable model
+
+# Inference backends of the embedding model: full-precision PyTorch, PyTorch with dynamic
+# int8 quantization of the linear layers, and ONNX Runtime (requires optimum[onnxruntime]).
+EMBEDDING_BACKENDS = ("torch", "int8", "onnx")
+
+# Largest full-precision score difference between two candidates that swap places as the
+# best match under an accelerated backend, see `parity_check`.
+PARITY_TOLERANCE = 0.02
+
+
+def default_threads() -> int:
+    """
+    Number of CPU threads for embedding inference: the cores this process may run on.
+    Matrix multiplications gain little from hyper-threads, so on machines that report more
+    than 4 logical CPUs half of them are used.
+
+    Returns:
+        int: Thread count.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+    return cpus // 2 if cpus > 4 else cpus
+
+
+def load_embedding_model(
+    backend: str = "torch",
+    cache_folder: Optional[str] = None,
+    num_threads: Optional[int] = None,
+):
+    """
+    Loads the SentenceTransformer embedding model with the given backend. All backends
+    return a SentenceTransformer, so `encode` is called the same way. 'torch' keeps the
+    SentenceTransformer defaults (the GPU if there is one); the accelerated backends run
+    on the CPU with a bounded number of threads.
+
+    Args:
+        backend (str): One of EMBEDDING_BACKENDS.
+        cache_folder (str, optional): Download directory of the model.
+        num_threads (int, optional): Intra-op threads of 'int8' and 'onnx'. Defaults to
+            `default_threads()`; with 'torch' only changed when given.
+
+    Returns:
+        SentenceTransformer: The model.
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend {backend!r}, expected one of {EMBEDDING_BACKENDS}"
+        )
+    # Imported here because sentence_transformers pulls in torch
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "torch":
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        return SentenceTransformer(EMBEDDING_MODEL, cache_folder=cache_folder)
+
+    num_threads = num_threads or default_threads()
+    torch.set_num_threads(num_threads)
+    if backend == "onnx":
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        session_options.intra_op_num_threads = num_threads
+        session_options.inter_op_num_threads = 1
+        return SentenceTransformer(
+            EMBEDDING_MODEL,
+            device="cpu",
+            cache_folder=cache_folder,
+            backend="onnx",
+            model_kwargs={
+                "provider": "CPUExecutionProvider",
+                "session_options": session_options,
+            },
+        )
+
+    model = SentenceTransformer(
+        EMBEDDING_MODEL, device="cpu", cache_folder=cache_folder
+    )
+    model = torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+    model.eval()
+    return model
+
+
+def encode(model, names: list, batch_size: int = 64) -> np.ndarray:
+    """
+    Encodes names to L2-normalized float32 embeddings.
+
+    Args:
+        model: A model from `load_embedding_model`.
+        names (list): The texts to encode.
+        batch_size (int): Texts per forward pass.
+
+    Returns:
+        np.ndarray: Array of shape (len(names), d).
+    """
+    embeddings = model.encode(
+        names,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def parity_check(
+    candidates: list,
+    backend: str,
+    queries: Optional[list] = None,
+    tolerance: float = PARITY_TOLERANCE,
+    cache_folder: Optional[str] = None,
+    num_threads: Optional[int] = None,
+    batch_size: int = 64,
+) -> dict:
+    """
+    Compares the best matches of an accelerated backend with the full-precision model.
+
+    Every query is matched against the candidates by exact cosine similarity under both
+    models. Without explicit queries each candidate is matched against the other candidates,
+    which exercises the ranking over the whole vocabulary. A differing best match counts as
+    a failure only if the full-precision scores of the two matches differ by more than
+    `tolerance`, i.e. the models disagree on more than a near tie.
+
+    Args:
+        candidates (list): The property vocabulary.
+        backend (str): The backend to check against 'torch'.
+        queries (list, optional): Extracted names to match, e.g. from an extraction CSV.
+        tolerance (float): See PARITY_TOLERANCE.
+        cache_folder, num_threads: See `load_embedding_model`.
+        batch_size (int): Texts per forward pass.
+
+    Returns:
+        dict: Number of queries, agreeing best matches, near ties, failures (query and both
+        matches), the largest cosine distance between the two embeddings of a candidate,
+        encoding seconds per backend and 'passed'.
+    """
+    exclude_self = queries is None
+    queries = list(candidates) if queries is None else list(queries)
+    results = {}
+    for name in ("torch", backend):
+        model = load_embedding_model(name, cache_folder, num_threads)
+        encode(model, candidates[:batch_size], batch_size)  # warm-up
+        start = time.perf_counter()
+        candidate_embeddings = encode(model, candidates, batch_size)
+        query_embeddings = encode(model, queries, batch_size)
+        seconds = time.perf_counter() - start
+        scores = query_embeddings @ candidate_embeddings.T
+        if exclude_self:
+            np.fill_diagonal(scores, -np.inf)
+        results[name] = (candidate_embeddings, scores, seconds)
+
+    reference_embeddings, reference_scores, reference_seconds = results["torch"]
+    embeddings, scores, seconds = results[backend]
+    reference_best = reference_scores.argmax(axis=1)
+    best = scores.argmax(axis=1)
+    rows = np.arange(len(queries))
+    gap = reference_scores[rows, reference_best] - reference_scores[rows, best]
+
+    failures = [
+        (queries[i], candidates[reference_best[i]], candidates[best[i]])
+        for i in np.flatnonzero(gap > tolerance)
+    ]
+    deviation = float(
+        np.max(1.0 - np.sum(reference_embeddings * embeddings, axis=1), initial=0.0)
+    )
+    return {
+        "queries": len(queries),
+        "agree": int(np.sum(best == reference_best)),
+        "near_ties": int(np.sum((best != reference_best) & (gap <= tolerance))),
+        "failures": failures,
+        "max_embedding_deviation": deviation,
+        "seconds": {"torch": reference_seconds, backend: seconds},
+        "passed": not failures,
+    }
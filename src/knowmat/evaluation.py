@@ -0,0 +1,266 @@
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+
+from src.knowmat.composition import canonicalize_series
+from src.knowmat.consensus import RUN_FILE_PATTERN
+from src.knowmat.property_matcher import normalize_property_name
+from src.knowmat.unit_normalizer import UnitNormalizer
+
+# Fields scored by the evaluation.
+FIELDS = ("composition", "property", "value", "unit")
+
+# Relative tolerance for a value to count as correct.
+VALUE_TOLERANCE = 0.05
+
+# Written by model_extraction_benchmark.main, one row per (model, run).
+TIMINGS_FILE = "benchmark_timings.csv"
+
+
+def _prepare(df: pd.DataFrame) -> pd.DataFrame:
+    """Add the comparison columns: canonical composition, property key and normalized values."""
+    df = df.reset_index(drop=True)
+    df["canonical composition"] = canonicalize_series(df["composition"].astype(str))
+    names = df["property name"].astype(str)
+    if "standard_property_name" in df.columns:
+        names = df["standard_property_name"].astype("string").fillna(names)
+    df["property key"] = [normalize_property_name(name) for name in names]
+    df["value"] = pd.to_numeric(df["value"], errors="coerce")
+    df["unit"] = df["unit"].fillna("").astype(str)
+    return UnitNormalizer.normalize_dataframe(df)
+
+
+def evaluate_paper(
+    predicted: pd.DataFrame, gold: pd.DataFrame, tolerance: float
+) -> dict:
+    """
+    Scores the extracted rows of one paper against its gold annotation.
+
+    Predicted and gold rows are paired by an optimal assignment (Hungarian algorithm) over a
+    similarity matrix computed with NumPy broadcasting: pairs must agree on the composition and
+    property, and pairs that also agree on the value and unit are preferred.
+
+    Args:
+        predicted (pd.DataFrame): Extracted rows of the paper.
+        gold (pd.DataFrame): Gold rows of the paper.
+        tolerance (float): Relative tolerance for values.
+
+    Returns:
+        dict: For each field, a (true positives, predicted count, gold count) tuple.
+    """
+    predicted, gold = _prepare(predicted), _prepare(gold)
+
+    predicted_compositions = set(predicted["canonical composition"])
+    gold_compositions = set(gold["canonical composition"])
+    counts = {
+        "composition": (
+            len(predicted_compositions & gold_compositions),
+            len(predicted_compositions),
+            len(gold_compositions),
+        )
+    }
+
+    same_composition = (
+        predicted["canonical composition"].to_numpy()[:, None]
+        == gold["canonical composition"].to_numpy()[None, :]
+    )
+    same_property = (
+        predicted["property key"].to_numpy()[:, None]
+        == gold["property key"].to_numpy()[None, :]
+    )
+
+    # Compare normalized values where both units were understood with the same normalized unit
+    p_unit = predicted["normalized_unit"].to_numpy()[:, None]
+    g_unit = gold["normalized_unit"].to_numpy()[None, :]
+    comparable = (p_unit == g_unit) & pd.notna(p_unit) & pd.notna(g_unit)
+    p_value = np.where(
+        comparable,
+        predicted["normalized_value"].to_numpy(dtype=float)[:, None],
+        predicted["value"].to_numpy(dtype=float)[:, None],
+    )
+    g_value = np.where(
+        comparable,
+        gold["normalized_value"].to_numpy(dtype=float)[None, :],
+        gold["value"].to_numpy(dtype=float)[None, :],
+    )
+    same_value = np.abs(p_value - g_value) <= tolerance * np.maximum(
+        np.abs(g_value), 1e-12
+    )
+    raw_same_unit = (
+        predicted["unit"].str.strip().str.lower().to_numpy()[:, None]
+        == gold["unit"].str.strip().str.lower().to_numpy()[None, :]
+    )
+    same_unit = comparable | raw_same_unit
+
+    eligible = same_composition & same_property
+    weight = eligible * (1.0 + same_value + 0.5 * same_unit)
+    if weight.size:
+        rows, cols = linear_sum_assignment(weight, maximize=True)
+        matched = eligible[rows, cols]
+        rows, cols = rows[matched], cols[matched]
+    else:
+        rows = cols = np.array([], dtype=int)
+
+    n_predicted, n_gold = len(predicted), len(gold)
+    counts["property"] = (len(rows), n_predicted, n_gold)
+    counts["value"] = (int(same_value[rows, cols].sum()), n_predicted, n_gold)
+    counts["unit"] = (int(same_unit[rows, cols].sum()), n_predicted, n_gold)
+    return counts
+
+
+def _evaluate_paper_job(args):
+    return evaluate_paper(*args)
+
+
+def _scores(tp: int, n_predicted: int, n_gold: int) -> tuple:
+    precision = tp / n_predicted if n_predicted else 0.0
+    recall = tp / n_gold if n_gold else 0.0
+    f1 = 2 * precision * recall / (precision + recall) if precision + recall else 0.0
+    return precision, recall, f1
+
+
+class Evaluator:
+    """
+    A class to score extracted CSV files against gold annotations.
+
+    The gold directory holds one CSV per paper, named after the PDF (`paper.pdf` ->
+    `paper.csv`), with the columns composition, property name, value and unit.
+    """
+
+    @staticmethod
+    def load_gold(gold_dir: str) -> dict:
+        """
+        Loads the gold annotation of every paper.
+
+        Args:
+            gold_dir (str): Directory with one CSV per paper.
+
+        Returns:
+            dict: Mapping of PDF file name to gold DataFrame.
+        """
+        gold = {}
+        for path in sorted(glob.glob(os.path.join(gold_dir, "*.csv"))):
+            stem = os.path.splitext(os.path.basename(path))[0]
+            gold[f"{stem}.pdf"] = pd.read_csv(path)
+        return gold
+
+    @staticmethod
+    def evaluate(
+        extracted_csv: str,
+        gold: dict,
+        tolerance: float = VALUE_TOLERANCE,
+        max_workers: int = None,
+    ) -> dict:
+        """
+        Scores one extracted CSV file against the gold annotations, papers in parallel.
+
+        Papers without extracted rows count as fully missed; extracted papers without gold
+        annotation are ignored.
+
+        Args:
+            extracted_csv (str): Path to the extracted CSV file.
+            gold (dict): Gold annotations from `load_gold`.
+            tolerance (float): Relative tolerance for values.
+            max_workers (int, optional): Number of worker processes.
+
+        Returns:
+            dict: For each field, a (precision, recall, F1) tuple (micro-averaged over papers).
+        """
+        extracted = pd.read_csv(extracted_csv)
+        by_paper = dict(tuple(extracted.groupby("file name")))
+        columns = extracted.columns
+        jobs = [
+            (by_paper.get(file_name, pd.DataFrame(columns=columns)), gold_df, tolerance)
+            for file_name, gold_df in gold.items()
+        ]
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            paper_counts = list(executor.map(_evaluate_paper_job, jobs))
+
+        return {
+            field: _scores(
+                *(sum(counts[field][i] for counts in paper_counts) for i in range(3))
+            )
+            for field in FIELDS
+        }
+
+    @staticmethod
+    def evaluate_runs(
+        runs_folder: str,
+        gold_dir: str,
+        tolerance: float = VALUE_TOLERANCE,
+        max_workers: int = None,
+    ) -> pd.DataFrame:
+        """
+        Scores every `extracted_<model>_run<N>.csv` file of a folder and reports the scores next
+        to the extraction throughput recorded in benchmark_timings.csv (if present).
+
+        Args:
+            runs_folder (str): Folder with the run CSV files.
+            gold_dir (str): Directory with one gold CSV per paper.
+            tolerance (float): Relative tolerance for values.
+            max_workers (int, optional): Number of worker processes.
+
+        Returns:
+            pd.DataFrame: One row per run with precision, recall and F1 per field, and seconds
+            per paper if timings are available.
+        """
+        gold = Evaluator.load_gold(gold_dir)
+        rows = []
+        for path in sorted(
+            glob.glob(os.path.join(runs_folder, "extracted_*_run*.csv"))
+        ):
+            match = RUN_FILE_PATTERN.search(os.path.basename(path))
+            if match is None:
+                continue
+            scores = Evaluator.evaluate(path, gold, tolerance, max_workers)
+            row = {"model": match.group("model"), "run": int(match.group("run"))}
+            for field, (precision, recall, f1) in scores.items():
+                row[f"{field}_precision"] = precision
+                row[f"{field}_recall"] = recall
+                row[f"{field}_f1"] = f1
+            rows.append(row)
+        report = pd.DataFrame(rows)
+
+        timings_path = os.path.join(runs_folder, TIMINGS_FILE)
+        if os.path.exists(timings_path) and not report.empty:
+            # Every benchmark sweep appends its rows; the latest timing of a run wins
+            timings = pd.read_csv(timings_path).drop_duplicates(
+                ["model", "run"], keep="last"
+            )
+            timings["seconds_per_paper"] = timings["seconds"] / timings["papers"]
+            report = report.merge(
+                timings[["model", "run", "seconds_per_paper"]],
+                on=["model", "run"],
+                how="left",
+            )
+        return report
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Score extracted CSV files against gold annotations."
+    )
+    parser.add_argument(
+        "runs_folder", help="Folder with extracted_<model>_run<N>.csv files."
+    )
+    parser.add_argument("gold_dir", help="Folder with one gold CSV per paper.")
+    parser.add_argument("--tolerance", type=float, default=VALUE_TOLERANCE)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    report = Evaluator.evaluate_runs(
+        args.runs_folder, args.gold_dir, args.tolerance, args.workers
+    )
+    report.to_csv(os.path.join(args.runs_folder, "evaluation_report.csv"), index=False)
+    print(
+        report.groupby("model").mean(numeric_only=True).drop(columns="run").to_string()
+    )
+
+
+if __name__ == "__main__":
+    main()
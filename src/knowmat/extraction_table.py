@@ -0,0 +1,314 @@
+import json
+from array import array
+from typing import Optional
+
+# Columns of the CSV written by ResponseParser, in order, mapped to the table columns.
+CSV_COLUMNS = {
+    "file name": "file_name",
+    "composition": "composition",
+    "processing condition": "processing_conditions",
+    "characterization": "characterization",
+    "property name": "property_name",
+    "value": "value",
+    "unit": "unit",
+    "measurement condition": "measurement_condition",
+}
+
+# Per-composition and per-property string columns.
+COMPOSITION_FIELDS = ("file_name", "composition", "processing_conditions")
+PROPERTY_FIELDS = (
+    "property_name",
+    "unit",
+    "measurement_condition",
+    "additional_information",
+)
+
+# Columns added by `PostProcessor.map_table`, stored per distinct property name.
+MAPPED_FIELDS = ("domain", "category", "standard_property_name")
+
+
+class StringPool:
+    """
+    Interns values: every distinct value is stored once and rows hold its integer code.
+    None is stored as code -1, which is also pandas' code for missing categories.
+    """
+
+    def __init__(self):
+        self.codes = {}
+        self.values = []
+
+    def intern(self, value, key=None) -> int:
+        """
+        Return the code of a value, adding it on first use.
+
+        Args:
+            value: The value to store (a string, or e.g. a dict with an explicit key).
+            key (optional): Hashable key identifying the value. Defaults to the value itself.
+
+        Returns:
+            int: The code.
+        """
+        if value is None:
+            return -1
+        key = value if key is None else key
+        code = self.codes.get(key)
+        if code is None:
+            code = self.codes[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class ExtractionTable:
+    """
+    A columnar container of extraction results.
+
+    Instead of one Pydantic object per composition and property, the table keeps one compact
+    array per field (struct of arrays): 4-byte codes into interned string pools for text
+    fields and 8-byte floats for values. Pydantic validation happens only at the boundary, when
+    a `CompositionList` (or the raw JSON returned by the LLM) is added; the objects can be
+    dropped right after. Conversions to pandas and Arrow use categorical/dictionary columns
+    built directly from the code arrays.
+    """
+
+    def __init__(self):
+        self.pools = {
+            field: StringPool()
+            for field in COMPOSITION_FIELDS
+            + PROPERTY_FIELDS
+            + ("characterization", "path")
+        }
+        # One row per composition
+        self.composition_columns = {
+            field: array("i")
+            for field in COMPOSITION_FIELDS + ("characterization", "path")
+        }
+        # One row per property, with the row of its composition
+        self.property_columns = {field: array("i") for field in PROPERTY_FIELDS}
+        self.composition_row = array("i")
+        self.values = array("d")
+        # Mapped columns per code of the property name pool, see `PostProcessor.map_table`
+        self.mapped = {}
+        # Extraction statistics per paper, see `JSONExtractor.extract_files`
+        self.stats = {}
+
+    def add(
+        self,
+        file_name: str,
+        data,
+        stats: Optional[dict] = None,
+        path: Optional[str] = None,
+    ) -> None:
+        """
+        Appends the compositions of one paper.
+
+        Args:
+            file_name (str): Name of the PDF file.
+            data (CompositionList): The validated extraction result.
+            stats (dict, optional): Extraction statistics of the paper.
+            path (str, optional): Path of the PDF file, which tells apart equally named
+                papers; the conversions only add a 'path' column if some paper has one.
+        """
+        pools, columns = self.pools, self.composition_columns
+        for comp in data.compositions:
+            row = len(columns["file_name"])
+            columns["file_name"].append(pools["file_name"].intern(file_name))
+            columns["path"].append(pools["path"].intern(path))
+            columns["composition"].append(pools["composition"].intern(comp.composition))
+            columns["processing_conditions"].append(
+                pools["processing_conditions"].intern(comp.processing_conditions)
+            )
+            columns["characterization"].append(
+                pools["characterization"].intern(
+                    comp.characterization,
+                    key=json.dumps(comp.characterization, sort_keys=True),
+                )
+            )
+            for prop in comp.properties_of_composition:
+                self.composition_row.append(row)
+                self.values.append(prop.value)
+                for field in PROPERTY_FIELDS:
+                    self.property_columns[field].append(
+                        pools[field].intern(getattr(prop, field))
+                    )
+        if stats is not None:
+            self.stats[file_name] = stats
+
+    def add_json(self, file_name: str, content: str, stats: Optional[dict] = None):
+        """
+        Validates the raw JSON returned by the LLM and appends it, see `add`.
+
+        Args:
+            file_name (str): Name of the PDF file.
+            content (str): JSON matching the `CompositionList` schema.
+            stats (dict, optional): Extraction statistics of the paper.
+        """
+        from src.knowmat.pipeline import CompositionList
+
+        self.add(file_name, CompositionList.model_validate_json(content), stats)
+
+    def __len__(self) -> int:
+        """Number of property rows."""
+        return len(self.values)
+
+    @property
+    def num_compositions(self) -> int:
+        return len(self.composition_columns["file_name"])
+
+    def file_names(self) -> list:
+        """Names of the papers in the table, in insertion order."""
+        return list(self.pools["file_name"].values)
+
+    def nbytes(self) -> int:
+        """
+        Approximate memory held by the code and value arrays (the pools are not included).
+
+        Returns:
+            int: Number of bytes.
+        """
+        arrays = [
+            *self.composition_columns.values(),
+            *self.property_columns.values(),
+            self.composition_row,
+            self.values,
+        ]
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def _codes(self, field: str):
+        """Codes of a string field per property row (composition fields are broadcast)."""
+        import numpy as np
+
+        if field in self.property_columns:
+            return np.frombuffer(self.property_columns[field], dtype=np.int32)
+        composition_codes = np.frombuffer(
+            self.composition_columns[field], dtype=np.int32
+        )
+        return composition_codes[np.frombuffer(self.composition_row, dtype=np.int32)]
+
+    def _categories(self, field: str) -> list:
+        if field == "characterization":
+            # Same text as ResponseParser writes for the dicts
+            return [str(value) for value in self.pools[field].values]
+        return self.pools[field].values
+
+    def _output_columns(self) -> dict:
+        """The CSV columns, with 'path' after the file name if some paper has a path."""
+        if not len(self.pools["path"]):
+            return CSV_COLUMNS
+        columns = dict(list(CSV_COLUMNS.items())[:1])
+        columns["path"] = "path"
+        columns.update(list(CSV_COLUMNS.items())[1:])
+        return columns
+
+    def to_pandas(self, categorical: bool = True):
+        """
+        Converts the table to a DataFrame with the CSV columns of ResponseParser (and the
+        paths, see `add`), plus the mapped columns if `PostProcessor.map_table` was run.
+
+        Args:
+            categorical (bool): Keep string columns as pandas Categoricals built from the
+                code arrays (compact); otherwise convert them to object columns.
+
+        Returns:
+            pd.DataFrame: One row per property.
+        """
+        import numpy as np
+        import pandas as pd
+
+        columns = {}
+        for csv_name, field in self._output_columns().items():
+            if field == "value":
+                # Zero-copy view of the value array
+                columns[csv_name] = np.frombuffer(self.values, dtype=np.float64)
+                continue
+            columns[csv_name] = pd.Categorical.from_codes(
+                self._codes(field),
+                categories=pd.Index(self._categories(field), dtype=object),
+            )
+        if self.mapped:
+            name_codes = self._codes("property_name")
+            for field in MAPPED_FIELDS:
+                # The appended None is picked by the missing-name code -1
+                mapped = np.array(self.mapped[field] + [None], dtype=object)
+                columns[field] = mapped[name_codes]
+
+        df = pd.DataFrame(columns)
+        if not categorical:
+            for csv_name in self._output_columns():
+                if isinstance(df[csv_name].dtype, pd.CategoricalDtype):
+                    df[csv_name] = df[csv_name].astype(object)
+        return df
+
+    def to_arrow(self):
+        """
+        Converts the table to a pyarrow Table with dictionary-encoded string columns that
+        reuse the code arrays (requires pyarrow).
+
+        Returns:
+            pyarrow.Table: One row per property.
+        """
+        import numpy as np
+        import pyarrow as pa
+
+        columns = {}
+        for csv_name, field in self._output_columns().items():
+            if field == "value":
+                columns[csv_name] = pa.array(
+                    np.frombuffer(self.values, dtype=np.float64)
+                )
+                continue
+            codes = self._codes(field)
+            columns[csv_name] = pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0),
+                pa.array(self._categories(field), type=pa.string()),
+            )
+        return pa.table(columns)
+
+    def to_records(self) -> list:
+        """
+        Rebuilds the per-paper `CompositionList` objects, in the format returned by
+        `JSONExtractor.extract`.
+
+        Returns:
+            list: List of dictionaries with file names, validated data and statistics.
+        """
+        from src.knowmat.pipeline import CompositionList
+
+        columns = self.composition_columns
+        rows, papers = [], {}
+        for row in range(self.num_compositions):
+            composition = {
+                field: self._value(field, columns, row)
+                for field in (
+                    "composition",
+                    "processing_conditions",
+                    "characterization",
+                )
+            }
+            composition["properties_of_composition"] = []
+            rows.append(composition)
+            file_name = self._value("file_name", columns, row)
+            papers.setdefault(file_name, []).append(composition)
+
+        for i, row in enumerate(self.composition_row):
+            prop = {
+                field: self._value(field, self.property_columns, i)
+                for field in PROPERTY_FIELDS
+            }
+            prop["value"] = self.values[i]
+            rows[row]["properties_of_composition"].append(prop)
+
+        return [
+            {
+                "file_name": file_name,
+                "data": CompositionList.model_validate({"compositions": comps}),
+                "stats": self.stats.get(file_name, {}),
+            }
+            for file_name, comps in papers.items()
+        ]
+
+    def _value(self, field: str, columns: dict, row: int):
+        code = columns[field][row]
+        return None if code < 0 else self.pools[field].values[code]
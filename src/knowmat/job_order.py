@@ -0,0 +1,135 @@
+import heapq
+import os
+from typing import List, Optional
+
+from src.knowmat.pdf_parser import PDFParser
+from src.knowmat.pipeline import CompositionList
+from src.knowmat.prompt_generator import PromptGenerator
+from src.knowmat.two_pass import segment_text
+
+# Rough prompt tokens per PDF page, used to rank papers before they are parsed.
+TOKENS_PER_PAGE = 900
+
+# Job orders of batch extraction: as given, or longest-processing-time first.
+ORDERS = ("input", "lpt")
+
+
+def estimate_document_tokens(source) -> int:
+    """
+    Cheap length estimate of a PDF from its page count, without extracting the text.
+
+    Args:
+        source: Path to the PDF, or its bytes. Other file-like sources are not read (they
+            could not be read again) and estimate as 0.
+
+    Returns:
+        int: Estimated prompt tokens.
+    """
+    if not isinstance(source, (str, os.PathLike, bytes, bytearray, memoryview)):
+        return 0
+    try:
+        doc = PDFParser.open_document(source)
+    except Exception:
+        return 0
+    pages = doc.page_count
+    doc.close()
+    return pages * TOKENS_PER_PAGE
+
+
+def lpt_order(weights: List[float]) -> List[int]:
+    """
+    Longest-processing-time-first order: the longest jobs start first, so the short ones
+    fill the gaps at the end instead of a long job starting last and running alone.
+
+    Args:
+        weights (List[float]): Estimated duration (or length) of each job.
+
+    Returns:
+        List[int]: Job indices in the order to submit them.
+    """
+    return sorted(range(len(weights)), key=lambda i: -weights[i])
+
+
+def simulate_makespan(durations: List[float], workers: int) -> tuple:
+    """
+    Simulates a worker pool that starts the jobs in the given order, each on the first
+    worker that becomes free (as `ThreadPoolExecutor` does).
+
+    Args:
+        durations (List[float]): Duration of each job, in submission order.
+        workers (int): Number of workers.
+
+    Returns:
+        tuple: (makespan, busy time per worker).
+    """
+    workers = max(1, min(workers, len(durations) or 1))
+    free_at = [(0.0, worker) for worker in range(workers)]
+    loads = [0.0] * workers
+    for duration in durations:
+        start, worker = heapq.heappop(free_at)
+        loads[worker] += duration
+        heapq.heappush(free_at, (start + duration, worker))
+    return max(end for end, _ in free_at), loads
+
+
+def split_text(text: str, max_tokens: int) -> List[str]:
+    """
+    Splits an outlier paper into chunks of whole segments of at most about `max_tokens`.
+
+    Args:
+        text (str): The paper text.
+        max_tokens (int): Estimated token budget per chunk.
+
+    Returns:
+        List[str]: The chunks, in document order.
+    """
+    chunks, parts, tokens = [], [], 0
+    for segment in segment_text(text):
+        segment_tokens = PromptGenerator.estimate_tokens(segment)
+        if parts and tokens + segment_tokens > max_tokens:
+            chunks.append("\n".join(parts))
+            parts, tokens = [], 0
+        parts.append(segment)
+        tokens += segment_tokens
+    if parts:
+        chunks.append("\n".join(parts))
+    return chunks
+
+
+def merge_composition_lists(results: List[CompositionList]) -> CompositionList:
+    """
+    Merges the extractions of the chunks of one paper. Entries of the same composition are
+    combined: their properties are concatenated, the first stated processing conditions
+    are kept and the characterization findings are joined per technique.
+
+    Args:
+        results (List[CompositionList]): Extractions of the chunks, in document order.
+
+    Returns:
+        CompositionList: The merged extraction.
+    """
+    merged = {}
+    for result in results:
+        for comp in result.compositions:
+            key = comp.composition.strip()
+            if key not in merged:
+                merged[key] = comp.model_copy(deep=True)
+                continue
+            target = merged[key]
+            target.properties_of_composition.extend(comp.properties_of_composition)
+            if not _stated(target.processing_conditions):
+                target.processing_conditions = comp.processing_conditions
+            if comp.characterization:
+                characterization = dict(target.characterization or {})
+                for technique, findings in comp.characterization.items():
+                    if _stated(characterization.get(technique)):
+                        if findings not in characterization[technique]:
+                            characterization[technique] += f"; {findings}"
+                    else:
+                        characterization[technique] = findings
+                target.characterization = characterization
+    return CompositionList(compositions=list(merged.values()))
+
+
+def _stated(value: Optional[str]) -> bool:
+    return bool(value) and value.strip(" .").lower() != "not provided"
@@ -1,5 +1,24 @@
-from src.knowmat.pdf_parser import PDFParser
-from src.knowmat.pipeline import Pipeline
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+
+from src.knowmat.cascade import CascadePipeline
+from src.knowmat.dedup import DuplicateIndex
+from src.knowmat.extraction_table import ExtractionTable
+from src.knowmat.job_order import (
+    estimate_document_tokens,
+    lpt_order,
+    merge_composition_lists,
+    simulate_makespan,
+    split_text,
+)
+from src.knowmat.llm_scheduler import BATCH
+from src.knowmat.pdf_parser import ParseLimits, PDFParser
+from src.knowmat.pipeline import CompositionList, Pipeline
+from src.knowmat.planner import ETATracker
+from src.knowmat.prompt_generator import PromptGenerator
+from src.knowmat.two_pass import TwoPassPipeline
 
 
 class JSONExtractor:
@@ -8,25 +27,370 @@ class JSONExtractor:
     """
 
     @staticmethod
-    def extract(folder_path: str, model: str) -> list:
+    def extract(
+        folder_path: str,
+        model: str,
+        cascade_models: Optional[List[str]] = None,
+        max_workers: int = 1,
+        priority: int = BATCH,
+        two_pass: bool = False,
+        progress: Optional[ETATracker] = None,
+        order: str = "input",
+        split_tokens: Optional[int] = None,
+    ) -> list:
         """
         Extract data from PDF files in a folder.
 
         Args:
             folder_path (str): Path to the folder containing PDF files.
-            properties_file (str): Path to the JSON properties file.
+            model (str): The LLM model to use.
+            cascade_models (List[str], optional): If given, run each paper through this
+                cascade of models (fastest first) instead of the single `model`.
+            max_workers (int): Number of papers extracted concurrently. The LLM scheduler
+                bounds how many of them actually reach the server at once.
+            priority (int): Scheduling lane, `llm_scheduler.INTERACTIVE` or `BATCH`.
+            two_pass (bool): Extract each paper with `TwoPassPipeline` (composition discovery,
+                then one call per composition) instead of a single call. Cannot be combined
+                with `cascade_models`.
+            progress (ETATracker, optional): Counts every finished paper, records the call
+                statistics and prints a live ETA.
+            order (str): 'input' to start the papers in the given order, or 'lpt' to start
+                the longest first (estimated from page counts, or from the tracker's token
+                estimates), which shortens the batch when papers differ in length.
+            split_tokens (int, optional): Split papers longer than this many estimated tokens
+                into chunks that are extracted concurrently and merged, so one outlier does
+                not hold up the end of a batch. Only for single-model extraction: it cannot
+                be combined with `cascade_models` or `two_pass`.
 
         Returns:
             list: A list of extracted data in JSON-compatible format.
         """
-        parsed_pdfs = PDFParser.parse_folder(folder_path)
+        return JSONExtractor.extract_files(
+            PDFParser.list_pdfs(folder_path),
+            model,
+            cascade_models=cascade_models,
+            max_workers=max_workers,
+            priority=priority,
+            two_pass=two_pass,
+            progress=progress,
+            order=order,
+            split_tokens=split_tokens,
+        )
 
-        extracted_data = []
-        for pdf in parsed_pdfs:
+    @staticmethod
+    def extract_files(
+        pdf_paths: List[str],
+        model: str,
+        cascade_models: Optional[List[str]] = None,
+        max_workers: int = 1,
+        priority: int = BATCH,
+        as_table: bool = False,
+        limits: Optional[ParseLimits] = None,
+        dedup: Optional[DuplicateIndex] = None,
+        two_pass: bool = False,
+        progress: Optional[ETATracker] = None,
+        order: str = "input",
+        split_tokens: Optional[int] = None,
+    ):
+        """
+        Extract data from a list of PDF files. Each worker parses and extracts one paper at a
+        time, see `extract` for the other arguments.
+
+        Args:
+            pdf_paths (List[str]): Paths to the PDF files.
+            as_table (bool): Collect the results in an `ExtractionTable` as papers finish, so
+                the Pydantic objects of a large run are not all kept in memory.
+            limits (ParseLimits, optional): Parse with `PDFParser.parse_pdf_bounded` under these
+                limits; documents over the size or page cap are skipped and reported.
+            dedup (DuplicateIndex, optional): Near-duplicate index. Papers whose text matches
+                an indexed paper are handled by the index's action (reuse the earlier
+                extraction, skip or flag); all others are extracted and indexed.
+
+        Returns:
+            list: A list of extracted data in JSON-compatible format, in the order of `pdf_paths`
+            (papers that failed are left out), or an `ExtractionTable` (in the order the
+            papers were started) if `as_table` is set.
+        """
+
+        return JSONExtractor.extract_documents(
+            [(os.path.basename(path), path) for path in pdf_paths],
+            model,
+            cascade_models=cascade_models,
+            max_workers=max_workers,
+            priority=priority,
+            as_table=as_table,
+            limits=limits,
+            dedup=dedup,
+            two_pass=two_pass,
+            progress=progress,
+            order=order,
+            split_tokens=split_tokens,
+        )
+
+    @staticmethod
+    def extract_chunked(
+        text: str, model: str, max_tokens: int, priority: int = BATCH
+    ) -> tuple:
+        """
+        Extract a long paper as chunks of at most `max_tokens` estimated tokens, run
+        concurrently, and merge the results (see `job_order.merge_composition_lists`).
+
+        Args:
+            text (str): The paper text.
+            model (str): The LLM model to use.
+            max_tokens (int): Estimated token budget per chunk.
+            priority (int): Scheduling lane of the calls.
+
+        Returns:
+            tuple: (CompositionList, statistics summed over the chunk calls, with the
+            statistics of every call in 'calls').
+        """
+        chunks = split_text(text, max_tokens)
+
+        def extract_chunk(chunk):
+            data = Pipeline.run_pipeline(chunk, model, priority=priority)
+            return data, Pipeline.last_stats()
+
+        with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+            results = list(executor.map(extract_chunk, chunks))
+
+        # A chunk whose call failed before its statistics were recorded lacks some keys
+        keys = {
+            key
+            for _, chunk_stats in results
+            for key, value in chunk_stats.items()
+            if isinstance(value, (int, float)) and key != "seconds_per_token"
+        }
+        stats = {
+            key: sum(chunk_stats.get(key, 0) for _, chunk_stats in results)
+            for key in sorted(keys)
+        }
+        stats.update(
+            model=model,
+            chunks=len(chunks),
+            calls=[chunk_stats for _, chunk_stats in results if chunk_stats],
+        )
+        return merge_composition_lists([data for data, _ in results]), stats
+
+    @staticmethod
+    def extract_documents(
+        documents: List[tuple],
+        model: str,
+        cascade_models: Optional[List[str]] = None,
+        max_workers: int = 1,
+        priority: int = BATCH,
+        as_table: bool = False,
+        limits: Optional[ParseLimits] = None,
+        dedup: Optional[DuplicateIndex] = None,
+        two_pass: bool = False,
+        progress: Optional[ETATracker] = None,
+        order: str = "input",
+        split_tokens: Optional[int] = None,
+    ):
+        """
+        Extract data from PDFs given as paths or in memory, e.g. uploaded bytes that never
+        touch the disk. See `extract_files` for the other arguments.
+
+        Args:
+            documents (List[tuple]): (file name, source) pairs, where source is a path, the
+                PDF bytes or a binary file-like object.
+
+        Returns:
+            list: See `extract_files`.
+        """
+
+        if cascade_models and two_pass:
+            raise ValueError("two_pass cannot be combined with cascade_models")
+        if split_tokens and (cascade_models or two_pass):
+            raise ValueError(
+                "split_tokens cannot be combined with cascade_models or two_pass"
+            )
+
+        def extract_one(document):
+            file_name, source = document
             try:
-                data = Pipeline.run_pipeline(pdf["text"], model)
-                extracted_data.append({"file_name": pdf["file_name"], "data": data})
+                if limits is None:
+                    text = PDFParser.parse_pdf(source)
+                else:
+                    parsed = PDFParser.parse_pdf_bounded(source, limits)
+                    if parsed["skipped"]:
+                        print(f"Skipped {file_name}: {parsed['skipped']}")
+                        skipped.append((file_name, parsed["skipped"]))
+                        return None
+                    text = PDFParser.read_text(
+                        parsed, cleanup=True, max_chars=limits.max_chars
+                    )
+                    if parsed["truncated"]:
+                        print(
+                            f"Truncated {file_name} to its first {limits.max_chars:,} "
+                            f"characters ({parsed['pages']} pages)"
+                        )
+                pdf = {"file_name": file_name, "text": text}
+            except Exception as e:
+                print(f"Error processing {file_name}: {e}")
+                return None
+
+            duplicate, reservation = None, None
+            if dedup is not None:
+                signature = dedup.signature(pdf["text"])
+                duplicate, reservation = dedup.reserve(file_name, signature)
+                # A duplicate being extracted right now: wait for its result to reuse
+                while (
+                    duplicate is not None
+                    and duplicate["pending"]
+                    and dedup.action == "reuse"
+                ):
+                    dedup.wait(duplicate["id"])
+                    duplicate, reservation = dedup.reserve(file_name, signature)
+            if duplicate is not None:
+                print(
+                    f"{file_name} is a near-duplicate of {duplicate['file_name']} "
+                    f"(similarity {duplicate['similarity']:.2f})"
+                )
+                duplicate_stats = {
+                    "duplicate_of": duplicate["file_name"],
+                    "similarity": duplicate["similarity"],
+                    "seconds_saved": duplicate["seconds"] or 0.0,
+                }
+                if dedup.action == "skip":
+                    duplicates.append(duplicate_stats)
+                    return None
+                if dedup.action == "reuse" and duplicate["data"] is not None:
+                    duplicates.append(duplicate_stats)
+                    return {
+                        "file_name": file_name,
+                        "path": source if isinstance(source, str) else None,
+                        "data": CompositionList.model_validate_json(duplicate["data"]),
+                        "stats": duplicate_stats,
+                    }
+
+            try:
+                start = time.perf_counter()
+                if cascade_models:
+                    data = CascadePipeline.run_cascade(
+                        pdf["text"], cascade_models, priority=priority
+                    )
+                    stats = {
+                        **Pipeline.last_stats(),
+                        "routing": CascadePipeline.last_routing(),
+                    }
+                elif two_pass:
+                    data = TwoPassPipeline.run_two_pass(
+                        pdf["text"], model, priority=priority
+                    )
+                    two_pass_stats = dict(TwoPassPipeline.last_stats())
+                    # Per-call statistics at the top level, as for chunked papers
+                    stats = {
+                        "calls": two_pass_stats.pop("calls"),
+                        "two_pass": two_pass_stats,
+                    }
+                elif (
+                    split_tokens
+                    and PromptGenerator.estimate_tokens(pdf["text"]) > split_tokens
+                ):
+                    data, stats = JSONExtractor.extract_chunked(
+                        pdf["text"], model, split_tokens, priority=priority
+                    )
+                else:
+                    data = Pipeline.run_pipeline(pdf["text"], model, priority=priority)
+                    stats = Pipeline.last_stats()
+                seconds = time.perf_counter() - start
+                if duplicate is not None:
+                    # Flagged: extracted anyway, annotated with the earlier version
+                    stats = {**stats, "duplicate_of": duplicate["file_name"]}
+                elif reservation is not None:
+                    dedup.finish(reservation, data.model_dump_json(), seconds)
+                return {
+                    "file_name": pdf["file_name"],
+                    "path": source if isinstance(source, str) else None,
+                    "data": data,
+                    "stats": stats,
+                }
             except Exception as e:
                 print(f"Error extracting data from {pdf['file_name']}: {e}")
+                if reservation is not None:
+                    dedup.release(reservation)
+                return None
+
+        def extract_tracked(index):
+            start = time.perf_counter()
+            result = extract_one(documents[index])
+            durations[index] = time.perf_counter() - start
+            if progress is not None:
+                progress.update(
+                    documents[index][0], result["stats"] if result else None
+                )
+            return index, result
+
+        submitted = list(range(len(documents)))
+        if order == "lpt":
+            estimates = progress.paper_tokens if progress is not None else {}
+            submitted = lpt_order(
+                [
+                    estimates.get(file_name) or estimate_document_tokens(source)
+                    for file_name, source in documents
+                ]
+            )
+
+        skipped, duplicates = [], []
+        durations = [0.0] * len(documents)
+        table = ExtractionTable() if as_table else None
+        extracted_data = []
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, result in executor.map(extract_tracked, submitted):
+                if result is None:
+                    continue
+                if table is not None:
+                    table.add(
+                        result["file_name"],
+                        result["data"],
+                        result["stats"],
+                        path=result["path"],
+                    )
+                    # Only the statistics are needed for the cascade report below
+                    result = {"stats": result["stats"]}
+                extracted_data.append((index, result))
+        makespan = time.perf_counter() - start
+        # Back to the order of `documents`
+        extracted_data = [
+            result for _, result in sorted(extracted_data, key=lambda r: r[0])
+        ]
+
+        if len(documents) > 1 and max_workers > 1:
+            input_makespan, _ = simulate_makespan(durations, max_workers)
+            lpt_makespan, loads = simulate_makespan(
+                [durations[i] for i in lpt_order(durations)], max_workers
+            )
+            print(
+                f"Makespan ({order} order, {max_workers} workers): {makespan:.1f}s; with the "
+                f"measured durations, input order would take ~{input_makespan:.1f}s and "
+                f"LPT order ~{lpt_makespan:.1f}s (worker load {min(loads):.1f}-"
+                f"{max(loads):.1f}s)"
+            )
+
+        if cascade_models:
+            # Reused near-duplicates made no calls and have no routing
+            cost_saved = sum(
+                result["stats"].get("routing", {}).get("cost_saved", 0)
+                for result in extracted_data
+            )
+            print(
+                f"Cascade saved a relative cost of {cost_saved:g} over {len(documents)} papers "
+                f"compared to always running {cascade_models[-1]}"
+            )
+
+        if skipped:
+            print(
+                f"Skipped {len(skipped)} of {len(documents)} papers over the parse limits: "
+                + ", ".join(file_name for file_name, _ in skipped)
+            )
+
+        if duplicates:
+            seconds_saved = sum(d["seconds_saved"] for d in duplicates)
+            print(
+                f"Near-duplicates: {len(duplicates)} of {len(documents)} papers "
+                f"({dedup.action}), saving ~{seconds_saved:.1f}s of LLM time"
+            )
 
-        return extracted_data
+        return table if table is not None else extracted_data
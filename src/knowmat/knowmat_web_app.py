@@ -1,14 +1,8 @@
 import json
 import os
-import shutil
 
 from flask import Flask, render_template_string, request
 
-# Import your original classes exactly as-is:
-from json_extractor import JSONExtractor
-from post_processing import PostProcessor
-from response_parser import ResponseParser
-
 app = Flask(__name__)
 
 model_options = {
@@ -276,39 +270,33 @@ def extract_one():
     if not file or not output_path or not output_file_name:
         return "<div class='error-msg'>⚠️ Missing inputs (PDF, output path, or file name).</div>"
 
+    # Import your original classes exactly as-is. They are imported on the first request so
+    # the server starts without loading the LLM client, pandas and the embedding stack.
+    from json_extractor import JSONExtractor
+    from llm_scheduler import INTERACTIVE
+    from post_processing import PostProcessor
+
     file_name = file.filename
     results_html = ""
 
     try:
-        # 1) Create temp folder for each file.
-        temp_root = "temp_pdfs"
-        if not os.path.exists(temp_root):
-            os.makedirs(temp_root, exist_ok=True)
-
-        # Each file in its own subfolder.
-        temp_folder = os.path.join(temp_root, os.path.splitext(file_name)[0])
-        if os.path.exists(temp_folder):
-            shutil.rmtree(temp_folder)
-        os.makedirs(temp_folder, exist_ok=True)
-
-        file_path = os.path.join(temp_folder, file_name)
-        with open(file_path, "wb") as f:
-            f.write(file.read())
+        # 1) Read the upload into memory; it is parsed from the bytes, without temp files.
+        pdf_bytes = file.read()
 
         # 2) Extract with your LLM logic.
         model_name = model_options.get(selected_model_key, "")
-        extracted_result = JSONExtractor.extract(temp_folder, model_name)
+        # Interactive uploads are scheduled ahead of batch jobs sharing this process.
+        extracted_result = JSONExtractor.extract_documents(
+            [(file_name, pdf_bytes)], model_name, priority=INTERACTIVE
+        )
 
-        # 3) Save to CSV.
+        # 3) Post-process the new rows only, append them to the CSV and update JSON
+        #    with new keys.
         extracted_data_file = os.path.join(output_path, output_file_name)
-        ResponseParser.save_to_csv(extracted_result, output_path, output_file_name)
-
-        # 4) Post-process (update CSV) and update JSON with new keys.
         processor = PostProcessor("src/knowmat/properties.json", extracted_data_file)
-        processor.process_extracted_data()
-        extracted_result = processor.update_extracted_json(extracted_result)
+        extracted_result = processor.append_processed(extracted_result)
 
-        # 5) Build HTML for the results, now including new keys after property_name.
+        # 4) Build HTML for the results, now including new keys after property_name.
         results_html += f"<h3>📄 File: {file_name}</h3>"
         for composition in extracted_result[0]["data"].compositions:
             composition_dict = {
@@ -326,6 +314,8 @@ def extract_one():
                     "standard_property_name": prop.standard_property_name,
                     "category": prop.category,
                     "domain": prop.domain,
+                    "normalized_value": prop.normalized_value,
+                    "normalized_unit": prop.normalized_unit,
                 }
                 composition_dict["properties"].append(prop_dict)
             results_html += f"<pre>{json.dumps(composition_dict, indent=2, ensure_ascii=False)}</pre>"
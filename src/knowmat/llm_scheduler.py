@@ -0,0 +1,211 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Optional
+
+# Priority lanes: lower values are served first.
+INTERACTIVE = 0
+BATCH = 1
+
+# Weight of every new observation in the latency baseline. The baseline follows a faster
+# observation at once and drifts towards slower ones, so a single lucky call stops defining
+# "uncongested" after a few dozen calls.
+BASELINE_DECAY = 0.05
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket limiting the rate of requests to one endpoint.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Args:
+            rate (float): Tokens added per second, i.e. the sustained request rate.
+            capacity (float): Maximum number of tokens, i.e. the allowed burst.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Take one token, sleeping until one is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class LLMScheduler:
+    """
+    A scheduler between the extractor and one LLM endpoint.
+
+    Requests wait in priority lanes (interactive before batch) and are released when a slot is
+    free. The number of slots adapts AIMD style: it grows by about one per round of fast
+    requests and is halved when a request fails or its latency per unit of cost exceeds
+    `latency_tolerance` times the baseline, a decaying minimum of the observed latencies
+    (see BASELINE_DECAY). A token bucket caps the request rate. Scheduling applies to the
+    calls made within one process.
+    """
+
+    _schedulers: dict = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(
+        self,
+        max_in_flight: int = 4,
+        requests_per_second: float = 2.0,
+        burst: int = 4,
+        latency_tolerance: float = 2.0,
+        max_retries: int = 2,
+        retry_backoff: float = 5.0,
+    ):
+        """
+        Args:
+            max_in_flight (int): Hard upper bound on concurrent requests.
+            requests_per_second (float): Sustained request rate of the token bucket.
+            burst (int): Number of requests that may start at once after an idle period.
+            latency_tolerance (float): Latency factor over the baseline that counts as congestion.
+            max_retries (int): Retries for failed requests (e.g. server-side timeouts).
+            retry_backoff (float): Seconds before the first retry, doubled on every retry.
+        """
+        self.max_in_flight = max_in_flight
+        self.latency_tolerance = latency_tolerance
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.bucket = TokenBucket(requests_per_second, burst)
+
+        self.limit = 1.0
+        self.in_flight = 0
+        self.baseline_latency = None
+        self.completed = 0
+        self.errors = 0
+
+        self.waiting = []
+        self.counter = itertools.count()
+        self.condition = threading.Condition()
+
+    @classmethod
+    def for_endpoint(cls, host: Optional[str] = None) -> "LLMScheduler":
+        """
+        Return the shared scheduler of an endpoint, creating it on first use.
+
+        Args:
+            host (str, optional): Ollama server URL. None stands for the local server.
+
+        Returns:
+            LLMScheduler: The scheduler of this endpoint.
+        """
+        with cls._registry_lock:
+            if host not in cls._schedulers:
+                cls._schedulers[host] = cls()
+            return cls._schedulers[host]
+
+    def call(
+        self,
+        fn: Callable,
+        *args,
+        priority: int = BATCH,
+        cost: float = 1.0,
+        measure: Optional[Callable[[Any], float]] = None,
+        **kwargs,
+    ):
+        """
+        Run `fn(*args, **kwargs)` once the scheduler admits it, retrying on errors.
+
+        Args:
+            fn (Callable): The LLM call, e.g. `ollama.chat`.
+            priority (int): `INTERACTIVE` or `BATCH`.
+            cost (float): Relative size of the request, used to compare latencies.
+            measure (Callable, optional): Returns the actual size of a finished request from
+                its result, e.g. the generated tokens, which dominate the latency of a
+                chat call. Replaces `cost` for successful calls.
+
+        Returns:
+            The return value of `fn`.
+        """
+        for attempt in range(self.max_retries + 1):
+            self._admit(priority)
+            start = time.monotonic()
+            try:
+                self.bucket.acquire()
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                self._release(None, cost)
+                if attempt == self.max_retries:
+                    raise
+                wait = self.retry_backoff * 2**attempt
+                print(f"LLM call failed ({e}), retrying in {wait:.0f}s")
+                time.sleep(wait)
+            else:
+                latency = time.monotonic() - start
+                self._release(latency, measure(result) if measure else cost)
+                return result
+
+    def stats(self) -> dict:
+        """
+        Snapshot of the scheduler state.
+
+        Returns:
+            dict: Current limit, in-flight and waiting requests, completed and failed requests.
+        """
+        with self.condition:
+            return {
+                "limit": int(self.limit),
+                "in_flight": self.in_flight,
+                "waiting_interactive": sum(
+                    1 for p, _ in self.waiting if p == INTERACTIVE
+                ),
+                "waiting_batch": sum(1 for p, _ in self.waiting if p == BATCH),
+                "completed": self.completed,
+                "errors": self.errors,
+            }
+
+    def _admit(self, priority: int) -> None:
+        """Block until this request is first in line and a slot is free."""
+        ticket = (priority, next(self.counter))
+        with self.condition:
+            heapq.heappush(self.waiting, ticket)
+            while self.waiting[0] != ticket or self.in_flight >= int(self.limit):
+                self.condition.wait()
+            heapq.heappop(self.waiting)
+            self.in_flight += 1
+            # The next request in line may fit into a remaining slot.
+            self.condition.notify_all()
+
+    def _release(self, latency: Optional[float], cost: float) -> None:
+        """Free the slot and adapt the limit to the outcome (None latency means failure)."""
+        with self.condition:
+            self.in_flight -= 1
+            if latency is None:
+                self.errors += 1
+                self.limit = max(1.0, self.limit / 2)
+            else:
+                self.completed += 1
+                normalized = latency / max(cost, 1.0)
+                baseline = self.baseline_latency
+                if baseline is None or normalized < baseline:
+                    self.baseline_latency = normalized
+                else:
+                    self.baseline_latency += BASELINE_DECAY * (normalized - baseline)
+                if (
+                    baseline is not None
+                    and normalized > baseline * self.latency_tolerance
+                ):
+                    self.limit = max(1.0, self.limit / 2)
+                else:
+                    self.limit = min(
+                        float(self.max_in_flight), self.limit + 1 / self.limit
+                    )
+            self.condition.notify_all()
@@ -0,0 +1,134 @@
+import hashlib
+import sqlite3
+import threading
+from typing import Optional
+
+# Names looked up per SQLite query (below SQLite's limit on bound parameters).
+LOOKUP_BATCH = 500
+
+
+def memo_version(properties_file: str, embedding_model: str) -> str:
+    """
+    Version of the memoized mappings: a hash of the properties file and the embedding model.
+    Editing the properties or switching the model starts a new, empty version.
+
+    Args:
+        properties_file (str): Path to the JSON file of allowed properties.
+        embedding_model (str): Name (and backend) of the embedding model.
+
+    Returns:
+        str: The version key.
+    """
+    digest = hashlib.sha256(embedding_model.encode("utf-8") + b"\n")
+    with open(properties_file, "rb") as file:
+        digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+
+class MappingMemo:
+    """
+    A persisted memo of extracted property name -> standard property mappings.
+
+    Names that only the embedding tier of `PostProcessor.match_property` resolves (or that
+    stay unmatched) are stored with their result, so later runs look them up instead of
+    encoding them again. Rows are keyed by the lowercased name and the memo version, see
+    `memo_version`; old versions are kept, so switching back to a previous properties file
+    is a hit again.
+    """
+
+    def __init__(self, db_path: str, version: str):
+        """
+        Opens (and if needed creates) the memo database.
+
+        Args:
+            db_path (str): Path to the SQLite memo file.
+            version (str): Memo version of the current properties file and model.
+        """
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.pending = []
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            db_path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS mappings (
+                version TEXT NOT NULL,
+                name TEXT NOT NULL,
+                domain TEXT,
+                category TEXT,
+                standard_property_name TEXT,
+                score REAL,
+                PRIMARY KEY (version, name)
+            )""")
+
+    def lookup(self, names: list) -> dict:
+        """
+        Looks up names and counts hits and misses.
+
+        Args:
+            names (list): Distinct lowercased property names.
+
+        Returns:
+            dict: Mapping of found name to (domain, category, standard_property_name, score).
+        """
+        found = {}
+        with self.lock:
+            for start in range(0, len(names), LOOKUP_BATCH):
+                batch = names[start : start + LOOKUP_BATCH]
+                rows = self.conn.execute(
+                    "SELECT name, domain, category, standard_property_name, score "
+                    f"FROM mappings WHERE version = ? AND name IN ({','.join('?' * len(batch))})",
+                    (self.version, *batch),
+                )
+                for name, *mapping in rows:
+                    found[name] = tuple(mapping)
+            self.hits += len(found)
+            self.misses += len(names) - len(found)
+        return found
+
+    def put(
+        self,
+        name: str,
+        domain: Optional[str],
+        category: Optional[str],
+        standard_property_name: Optional[str],
+        score: float,
+    ) -> None:
+        """
+        Queues a mapping; it is written by the next `flush`.
+
+        Args:
+            name (str): The lowercased property name.
+            domain, category, standard_property_name: The match (None if unmatched).
+            score (float): Cosine similarity of the best candidate.
+        """
+        with self.lock:
+            self.pending.append(
+                (self.version, name, domain, category, standard_property_name, score)
+            )
+
+    def flush(self) -> int:
+        """
+        Writes the queued mappings in one transaction.
+
+        Returns:
+            int: Number of mappings written.
+        """
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if pending:
+                self.conn.execute("BEGIN IMMEDIATE")
+                self.conn.executemany(
+                    "INSERT OR REPLACE INTO mappings VALUES (?, ?, ?, ?, ?, ?)",
+                    pending,
+                )
+                self.conn.execute("COMMIT")
+        return len(pending)
+
+    def __len__(self) -> int:
+        with self.lock:
+            return self.conn.execute(
+                "SELECT COUNT(*) FROM mappings WHERE version = ?", (self.version,)
+            ).fetchone()[0]
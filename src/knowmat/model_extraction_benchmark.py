@@ -1,6 +1,19 @@
+import csv
 import os
+import time
+from typing import List, Optional
 
+from src.knowmat.consensus import ConsensusAggregator
+from src.knowmat.evaluation import TIMINGS_FILE
 from src.knowmat.json_extractor import JSONExtractor
+from src.knowmat.pdf_parser import PDFParser
+from src.knowmat.planner import (
+    ETATracker,
+    ThroughputHistory,
+    estimate_papers,
+    plan_run,
+    print_plan,
+)
 from src.knowmat.post_processing import PostProcessor
 from src.knowmat.response_parser import ResponseParser
 
@@ -11,6 +24,8 @@ def extract_knowmat_from_pdfs(
     output_csv_path: str,
     output_csv_name: str,
     properties_json_path: str = "src/knowmat/properties.json",
+    cascade_models: Optional[List[str]] = None,
+    progress: Optional[ETATracker] = None,
 ):
     """
     Extracts structured materials science data from PDFs using the KnowMat pipeline.
@@ -21,6 +36,8 @@ def extract_knowmat_from_pdfs(
         output_csv_path (str): Folder where CSV should be saved.
         output_csv_name (str): Name of the CSV file.
         properties_json_path (str): Path to the properties.json file (default is inside src/knowmat).
+        cascade_models (List[str], optional): Run a model cascade (fastest first) instead of `model_name`.
+        progress (ETATracker, optional): Live ETA of the surrounding run.
     """
     if not os.path.isdir(pdf_folder_path):
         raise ValueError(f"PDF folder not found: {pdf_folder_path}")
@@ -29,7 +46,9 @@ def extract_knowmat_from_pdfs(
 
     # 1. Extract raw structured data using the PDF parser + pipeline
     print("🔍 Extracting data from PDFs...")
-    extracted_result = JSONExtractor.extract(pdf_folder_path, model_name)
+    extracted_result = JSONExtractor.extract(
+        pdf_folder_path, model_name, cascade_models=cascade_models, progress=progress
+    )
 
     # 2. Save extracted data to CSV
     print("📁 Saving raw extracted data to CSV...")
@@ -49,7 +68,14 @@ def extract_knowmat_from_pdfs(
     return updated_result  # You can optionally inspect the structured data returned
 
 
-def main():
+def main(plan_only: bool = False):
+    """
+    Runs every model of the benchmark `num_runs` times over the PDFs, after printing the
+    predicted duration of the sweep.
+
+    Args:
+        plan_only (bool): Only print the plan.
+    """
     models_to_test = [
         "llama3.1:8b-instruct-fp16",
         "llama3.2:3b-instruct-fp16",
@@ -60,12 +86,49 @@ def main():
     csv_save_path = "data/processed"
     num_runs = 5  # You can change this to test more or fewer times
 
-    for model in models_to_test:
+    # Predict the sweep from the paper lengths and the measured throughput of each model
+    paper_tokens = estimate_papers(PDFParser.list_pdfs(pdfs_dir))
+    history = ThroughputHistory()
+    plan = plan_run(paper_tokens, models_to_test, runs=num_runs, history=history)
+    print_plan(plan)
+    if plan_only:
+        return
+    planned_seconds = sum(row["seconds"] for row in plan)
+    tracker = ETATracker(
+        len(paper_tokens) * len(models_to_test) * num_runs,
+        paper_tokens,
+        total_work=planned_seconds,
+        planned_seconds=planned_seconds,
+        history=history,
+    )
+    total_tokens = max(sum(paper_tokens.values()), 1)
+
+    for model, row in zip(models_to_test, plan):
+        # Work is counted in planned seconds, so a paper of a slow model counts for more
+        tracker.weight = row["seconds"] / num_runs / total_tokens
         model_safe_name = model.replace(":", "_").replace(".", "_").replace("-", "_")
         for run in range(1, num_runs + 1):
             csv_file_name = f"extracted_{model_safe_name}_run{run}.csv"
             print(f"\n🚀 Running extraction with model: {model} (Run {run}/{num_runs})")
-            extract_knowmat_from_pdfs(model, pdfs_dir, csv_save_path, csv_file_name)
+            start = time.perf_counter()
+            result = extract_knowmat_from_pdfs(
+                model, pdfs_dir, csv_save_path, csv_file_name, progress=tracker
+            )
+            seconds = time.perf_counter() - start
+
+            # Record throughput so evaluation can report it next to accuracy
+            timings_path = os.path.join(csv_save_path, TIMINGS_FILE)
+            write_header = not os.path.exists(timings_path)
+            with open(timings_path, "a", newline="") as f:
+                writer = csv.writer(f)
+                if write_header:
+                    writer.writerow(["model", "run", "papers", "seconds"])
+                writer.writerow([model_safe_name, run, len(result), seconds])
+
+    tracker.finish()
+
+    # Combine the runs into a consensus table and a per-model stability report
+    ConsensusAggregator.run(csv_save_path)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,260 @@
+import os
+import time
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.knowmat.embedding_backend import EMBEDDING_MODEL
+from src.knowmat.extraction_table import MAPPED_FIELDS
+from src.knowmat.mapping_memo import MappingMemo, memo_version
+from src.knowmat.post_processing import PostProcessor
+from src.knowmat.unit_normalizer import UnitNormalizer
+
+# Minimum cosine similarity of an embedding match, as in `PostProcessor.match_property`.
+EMBEDDING_THRESHOLD = 0.5
+
+# Columns added by `UnitNormalizer.normalize_dataframe`, whose canonical unit depends on
+# the standard property.
+NORMALIZED_FIELDS = ("normalized_value", "normalized_unit")
+
+
+def diff_ontology(old_lookup: dict, new_lookup: dict) -> dict:
+    """
+    Compares two property lookups (see `PostProcessor.load_properties`).
+
+    Args:
+        old_lookup (dict): Lookup of the previous properties file.
+        new_lookup (dict): Lookup of the edited properties file.
+
+    Returns:
+        dict: 'added' and 'removed' candidate keys, and 'moved' keys whose domain, category
+        or spelling changed.
+    """
+    return {
+        "added": [key for key in new_lookup if key not in old_lookup],
+        "removed": [key for key in old_lookup if key not in new_lookup],
+        "moved": [
+            key
+            for key in new_lookup
+            if key in old_lookup and new_lookup[key] != old_lookup[key]
+        ],
+    }
+
+
+class OntologyRemapper:
+    """
+    Updates the mapped columns of extracted data CSVs after `properties.json` is edited,
+    without reprocessing them.
+
+    Every distinct extracted name is re-checked against the new ontology as cheaply as its
+    history allows: the lexical tiers need no model at all; a name whose embedding match
+    still exists only has to be compared with the added candidates, against the best-match
+    score stored in the mapping memo of the old ontology; only names whose match was
+    removed (or whose score is unknown) are matched from scratch. Domain and category moves
+    are applied directly. Rows are then updated in bulk across all outputs.
+    """
+
+    def __init__(
+        self,
+        old_properties_file: str,
+        new_properties_file: str,
+        cache_dir: Optional[str] = None,
+        backend: str = "torch",
+        num_threads: Optional[int] = None,
+        batch_size: int = 64,
+        model_cache_dir: Optional[str] = None,
+    ):
+        """
+        Args:
+            old_properties_file (str): The properties file the outputs were mapped with.
+            new_properties_file (str): The edited properties file.
+            cache_dir, backend, num_threads, batch_size, model_cache_dir: See `PostProcessor`;
+                they must match the earlier runs for their memoized scores to be found.
+        """
+        self.old = PostProcessor(
+            old_properties_file, None, cache_dir=cache_dir, memo=False
+        )
+        self.new = PostProcessor(
+            new_properties_file,
+            None,
+            cache_dir=cache_dir,
+            batch_size=batch_size,
+            model_cache_dir=model_cache_dir,
+            backend=backend,
+            num_threads=num_threads,
+        )
+        self.old_memo = MappingMemo(
+            os.path.join(self.new.cache_dir, "property_memo.sqlite"),
+            memo_version(old_properties_file, f"{EMBEDDING_MODEL}/{backend}"),
+        )
+        self.diff = diff_ontology(self.old.property_lookup, self.new.property_lookup)
+        self.stats = {"lexical": 0, "carried": 0, "compared": 0, "rematched": 0}
+
+    def remap_names(self, names: dict) -> dict:
+        """
+        Maps extracted names against the new ontology.
+
+        Args:
+            names (dict): Mapping of lowercased, stripped extracted name to its current
+                standard property (None if unmatched).
+
+        Returns:
+            dict: Mapping of name to its new (domain, category, standard_property_name).
+        """
+        new, removed = self.new, set(self.diff["removed"])
+        result, compare, rematch = {}, [], []
+
+        def lookup(key):
+            return new.property_lookup[key] if key else (None, None, None)
+
+        pending = []
+        for name, current in names.items():
+            lexical = new.match_lexical(name)
+            if lexical is not None:
+                result[name] = lookup(lexical[0])
+                self.stats["lexical"] += 1
+            else:
+                pending.append(name)
+
+        # Names already remapped against this ontology
+        new_memo = new.memo.lookup(pending)
+        old_memo = self.old_memo.lookup([n for n in pending if n not in new_memo])
+        for name in pending:
+            if name in new_memo:
+                result[name] = new_memo[name][:3]
+                self.stats["carried"] += 1
+                continue
+            current = names[name].lower() if isinstance(names[name], str) else None
+            # The memo can disagree with the file, e.g. if it was mapped with another memo
+            memoized = old_memo[name][2] if name in old_memo else None
+            memoized = memoized.lower() if isinstance(memoized, str) else None
+            if name not in old_memo or current in removed or memoized in removed:
+                rematch.append(name)
+            else:
+                compare.append(name)
+
+        # Only an added candidate can beat a match that still exists
+        added = self.diff["added"]
+        if compare and added:
+            new.prefetch_embeddings(compare)
+            name_embeddings = np.stack([new.embeddings[name] for name in compare])
+            added_embeddings = new.model.encode(
+                added,
+                batch_size=new.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+            scores = name_embeddings @ np.asarray(added_embeddings).T
+            best = scores.argmax(axis=1)
+        for i, name in enumerate(compare):
+            _, _, std_property, score = old_memo[name]
+            key = std_property.lower() if std_property else None
+            if added:
+                added_score = float(scores[i, best[i]])
+                if added_score > max(score, EMBEDDING_THRESHOLD):
+                    key, score = added[best[i]], added_score
+            result[name] = lookup(key)
+            new.memo.put(name, *result[name], score)
+        self.stats["compared"] += len(compare)
+
+        if rematch:
+            new.prefetch_embeddings(rematch)
+            for name in rematch:
+                result[name] = lookup(new.match_property(name)[0])
+            self.stats["rematched"] += len(rematch)
+        new.memo.flush()
+        return result
+
+    @staticmethod
+    def update_rows(df: pd.DataFrame, differs: pd.Series, target: pd.DataFrame):
+        """
+        Writes the remapped columns of the changed rows, and normalizes their values again if
+        the file has normalized columns, since the canonical unit follows the standard property.
+
+        Args:
+            df (pd.DataFrame): A post-processed CSV, updated in place.
+            differs (pd.Series): Boolean mask of the changed rows.
+            target (pd.DataFrame): The new mapped columns of all rows.
+        """
+        rows = df.loc[differs].copy()
+        rows[list(MAPPED_FIELDS)] = target[differs]
+        columns = list(MAPPED_FIELDS)
+        if set(NORMALIZED_FIELDS) <= set(df.columns):
+            UnitNormalizer.normalize_dataframe(rows)
+            columns += NORMALIZED_FIELDS
+        # Columns read back all-NaN are float64, which pandas will not upcast on a partial
+        # assignment of strings
+        for column in columns:
+            if df[column].dtype != rows[column].dtype:
+                df[column] = df[column].astype(object)
+        df.loc[differs, columns] = rows[columns]
+
+    def remap_files(self, csv_files: list, dry_run: bool = False) -> dict:
+        """
+        Remaps the mapped columns of extracted data CSVs; files with changed rows are
+        rewritten, all others are left untouched.
+
+        Args:
+            csv_files (list): Post-processed CSV files (see `PostProcessor.process_extracted_data`).
+            dry_run (bool): Only report the changes.
+
+        Returns:
+            dict: Changed rows per file, changed names, name statistics and seconds.
+        """
+        start = time.perf_counter()
+        columns = ["property name", *MAPPED_FIELDS]
+        frames = {}
+        for path in csv_files:
+            header = pd.read_csv(path, nrows=0).columns
+            if not set(columns) <= set(header):
+                print(f"Skipping {path}: not post-processed")
+                continue
+            frames[path] = pd.read_csv(path)
+
+        # Each distinct name once, with the mapping it currently has in the outputs
+        names = {}
+        for df in frames.values():
+            clean = df["property name"].astype(str).str.lower().str.strip()
+            current = df["standard_property_name"].where(
+                df["standard_property_name"].notna(), None
+            )
+            for name, std_property in zip(clean, current):
+                names.setdefault(name, std_property)
+        remapped = self.remap_names(names)
+
+        changed_rows, changed_names = {}, set()
+        for path, df in frames.items():
+            clean = df["property name"].astype(str).str.lower().str.strip()
+            target = pd.DataFrame(
+                [remapped[name] for name in clean],
+                columns=list(MAPPED_FIELDS),
+                index=df.index,
+            )
+            current = df[list(MAPPED_FIELDS)]
+            differs = ~((current == target) | (current.isna() & target.isna())).all(
+                axis=1
+            )
+            changed_rows[path] = int(differs.sum())
+            changed_names.update(df.loc[differs, "property name"])
+            if changed_rows[path] and not dry_run:
+                self.update_rows(df, differs, target)
+                df.to_csv(path, index=False)
+
+        report = {
+            "changed_rows": changed_rows,
+            "changed_names": sorted(changed_names),
+            "names": {"total": len(names), **self.stats},
+            "diff": {key: len(value) for key, value in self.diff.items()},
+            "seconds": time.perf_counter() - start,
+        }
+        print(
+            f"Ontology diff: {report['diff']['added']} added, "
+            f"{report['diff']['removed']} removed, {report['diff']['moved']} moved; "
+            f"{len(names)} names: {self.stats['lexical']} lexical, "
+            f"{self.stats['carried']} already remapped, {self.stats['compared']} compared "
+            f"with added candidates, {self.stats['rematched']} rematched; "
+            f"{sum(changed_rows.values())} rows of {len(frames)} files "
+            f"{'would change' if dry_run else 'updated'} in {report['seconds']:.1f}s"
+        )
+        return report
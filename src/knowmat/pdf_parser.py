@@ -1,7 +1,53 @@
+import mmap
 import os
+import tempfile
+from collections import namedtuple
+from contextlib import contextmanager
+from typing import Optional
 
 import fitz  # PyMuPDF
 
+# Documents above this size (bytes) are skipped by `parse_pdf_bounded`.
+MAX_PDF_BYTES = 100 * 1024 * 1024
+
+# Documents with more pages are skipped by `parse_pdf_bounded`.
+MAX_PAGES = 200
+
+# Pages parsed between two trims of MuPDF's object cache (and two flushes of spilled text).
+PAGE_WINDOW = 16
+
+# Text longer than this (characters) is written to a spill file instead of kept in memory.
+SPILL_CHARS = 1_000_000
+
+# Text past this many characters (about 100k tokens, more than the context window of the
+# extraction models) is dropped: parsing stops there and `read_text` never returns more.
+MAX_TEXT_CHARS = 400_000
+
+# Limits of `parse_pdf_bounded`; spill_dir=None uses the system temp directory.
+ParseLimits = namedtuple(
+    "ParseLimits",
+    ["max_bytes", "max_pages", "page_window", "spill_chars", "spill_dir", "max_chars"],
+    defaults=[MAX_PDF_BYTES, MAX_PAGES, PAGE_WINDOW, SPILL_CHARS, None, MAX_TEXT_CHARS],
+)
+
+
+@contextmanager
+def _mapped(source):
+    """Yield a zero-copy buffer of a PDF: a memory map for paths, a memoryview otherwise."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f, mmap.mmap(
+            f.fileno(), 0, access=mmap.ACCESS_READ
+        ) as mapped:
+            view = memoryview(mapped)
+            try:
+                yield view
+            finally:
+                view.release()
+    else:
+        if hasattr(source, "read"):
+            source = source.read()
+        yield memoryview(source)
+
 
 class PDFParser:
     """
@@ -9,17 +55,35 @@ class PDFParser:
     """
 
     @staticmethod
-    def parse_pdf(file_path: str) -> str:
+    def open_document(source) -> fitz.Document:
+        """
+        Open a PDF from a path or from memory.
+
+        Args:
+            source: Path to the PDF file, the PDF bytes (bytes, bytearray, memoryview) or a
+                binary file-like object such as an uploaded file.
+
+        Returns:
+            fitz.Document: The opened document.
+        """
+        if isinstance(source, (str, os.PathLike)):
+            return fitz.open(source)
+        if hasattr(source, "read"):
+            source = source.read()
+        return fitz.open(stream=source, filetype="pdf")
+
+    @staticmethod
+    def parse_pdf(source) -> str:
         """
         Parse a PDF, remove the 'References' section, and return the cleaned text.
 
         Args:
-            file_path (str): Path to the PDF file.
+            source: Path to the PDF file, or the PDF in memory (see `open_document`).
 
         Returns:
             str: The cleaned text from the PDF without the 'References' section.
         """
-        doc = fitz.open(file_path)
+        doc = PDFParser.open_document(source)
         references_found = False
         extracted_text = ""
 
@@ -37,6 +101,146 @@ class PDFParser:
         doc.close()
         return extracted_text.strip()
 
+    @staticmethod
+    def parse_pdf_bounded(source, limits: ParseLimits = ParseLimits()) -> dict:
+        """
+        Parse a PDF like `parse_pdf`, with bounded memory: the file is memory-mapped instead of
+        read, MuPDF's object cache is trimmed after every `page_window` pages, documents over
+        the size or page cap are skipped, and text over `spill_chars` characters is streamed to
+        a spill file. Parsing stops at `max_chars` characters; the rest of the paper is dropped
+        and the result is marked as truncated.
+
+        Args:
+            source: Path to the PDF file, or the PDF in memory (see `open_document`).
+            limits (ParseLimits): Size and page caps, page window and spill settings.
+
+        Returns:
+            dict: 'text' (None if spilled or skipped), 'spill_path' (None unless spilled),
+            'pages' (pages parsed), 'truncated' (whether text past `max_chars` was dropped) and
+            'skipped' (None, or the reason the document was skipped). Use `read_text` to get
+            the text in either case.
+        """
+        result = {
+            "text": None,
+            "spill_path": None,
+            "pages": 0,
+            "truncated": False,
+            "skipped": None,
+        }
+        if isinstance(source, (str, os.PathLike)):
+            size = os.path.getsize(source)
+        else:
+            if hasattr(source, "read"):
+                source = source.read()
+            size = len(source)
+        if size == 0:
+            result["skipped"] = "empty file"
+            return result
+        if size > limits.max_bytes:
+            result["skipped"] = (
+                f"{size:,} bytes exceed the {limits.max_bytes:,} byte cap"
+            )
+            return result
+
+        with _mapped(source) as buffer:
+            doc = fitz.open(stream=buffer, filetype="pdf")
+            spill = None
+            try:
+                if doc.page_count > limits.max_pages:
+                    result["skipped"] = (
+                        f"{doc.page_count} pages exceed the {limits.max_pages} page cap"
+                    )
+                    return result
+
+                chunks, num_chars = [], 0
+                for page_num in range(doc.page_count):
+                    page_text = doc.load_page(page_num).get_text()
+
+                    # If "References" is found, stop extracting further text
+                    if "References" in page_text:
+                        break
+
+                    if num_chars + len(page_text) + 1 > limits.max_chars:
+                        page_text = page_text[
+                            : max(limits.max_chars - num_chars - 1, 0)
+                        ]
+                        result["truncated"] = True
+                    chunks.append(page_text + "\n")
+                    num_chars += len(page_text) + 1
+                    result["pages"] += 1
+                    if result["truncated"]:
+                        break
+                    if spill is None and num_chars > limits.spill_chars:
+                        spill = tempfile.NamedTemporaryFile(
+                            "w",
+                            suffix=".txt",
+                            prefix="knowmat_",
+                            dir=limits.spill_dir,
+                            delete=False,
+                            encoding="utf-8",
+                        )
+                        result["spill_path"] = spill.name
+                    if (page_num + 1) % limits.page_window == 0:
+                        if spill is not None:
+                            spill.writelines(chunks)
+                            chunks.clear()
+                        fitz.TOOLS.store_shrink(100)
+
+                if spill is not None:
+                    spill.writelines(chunks)
+                else:
+                    result["text"] = "".join(chunks).strip()
+            finally:
+                if spill is not None:
+                    spill.close()
+                doc.close()
+        return result
+
+    @staticmethod
+    def read_text(
+        parsed: dict, cleanup: bool = False, max_chars: int = MAX_TEXT_CHARS
+    ) -> Optional[str]:
+        """
+        Return the text of a `parse_pdf_bounded` result, reading it from the spill file if needed.
+        At most `max_chars` characters are read, so a spilled paper never comes back into
+        memory whole.
+
+        Args:
+            parsed (dict): The result of `parse_pdf_bounded`.
+            cleanup (bool): Delete the spill file after reading it.
+            max_chars (int): Upper bound on the returned text; the rest is dropped.
+
+        Returns:
+            Optional[str]: The cleaned text, or None if the document was skipped.
+        """
+        if parsed["spill_path"] is None:
+            return (
+                parsed["text"] if parsed["text"] is None else parsed["text"][:max_chars]
+            )
+        with open(parsed["spill_path"], encoding="utf-8") as f:
+            text = f.read(max_chars).strip()
+        if cleanup:
+            os.remove(parsed["spill_path"])
+        return text
+
+    @staticmethod
+    def list_pdfs(folder_path: str) -> list:
+        """
+        List all PDFs in a folder and its subfolders.
+
+        Args:
+            folder_path (str): Path to the folder containing PDFs.
+
+        Returns:
+            list: Sorted list of PDF file paths.
+        """
+        pdf_paths = []
+        for root, _, files in os.walk(folder_path):
+            for file in files:
+                if file.endswith(".pdf"):
+                    pdf_paths.append(os.path.join(root, file))
+        return sorted(pdf_paths)
+
     @staticmethod
     def parse_folder(folder_path: str) -> list:
         """
@@ -49,14 +253,12 @@ class PDFParser:
             list: List of dictionaries with file names and cleaned text.
         """
         parsed_papers = []
-        for root, _, files in os.walk(folder_path):
-            for file in files:
-                if file.endswith(".pdf"):
-                    file_path = os.path.join(root, file)
-                    try:
-                        cleaned_text = PDFParser.parse_pdf(file_path)
-                        parsed_papers.append({"file_name": file, "text": cleaned_text})
-                        # print(f"Processed: {file}")
-                    except Exception as e:
-                        print(f"Error processing {file}: {e}")
+        for file_path in PDFParser.list_pdfs(folder_path):
+            file = os.path.basename(file_path)
+            try:
+                cleaned_text = PDFParser.parse_pdf(file_path)
+                parsed_papers.append({"file_name": file, "text": cleaned_text})
+                # print(f"Processed: {file}")
+            except Exception as e:
+                print(f"Error processing {file}: {e}")
         return parsed_papers
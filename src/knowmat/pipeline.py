@@ -1,9 +1,29 @@
+import json
+import threading
+from functools import lru_cache
 from typing import List, Optional
 
-from ollama import chat
 from pydantic import BaseModel, Field
 
-from src.knowmat.prompt_generator import PromptGenerator
+from src.knowmat.llm_scheduler import BATCH, LLMScheduler
+from src.knowmat.prompt_generator import USER_PROMPT_PREFIX, PromptGenerator
+
+# How long Ollama keeps the model (and its prompt cache) loaded between calls.
+KEEP_ALIVE = "30m"
+
+# Sampling options must stay identical between calls: changing e.g. num_ctx reloads
+# the model and discards the cached prompt prefix.
+OLLAMA_OPTIONS = {
+    "temperature": 0.0,
+    "num_ctx": 10000,
+}
+
+# Schema keys that only document the models. They are dropped from the schema used for
+# constrained decoding, where they become grammar states without constraining the output.
+DOC_SCHEMA_KEYS = ("title", "description")
+
+# Statistics of the most recent call, kept per thread for parallel extraction.
+_local = threading.local()
 
 
 class Property(BaseModel):
@@ -67,35 +87,220 @@ class Pipeline:
     def run_pipeline(
         text: str,
         model: str = "llama3.1:8b-instruct-fp16",  # "llama3.2:3b-instruct-fp16" # "llama3.1:8b-instruct-q4_0"
+        compact_prompt: bool = False,
+        keep_alive: str = KEEP_ALIVE,
+        host: Optional[str] = None,
+        priority: int = BATCH,
+        schema: str = "compact",
     ) -> CompositionList:
         """
         Run the LLM pipeline with the given text and allowed properties.
 
+        The system prompt and the opening of the user prompt form a byte-stable prefix, and the
+        model is kept loaded with `keep_alive`, so Ollama only has to prefill the paper text.
+
         Args:
             text (str): The text to analyze.
-            allowed_properties (list): List of allowed property names.
             model (str): The LLM model to use.
+            compact_prompt (bool): Use the shorter system prompt without the worked example.
+            keep_alive (str): How long Ollama keeps the model loaded after the call.
+            host (str, optional): Ollama server to use, e.g. 'http://node2:11434'.
+                Defaults to the local server.
+            priority (int): Scheduling lane of the call, `llm_scheduler.INTERACTIVE` or `BATCH`.
+            schema (str): 'compact' to constrain decoding with `decoding_schema`, or 'full'
+                for the documentation schema with titles and descriptions.
 
         Returns:
             CompositionList: Extracted data validated with Pydantic.
         """
-        system_prompt = PromptGenerator.generate_system_prompt()
+        system_prompt = PromptGenerator.generate_system_prompt(compact=compact_prompt)
         user_prompt = PromptGenerator.generate_user_prompt(text)
 
         # print("system prompt", system_prompt)
         # print("user prompt", user_prompt)
 
-        response = chat(
+        return Pipeline.run_structured(
+            system_prompt,
+            user_prompt,
+            CompositionList,
+            model,
+            keep_alive=keep_alive,
+            host=host,
+            priority=priority,
+            schema=schema,
+        )
+
+    @staticmethod
+    def run_structured(
+        system_prompt: str,
+        user_prompt: str,
+        response_model: type,
+        model: str,
+        keep_alive: str = KEEP_ALIVE,
+        host: Optional[str] = None,
+        priority: int = BATCH,
+        schema: str = "compact",
+    ):
+        """
+        Make one scheduled chat call whose output is constrained to a Pydantic model.
+
+        Args:
+            system_prompt (str): The system prompt; it should be a constant.
+            user_prompt (str): The user prompt, starting with `USER_PROMPT_PREFIX`.
+            response_model (type): The Pydantic model of the output.
+            model (str): The LLM model to use.
+            keep_alive, host, priority, schema: See `run_pipeline`.
+
+        Returns:
+            The output validated as `response_model`.
+        """
+        prefix_tokens = PromptGenerator.estimate_tokens(
+            system_prompt + USER_PROMPT_PREFIX
+        )
+        prompt_tokens = PromptGenerator.estimate_tokens(system_prompt + user_prompt)
+        # Imported here: the ollama client (httpx) adds ~0.5s to every CLI start-up
+        from ollama import Client, chat
+
+        chat_fn = Client(host=host).chat if host else chat
+        response = LLMScheduler.for_endpoint(host).call(
+            chat_fn,
+            priority=priority,
+            cost=prompt_tokens,
+            # Latency grows with the generated tokens far more than with the prompt
+            measure=lambda response: response.eval_count or prompt_tokens,
             messages=[
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": user_prompt},
             ],
             model=model,
-            format=CompositionList.model_json_schema(),
-            options={
-                "temperature": 0.0,
-                "num_ctx": 10000,
-            },  # , "top_p": 0, "top_k": 0},
+            format=Pipeline.decoding_schema(
+                response_model, compact=schema == "compact"
+            ),
+            # Keep the shared prefix in context when a long paper forces a context shift.
+            options={**OLLAMA_OPTIONS, "num_keep": prefix_tokens},
+            keep_alive=keep_alive,
         )
+        stats = Pipeline.prefill_stats(response, prompt_tokens, prefix_tokens)
+        stats.update(Pipeline.decode_stats(response))
+        stats["schema"] = schema
+        stats["model"] = model
+        _local.stats = stats
         print("Raw Response", response.message.content)
-        return CompositionList.model_validate_json(response.message.content)
+        print(
+            f"Prefill: {stats['prompt_tokens_evaluated']} of "
+            f"~{stats['prompt_tokens_estimated']} prompt tokens evaluated, "
+            f"~{stats['cached_tokens_estimated']} reused from cache "
+            f"(~{stats['prefill_seconds_saved']:.2f}s saved); "
+            f"decode: {stats['eval_tokens']} tokens in {stats['eval_seconds']:.2f}s"
+        )
+        return response_model.model_validate_json(response.message.content)
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def decoding_schema(
+        model_class: type = CompositionList, compact: bool = True
+    ) -> dict:
+        """
+        JSON schema passed to Ollama as `format`, built once per model class.
+
+        Ollama turns the schema into a grammar that is checked on every generated token. The
+        compact schema keeps only the structure (types, required keys, `$defs`) and drops
+        titles and descriptions, which the prompt already documents; `model_json_schema()`
+        stays the documentation schema.
+
+        Args:
+            model_class (type): The Pydantic model to describe.
+            compact (bool): Strip the documentation keys; otherwise return the full schema.
+
+        Returns:
+            dict: The JSON schema. It is shared between calls and must not be modified.
+        """
+        full = model_class.model_json_schema()
+        if not compact:
+            return full
+
+        def strip(node, in_mapping=False):
+            if isinstance(node, dict):
+                # Entries of "properties" and "$defs" are names, not schema keywords
+                return {
+                    key: strip(value, key in ("properties", "$defs"))
+                    for key, value in node.items()
+                    if in_mapping or key not in DOC_SCHEMA_KEYS
+                }
+            if isinstance(node, list):
+                return [strip(item) for item in node]
+            return node
+
+        return strip(full)
+
+    @staticmethod
+    def schema_size(compact: bool = True) -> int:
+        """
+        Size of the serialized decoding schema in characters.
+
+        Args:
+            compact (bool): Measure the compact schema; otherwise the full schema.
+
+        Returns:
+            int: Number of characters of the schema JSON.
+        """
+        schema = Pipeline.decoding_schema(CompositionList, compact=compact)
+        return len(json.dumps(schema, separators=(",", ":")))
+
+    @staticmethod
+    def decode_stats(response) -> dict:
+        """
+        Measure the generation phase of a call, where the schema grammar is applied.
+
+        Args:
+            response: The chat response returned by Ollama.
+
+        Returns:
+            dict: Generated tokens, generation time and time per token.
+        """
+        tokens = response.eval_count or 0
+        seconds = (response.eval_duration or 0) / 1e9
+        return {
+            "eval_tokens": tokens,
+            "eval_seconds": seconds,
+            "seconds_per_token": seconds / tokens if tokens else 0.0,
+        }
+
+    @staticmethod
+    def last_stats() -> dict:
+        """
+        Statistics of the most recent `run_pipeline` call in the current thread.
+
+        Returns:
+            dict: See `prefill_stats`; empty if this thread has not run the pipeline yet.
+        """
+        return getattr(_local, "stats", {})
+
+    @staticmethod
+    def prefill_stats(response, prompt_tokens: int, prefix_tokens: int) -> dict:
+        """
+        Measure how much of the prompt Ollama served from its prompt cache.
+
+        Ollama only reports the tokens it actually evaluated, so the difference to the
+        estimated prompt length is the part reused from the cached prefix.
+
+        Args:
+            response: The chat response returned by Ollama.
+            prompt_tokens (int): Estimated number of tokens in the full prompt.
+            prefix_tokens (int): Estimated number of tokens in the byte-stable prefix.
+
+        Returns:
+            dict: Token counts, prefill time and the estimated prefill time saved.
+        """
+        evaluated = response.prompt_eval_count or 0
+        prefill_seconds = (response.prompt_eval_duration or 0) / 1e9
+        cached = min(max(prompt_tokens - evaluated, 0), prefix_tokens)
+        seconds_per_token = prefill_seconds / evaluated if evaluated else 0.0
+        return {
+            "prompt_tokens_estimated": prompt_tokens,
+            "prefix_tokens_estimated": prefix_tokens,
+            "prompt_tokens_evaluated": evaluated,
+            "cached_tokens_estimated": cached,
+            "prefill_seconds": prefill_seconds,
+            "prefill_seconds_saved": cached * seconds_per_token,
+        }
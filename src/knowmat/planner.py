@@ -0,0 +1,403 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import List, Optional
+
+from src.knowmat.cascade import model_cost
+from src.knowmat.pdf_parser import PDFParser
+from src.knowmat.prompt_generator import PromptGenerator
+
+try:
+    import fcntl
+except ImportError:  # Windows: saves are atomic but not serialized across processes
+    fcntl = None
+
+# Where measured per-model throughput is accumulated across runs.
+THROUGHPUT_FILE = os.path.join(
+    os.path.expanduser("~"), ".cache", "knowmat", "throughput.json"
+)
+
+# Assumed throughput of an 8B model (tokens/s) until a model has history; other sizes are
+# scaled by their parameter count.
+DEFAULT_PREFILL_RATE = 1000.0
+DEFAULT_DECODE_RATE = 20.0
+
+# Assumed generated tokens per prompt token until a model has history.
+DEFAULT_OUTPUT_RATIO = 0.15
+
+# Calls of a model needed before its history replaces the defaults.
+MIN_HISTORY_CALLS = 3
+
+# Accumulated fields of a model in the history.
+THROUGHPUT_FIELDS = {
+    "calls": 0,
+    "prompt_tokens": 0,
+    "prompt_tokens_evaluated": 0,
+    "prefill_seconds": 0.0,
+    "eval_tokens": 0,
+    "eval_seconds": 0.0,
+}
+
+
+class ThroughputHistory:
+    """
+    Accumulated Ollama token counts and durations per model, persisted as JSON.
+
+    Each extraction call contributes its prompt tokens, prefill time, generated tokens and
+    generation time (see `Pipeline.last_stats`), so rates improve with every run. Concurrent
+    runs share the file: `save` merges the calls recorded since the last save into the
+    totals on disk under a file lock, and replaces the file atomically.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        """
+        Args:
+            path (str, optional): JSON file of the history, created on the first `save`.
+                Defaults to THROUGHPUT_FILE.
+        """
+        self.path = path or THROUGHPUT_FILE
+        self.lock = threading.Lock()
+        self.models = self.load()
+        # Totals recorded since the last save, not yet in the file
+        self.pending = {}
+
+    def load(self) -> dict:
+        """
+        Reads the totals per model from the file.
+
+        Returns:
+            dict: The totals, empty if the file is missing or unreadable.
+        """
+        if not os.path.exists(self.path):
+            return {}
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except json.JSONDecodeError as e:
+            print(f"Ignoring unreadable throughput history {self.path}: {e}")
+            return {}
+
+    @staticmethod
+    def add(models: dict, model: str, values: dict) -> None:
+        """
+        Adds values to the totals of a model.
+
+        Args:
+            models (dict): Totals per model, updated in place.
+            model (str): Ollama model name.
+            values (dict): Values of (a subset of) THROUGHPUT_FIELDS.
+        """
+        totals = models.setdefault(model, dict(THROUGHPUT_FIELDS))
+        for field, value in values.items():
+            totals[field] = totals.get(field, 0) + value
+
+    def record(self, stats: dict) -> None:
+        """
+        Adds the statistics of one call, or of every call of a paper extracted with several
+        (chunked or two-pass papers list them in 'calls'), so each counts as one sample.
+
+        Args:
+            stats (dict): Statistics of a `Pipeline.run_structured` call or of a paper.
+        """
+        if "calls" in stats:
+            for call in stats["calls"]:
+                self.record(call)
+            return
+        if "eval_tokens" not in stats or not stats.get("model"):
+            return
+        values = {
+            "calls": 1,
+            "prompt_tokens": stats["prompt_tokens_estimated"],
+            "prompt_tokens_evaluated": stats["prompt_tokens_evaluated"],
+            "prefill_seconds": stats["prefill_seconds"],
+            "eval_tokens": stats["eval_tokens"],
+            "eval_seconds": stats["eval_seconds"],
+        }
+        with self.lock:
+            self.add(self.models, stats["model"], values)
+            self.add(self.pending, stats["model"], values)
+
+    def save(self) -> None:
+        """
+        Merges the calls recorded since the last save into the file, re-reading it under an
+        exclusive lock so the calls saved by other runs meanwhile are kept, and replaces it
+        through a temporary file so readers never see a partial write.
+        """
+        with self.lock:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            with open(self.path + ".lock", "a") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                models = self.load()
+                for model, values in self.pending.items():
+                    self.add(models, model, values)
+                fd, temp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+                try:
+                    with os.fdopen(fd, "w") as f:
+                        json.dump(models, f, indent=2)
+                    os.replace(temp_path, self.path)
+                except BaseException:
+                    os.remove(temp_path)
+                    raise
+            self.models = models
+            self.pending = {}
+
+    def rates(self, model: str) -> dict:
+        """
+        Throughput of a model from its history, or scaled defaults without enough history.
+
+        Args:
+            model (str): Ollama model name.
+
+        Returns:
+            dict: 'prefill_rate' and 'decode_rate' (tokens/s), 'output_ratio' (generated per
+            prompt token), 'cached_ratio' (share of the prompt served from the prompt cache)
+            and 'calls' behind the numbers.
+        """
+        totals = self.models.get(model, {})
+        if totals.get("calls", 0) < MIN_HISTORY_CALLS:
+            scale = 8.0 / model_cost(model) if model_cost(model) else 1.0
+            return {
+                "prefill_rate": DEFAULT_PREFILL_RATE * scale,
+                "decode_rate": DEFAULT_DECODE_RATE * scale,
+                "output_ratio": DEFAULT_OUTPUT_RATIO,
+                "cached_ratio": 0.0,
+                "calls": totals.get("calls", 0),
+            }
+        prompt_tokens = max(totals["prompt_tokens"], 1)
+        return {
+            "prefill_rate": totals["prompt_tokens_evaluated"]
+            / max(totals["prefill_seconds"], 1e-9),
+            "decode_rate": totals["eval_tokens"] / max(totals["eval_seconds"], 1e-9),
+            "output_ratio": totals["eval_tokens"] / prompt_tokens,
+            "cached_ratio": 1.0 - totals["prompt_tokens_evaluated"] / prompt_tokens,
+            "calls": totals["calls"],
+        }
+
+
+def estimate_prompt_tokens(text: str) -> int:
+    """
+    Estimated prompt tokens of extracting a paper with `Pipeline.run_pipeline`.
+
+    Args:
+        text (str): The parsed paper text.
+
+    Returns:
+        int: Estimated tokens of the system and user prompt.
+    """
+    return PromptGenerator.estimate_tokens(
+        PromptGenerator.generate_system_prompt()
+        + PromptGenerator.generate_user_prompt(text)
+    )
+
+
+def estimate_papers(pdf_paths: List[str]) -> dict:
+    """
+    Parses papers and estimates their prompt tokens; unreadable papers are left out.
+
+    Args:
+        pdf_paths (List[str]): Paths to the PDF files.
+
+    Returns:
+        dict: Estimated prompt tokens per file name.
+    """
+    tokens = {}
+    for path in pdf_paths:
+        try:
+            text = PDFParser.parse_pdf(path)
+        except Exception as e:
+            print(f"Error processing {os.path.basename(path)}: {e}")
+            continue
+        tokens[os.path.basename(path)] = estimate_prompt_tokens(text)
+    return tokens
+
+
+def estimate_seconds(prompt_tokens: int, rates: dict) -> float:
+    """
+    Predicted wall time of one extraction call.
+
+    Args:
+        prompt_tokens (int): Estimated prompt tokens, see `estimate_prompt_tokens`.
+        rates (dict): Model rates, see `ThroughputHistory.rates`.
+
+    Returns:
+        float: Seconds of prefill plus generation.
+    """
+    evaluated = prompt_tokens * (1.0 - rates["cached_ratio"])
+    generated = prompt_tokens * rates["output_ratio"]
+    return evaluated / rates["prefill_rate"] + generated / rates["decode_rate"]
+
+
+def plan_run(
+    paper_tokens: dict,
+    models: List[str],
+    runs: int = 1,
+    parallel: int = 1,
+    history: Optional[ThroughputHistory] = None,
+) -> list:
+    """
+    Predicts the token counts and wall time of extracting papers with each model.
+
+    Args:
+        paper_tokens (dict): Estimated prompt tokens per paper, see `estimate_prompt_tokens`.
+        models (List[str]): Models (configurations) to plan.
+        runs (int): Repetitions of each configuration.
+        parallel (int): Requests the server processes at once (OLLAMA_NUM_PARALLEL); the
+            predicted time is divided by it, an optimistic bound.
+        history (ThroughputHistory, optional): Measured rates. Defaults to THROUGHPUT_FILE.
+
+    Returns:
+        list: One dict per model with 'model', 'papers', 'prompt_tokens', 'output_tokens',
+        'seconds' (all runs), 'seconds_per_paper' and 'calls' of history behind the rates.
+    """
+    history = history or ThroughputHistory()
+    prompt_tokens = sum(paper_tokens.values())
+    plan = []
+    for model in models:
+        rates = history.rates(model)
+        seconds = sum(
+            estimate_seconds(tokens, rates) for tokens in paper_tokens.values()
+        )
+        plan.append(
+            {
+                "model": model,
+                "papers": len(paper_tokens),
+                "prompt_tokens": prompt_tokens * runs,
+                "output_tokens": int(prompt_tokens * rates["output_ratio"] * runs),
+                "seconds": seconds * runs / max(parallel, 1),
+                "seconds_per_paper": seconds / max(len(paper_tokens), 1),
+                "calls": rates["calls"],
+            }
+        )
+    return plan
+
+
+def format_seconds(seconds: float) -> str:
+    """Formats a duration as e.g. '2d 3h', '4h 12m' or '35s'."""
+    seconds = int(seconds)
+    days, rest = divmod(seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, secs = divmod(rest, 60)
+    if days:
+        return f"{days}d {hours}h"
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {secs:02d}s"
+    return f"{secs}s"
+
+
+def print_plan(plan: list) -> None:
+    """Prints the output of `plan_run`, one line per model and the total."""
+    for row in plan:
+        source = f"{row['calls']} calls" if row["calls"] else "defaults"
+        print(
+            f"{row['model']}: {row['papers']} papers, "
+            f"{row['prompt_tokens']:,} prompt + ~{row['output_tokens']:,} generated tokens, "
+            f"~{format_seconds(row['seconds'])} "
+            f"({row['seconds_per_paper']:.1f}s/paper, rates from {source})"
+        )
+    print(f"Total: ~{format_seconds(sum(row['seconds'] for row in plan))}")
+
+
+class ETATracker:
+    """
+    A live ETA of an extraction run, from the throughput measured so far.
+
+    Progress is counted in work units: a paper's estimated prompt tokens when per-paper
+    estimates are given (long papers then count for more), otherwise one per paper. When a
+    run mixes models, `weight` is set per configuration (e.g. to the model's predicted
+    seconds per token) so a paper of a slow model counts for more. Before the first paper
+    finishes, the ETA is the planned time.
+    """
+
+    def __init__(
+        self,
+        total_papers: int,
+        paper_tokens: Optional[dict] = None,
+        total_work: Optional[float] = None,
+        planned_seconds: Optional[float] = None,
+        history: Optional[ThroughputHistory] = None,
+    ):
+        """
+        Args:
+            total_papers (int): Papers in the run (counting every configuration).
+            paper_tokens (dict, optional): Estimated prompt tokens per file name.
+            total_work (float, optional): Work units of the whole run. Defaults to the sum
+                of `paper_tokens`, or `total_papers` without estimates.
+            planned_seconds (float, optional): Planned duration, see `plan_run`.
+            history (ThroughputHistory, optional): Receives the statistics of every call;
+                saved by `finish`.
+        """
+        self.total_papers = total_papers
+        self.paper_tokens = paper_tokens or {}
+        if total_work is None:
+            total_work = (
+                sum(self.paper_tokens.values()) if self.paper_tokens else total_papers
+            )
+        self.total_work = total_work
+        self.weight = 1.0
+        self.planned_seconds = planned_seconds
+        self.history = history
+        self.done_papers = 0
+        self.done_work = 0.0
+        self.start = time.perf_counter()
+        self.lock = threading.Lock()
+
+    def eta(self) -> Optional[float]:
+        """
+        Seconds until the run finishes at the rate measured so far.
+
+        Returns:
+            Optional[float]: The ETA, or None before any progress without a plan.
+        """
+        elapsed = time.perf_counter() - self.start
+        if not self.done_work:
+            return self.planned_seconds
+        rate = self.done_work / elapsed
+        return max(self.total_work - self.done_work, 0) / rate
+
+    def update(self, file_name: str, stats: Optional[dict] = None) -> None:
+        """
+        Counts a finished (or skipped) paper and prints the progress.
+
+        Args:
+            file_name (str): The paper.
+            stats (dict, optional): Its extraction statistics.
+        """
+        with self.lock:
+            self.done_papers += 1
+            work = self.paper_tokens.get(file_name, 0) if self.paper_tokens else 1
+            self.done_work += work * self.weight
+            if self.history is not None and stats:
+                self.history.record(stats)
+            eta = self.eta()
+        elapsed = time.perf_counter() - self.start
+        print(
+            f"Progress: {self.done_papers}/{self.total_papers} papers, "
+            f"{format_seconds(elapsed)} elapsed"
+            + (f", ETA {format_seconds(eta)}" if eta is not None else "")
+        )
+
+    def finish(self) -> float:
+        """
+        Saves the throughput history and reports the run time against the plan.
+
+        Returns:
+            float: Elapsed seconds.
+        """
+        elapsed = time.perf_counter() - self.start
+        if self.history is not None:
+            self.history.save()
+        planned = (
+            f" (planned ~{format_seconds(self.planned_seconds)})"
+            if self.planned_seconds
+            else ""
+        )
+        print(
+            f"Finished {self.done_papers} papers in {format_seconds(elapsed)}{planned}"
+        )
+        return elapsed
@@ -1,8 +1,25 @@
+import hashlib
 import json
 import os
+from collections import Counter
+from typing import Optional
 
+import numpy as np
 import pandas as pd
-from sentence_transformers import SentenceTransformer, util
+
+from src.knowmat.ann_index import IVFIndex
+from src.knowmat.embedding_backend import EMBEDDING_MODEL, load_embedding_model
+from src.knowmat.extraction_table import MAPPED_FIELDS
+from src.knowmat.mapping_memo import MappingMemo, memo_version
+from src.knowmat.property_matcher import TrigramIndex, normalize_property_name
+from src.knowmat.response_parser import ResponseParser
+from src.knowmat.unit_normalizer import UnitNormalizer
+
+# Matching tiers, tried in this order by `PostProcessor.match_property`.
+MATCH_TIERS = ("exact", "normalized", "trigram", "memo", "embedding", "unmatched")
+
+# Where candidate embeddings and their ANN index are persisted.
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "knowmat")
 
 
 class PostProcessor:
@@ -11,26 +28,126 @@ class PostProcessor:
     It maps extracted properties to the closest match from a predefined list using SentenceTransformers.
     """
 
-    def __init__(self, properties_file: str, extracted_data_file: str):
+    def __init__(
+        self,
+        properties_file: str,
+        extracted_data_file: str,
+        normalize_units: bool = True,
+        cache_dir: Optional[str] = None,
+        batch_size: int = 64,
+        model_cache_dir: Optional[str] = None,
+        backend: str = "torch",
+        num_threads: Optional[int] = None,
+        memo: bool = True,
+    ):
         """
         Initializes the PostProcessor with paths to the properties file and extracted data CSV.
-        Also loads the sentence transformer model and precomputes embeddings for all standard properties.
+        The sentence transformer model and the ANN index over the embeddings of all standard
+        properties are loaded on first use, so rows resolved by the lexical tiers never load torch.
 
         Args:
             properties_file (str): Path to the JSON file containing allowed properties.
             extracted_data_file (str): Path to the CSV file containing extracted property data.
+            normalize_units (bool): Also add normalized values and units (see UnitNormalizer).
+            cache_dir (str, optional): Directory of the persisted property index.
+                Defaults to ~/.cache/knowmat.
+            batch_size (int): Number of property names encoded per batch by the embedding model.
+            model_cache_dir (str, optional): Download directory of the SentenceTransformer
+                model. Defaults to the sentence-transformers cache.
+            backend (str): Inference backend of the embedding model, one of
+                `embedding_backend.EMBEDDING_BACKENDS`. 'torch' uses the GPU if there is one;
+                'int8' and 'onnx' are faster on the CPU (check them with
+                `embedding_backend.parity_check`).
+            num_threads (int, optional): Inference threads, see
+                `embedding_backend.load_embedding_model`.
+            memo (bool): Look up and store embedding-tier results in the persistent
+                `MappingMemo` in `cache_dir`, so names resolved in earlier runs are not
+                encoded again.
         """
         self.properties_file = properties_file
         self.extracted_data_file = extracted_data_file
+        self.normalize_units = normalize_units
         self.property_lookup = self.load_properties()
-        self.model = SentenceTransformer(
-            "all-distilroberta-v1"
-        )  # or any other suitable model
-        # Precompute embeddings for the candidate properties (keys of property_lookup)
-        self.property_embeddings = {
-            prop: self.model.encode(prop, convert_to_tensor=True)
-            for prop in self.property_lookup.keys()
-        }
+        # Lexical indexes for the fast tiers in front of the embedding model
+        self.normalized_lookup = {}
+        for prop in self.property_lookup:
+            self.normalized_lookup.setdefault(normalize_property_name(prop), prop)
+        self.trigram_index = TrigramIndex(self.normalized_lookup)
+        self.match_stats = Counter()
+        # Candidate properties (keys of property_lookup) in index order
+        self.candidates = list(self.property_lookup.keys())
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.batch_size = batch_size
+        self.model_cache_dir = model_cache_dir
+        self.backend = backend
+        self.num_threads = num_threads
+        # Embeddings of extracted names, filled in batches by `prefetch_embeddings`
+        self.embeddings = {}
+        self._model = None
+        self._property_index = None
+        # Persisted embedding-tier results, and the ones loaded in this run
+        self.memo = None
+        if memo:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self.memo = MappingMemo(
+                os.path.join(self.cache_dir, "property_memo.sqlite"),
+                memo_version(properties_file, f"{EMBEDDING_MODEL}/{backend}"),
+            )
+        self.memoized = {}
+
+    @property
+    def model(self):
+        """
+        The SentenceTransformer model on the selected backend, loaded on first access.
+        """
+        if self._model is None:
+            self._model = load_embedding_model(
+                self.backend, self.model_cache_dir, self.num_threads
+            )
+        return self._model
+
+    @property
+    def property_index(self) -> IVFIndex:
+        """
+        The ANN index over the candidate embeddings, loaded on first access.
+        """
+        if self._property_index is None:
+            self._property_index = self.load_property_index(self.cache_dir)
+        return self._property_index
+
+    def load_property_index(self, cache_dir: str) -> IVFIndex:
+        """
+        Loads the ANN index over the candidate embeddings from the cache, or encodes the
+        candidates, builds the index and saves it. The cache file is keyed by the candidate
+        names, the embedding model and its backend, so it is rebuilt whenever one changes.
+
+        Args:
+            cache_dir (str): Directory of the persisted index.
+
+        Returns:
+            IVFIndex: The index; its ids are positions in `self.candidates`.
+        """
+        key = hashlib.sha256(
+            "\n".join([EMBEDDING_MODEL, self.backend, *self.candidates]).encode("utf-8")
+        ).hexdigest()[:16]
+        index_path = os.path.join(cache_dir, f"property_index_{key}.npz")
+        if os.path.exists(index_path):
+            return IVFIndex.load(index_path)
+
+        embeddings = self.model.encode(
+            self.candidates,
+            batch_size=self.batch_size,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+        index = IVFIndex(embeddings)
+        print(
+            f"Built property index over {len(self.candidates)} candidates "
+            f"(estimated recall@1 vs. brute force: {index.estimate_recall():.3f})"
+        )
+        os.makedirs(cache_dir, exist_ok=True)
+        index.save(index_path)
+        return index
 
     def load_properties(self) -> dict:
         """
@@ -50,9 +167,120 @@ class PostProcessor:
                     lookup[prop.lower()] = (domain, category, prop)
         return lookup
 
+    def match_lexical(self, property_name_clean: str) -> Optional[tuple]:
+        """
+        Tries the lexical tiers of `match_property`: an exact lookup, a lookup of the normalized
+        name (case, plurals, hyphens, Unicode variants) and a character trigram index for
+        near-miss spellings.
+
+        Args:
+            property_name_clean (str): The lowercased and stripped property name.
+
+        Returns:
+            Optional[tuple]: (candidate, score, tier), or None if no lexical tier matches.
+        """
+        if property_name_clean in self.property_lookup:
+            return property_name_clean, 1.0, "exact"
+
+        property_name_normalized = normalize_property_name(property_name_clean)
+        if property_name_normalized in self.normalized_lookup:
+            return self.normalized_lookup[property_name_normalized], 1.0, "normalized"
+
+        near_miss = self.trigram_index.query(property_name_normalized)
+        if near_miss is not None:
+            return self.normalized_lookup[near_miss[0]], near_miss[1], "trigram"
+        return None
+
+    def prefetch_embeddings(self, property_names) -> int:
+        """
+        Encodes the distinct names that neither a lexical tier nor the memo resolves,
+        `batch_size` names per forward pass, so `match_property` does not run the model once
+        per name. Memo entries of the names are loaded in the same pass.
+
+        Args:
+            property_names (Iterable[str]): Extracted property names.
+
+        Returns:
+            int: Number of names encoded.
+        """
+        pending = [
+            name
+            for name in dict.fromkeys(
+                name.lower().strip() for name in property_names if isinstance(name, str)
+            )
+            if name not in self.embeddings
+            and name not in self.memoized
+            and self.match_lexical(name) is None
+        ]
+        if pending and self.memo is not None:
+            self.memoized.update(self.memo.lookup(pending))
+            pending = [name for name in pending if name not in self.memoized]
+        if pending:
+            embeddings = self.model.encode(
+                pending,
+                batch_size=self.batch_size,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+            )
+            self.embeddings.update(zip(pending, embeddings))
+        return len(pending)
+
+    def match_property(self, property_name: str) -> tuple:
+        """
+        Finds the closest candidate property with a tiered matcher: the lexical tiers of
+        `match_lexical` first, then the persistent memo of earlier embedding matches, and
+        the SentenceTransformer embeddings only as a last resort.
+
+        Args:
+            property_name (str): The extracted property name.
+
+        Returns:
+            tuple: (candidate, score, tier) where candidate is a key of property_lookup (None if
+            no match above the threshold is found) and tier is one of MATCH_TIERS.
+        """
+        property_name_clean = property_name.lower().strip()
+        lexical = self.match_lexical(property_name_clean)
+        if lexical is not None:
+            return lexical
+
+        if (
+            self.memo is not None
+            and property_name_clean not in self.memoized
+            and property_name_clean not in self.embeddings
+        ):
+            self.memoized.update(self.memo.lookup([property_name_clean]))
+        if property_name_clean in self.memoized:
+            _, _, std_property, score = self.memoized[property_name_clean]
+            return (std_property.lower() if std_property else None), score, "memo"
+
+        # Get the embedding for the extracted property
+        property_embedding = self.embeddings.get(property_name_clean)
+        if property_embedding is None:
+            property_embedding = self.model.encode(
+                property_name_clean, convert_to_numpy=True, normalize_embeddings=True
+            )
+
+        # Find the candidate with the highest cosine similarity in the ANN index
+        scores, ids = self.property_index.search(property_embedding, k=1)
+        best_score = float(scores[0, 0])
+        best_match = self.candidates[ids[0, 0]] if ids[0, 0] >= 0 else None
+
+        # You can adjust the threshold based on your validation
+        if not (best_match and best_score > 0.5):
+            best_match = None
+        if self.memo is not None:
+            mapping = (
+                self.property_lookup[best_match] if best_match else (None, None, None)
+            )
+            self.memo.put(property_name_clean, *mapping, best_score)
+            self.memoized[property_name_clean] = (*mapping, best_score)
+        if best_match:
+            return best_match, best_score, "embedding"
+        return None, best_score, "unmatched"
+
     def find_closest_property(self, property_name: str):
         """
-        Finds the closest matching property from the lookup dictionary using SentenceTransformer embeddings.
+        Finds the closest matching property from the lookup dictionary, see `match_property`.
 
         Args:
             property_name (str): The extracted property name.
@@ -61,32 +289,124 @@ class PostProcessor:
             tuple: (domain, category, matched_property) if a match above threshold is found,
             otherwise (None, None, None).
         """
-        property_name_clean = property_name.lower().strip()
-        # Get the embedding for the extracted property
-        property_embedding = self.model.encode(
-            property_name_clean, convert_to_tensor=True
+        candidate, _, tier = self.match_property(property_name)
+        self.match_stats[tier] += 1
+        if candidate is None:
+            return None, None, None
+        return self.property_lookup[candidate]
+
+    def map_names(self, property_names: list, counts: Optional[list] = None) -> list:
+        """
+        Maps distinct property names, each once, with batched embeddings for the names the
+        lexical tiers miss.
+
+        Args:
+            property_names (list): Distinct extracted property names.
+            counts (list, optional): Number of rows of each name, so the tier statistics
+                still count rows. Defaults to 1 per name.
+
+        Returns:
+            list: (domain, category, matched_property) per name, see `find_closest_property`.
+        """
+        self.prefetch_embeddings(property_names)
+        mapped = []
+        for i, name in enumerate(property_names):
+            candidate, _, tier = self.match_property(name)
+            self.match_stats[tier] += counts[i] if counts is not None else 1
+            mapped.append(
+                (None, None, None)
+                if candidate is None
+                else self.property_lookup[candidate]
+            )
+        if self.memo is not None:
+            self.memo.flush()
+        return mapped
+
+    def map_table(self, table) -> None:
+        """
+        Adds the domain, category and standard_property_name columns to an `ExtractionTable`.
+        Names are mapped per entry of the table's property name pool, i.e. once per distinct
+        name, and stored per pool code.
+
+        Args:
+            table (ExtractionTable): The extraction results.
+        """
+        names = table.pools["property_name"].values
+        codes = np.frombuffer(table.property_columns["property_name"], dtype=np.int32)
+        counts = np.bincount(codes[codes >= 0], minlength=len(names)).tolist()
+        mapped = self.map_names(names, counts)
+        table.mapped = {
+            field: [row[i] for row in mapped] for i, field in enumerate(MAPPED_FIELDS)
+        }
+
+    def match_report(self) -> dict:
+        """
+        Reports how many property names each matching tier resolved so far.
+
+        Returns:
+            dict: Mapping of tier to (count, hit rate).
+        """
+        total = sum(self.match_stats.values())
+        return {
+            tier: (
+                self.match_stats[tier],
+                self.match_stats[tier] / total if total else 0.0,
+            )
+            for tier in MATCH_TIERS
+        }
+
+    def print_match_report(self):
+        """
+        Prints the per-tier hit rates of the property matcher.
+        """
+        report = ", ".join(
+            f"{tier}: {count} ({rate:.1%})"
+            for tier, (count, rate) in self.match_report().items()
         )
-        best_match = None
-        best_score = -1
+        print(f"Property matching tiers - {report}")
+        if self.memo is not None:
+            print(
+                f"Mapping memo - {self.memo.hits} hits, {self.memo.misses} misses, "
+                f"{len(self.memo)} names stored"
+            )
 
-        # Compare the extracted property's embedding against all candidate embeddings
-        for candidate, candidate_embedding in self.property_embeddings.items():
-            # Compute cosine similarity (value between -1 and 1)
-            score = util.cos_sim(property_embedding, candidate_embedding).item()
-            if score > best_score:
-                best_score = score
-                best_match = candidate
+    def map_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Adds the domain, category and standard_property_name columns (plus normalized_value
+        and normalized_unit if unit normalization is enabled) to rows of extracted data.
+        Each distinct property name is mapped once.
 
-        # You can adjust the threshold based on your validation
-        if best_match and best_score > 0.5:
-            return self.property_lookup[best_match]
-        return None, None, None
+        Args:
+            df (pd.DataFrame): Rows with the CSV columns of ResponseParser.
+
+        Returns:
+            pd.DataFrame: The same DataFrame with the new columns.
+        """
+        codes, names = pd.factorize(df["property name"])
+        mapped = self.map_names(
+            list(names), np.bincount(codes[codes >= 0], minlength=len(names)).tolist()
+        )
+        mapped = np.array(mapped + [(None, None, None)], dtype=object)
+        df[list(MAPPED_FIELDS)] = mapped[codes]
+
+        # Convert values to SI or per-property canonical units
+        if self.normalize_units:
+            UnitNormalizer.normalize_dataframe(df)
+        return df
 
-    def process_extracted_data(self):
+    def process_extracted_data(self, incremental: bool = False):
         """
         Reads the extracted data CSV, matches properties using the SentenceTransformer approach,
-        updates the DataFrame with new columns: domain, category, and standard_property_name, and
+        updates the DataFrame with new columns: domain, category, and standard_property_name (plus
+        normalized_value and normalized_unit if unit normalization is enabled), and
         saves the updated DataFrame back to the same file.
+
+        Args:
+            incremental (bool): Only map the rows without domain, category and
+                standard_property_name (e.g. rows appended by ResponseParser since the last
+                run), and leave the file untouched if there are none. Unmatched rows count as
+                unmapped and are matched again, which the mapping memo answers without
+                encoding.
         """
         if not os.path.exists(self.extracted_data_file):
             raise FileNotFoundError(f"File not found: {self.extracted_data_file}")
@@ -98,20 +418,71 @@ class PostProcessor:
         if "property name" not in extracted_df.columns:
             raise ValueError("The 'property name' column is missing in extracted data")
 
-        # Apply matching function and update the DataFrame with new columns: domain,
-        # category, standard_property_name
-        extracted_df[["domain", "category", "standard_property_name"]] = extracted_df[
-            "property name"
-        ].apply(lambda x: pd.Series(self.find_closest_property(x)))
+        if incremental and set(MAPPED_FIELDS) <= set(extracted_df.columns):
+            unmapped = extracted_df[list(MAPPED_FIELDS)].isna().all(axis=1).to_numpy()
+            if not unmapped.any():
+                print(f"All rows of {self.extracted_data_file} are already mapped")
+                return
+            rows = self.map_dataframe(extracted_df[unmapped].copy())
+            extracted_df = extracted_df.reindex(
+                columns=extracted_df.columns.union(rows.columns, sort=False)
+            )
+            # Columns read back all-NaN (or just added) are float64, which pandas will not
+            # upcast on a partial assignment of strings
+            for column in rows.columns:
+                if extracted_df[column].dtype != rows[column].dtype:
+                    extracted_df[column] = extracted_df[column].astype(object)
+            extracted_df.loc[unmapped, rows.columns] = rows
+            print(f"Mapped {int(unmapped.sum())} new of {len(extracted_df)} rows")
+        else:
+            # Map each distinct name once and update the DataFrame with new columns: domain,
+            # category, standard_property_name
+            self.map_dataframe(extracted_df)
 
         # Save the updated DataFrame back to the same file
         extracted_df.to_csv(self.extracted_data_file, index=False)
         print(f"Updated extracted data saved to {self.extracted_data_file}")
+        self.print_match_report()
+
+    def append_processed(self, extracted_result: list) -> list:
+        """
+        Post-processes newly extracted papers and appends their rows to the extracted data
+        CSV, aligned to its header, so the cost depends on the new rows only: the existing
+        rows are neither read nor rewritten. Replaces `ResponseParser.save_to_csv` followed
+        by `process_extracted_data` and `update_extracted_json`.
+
+        Args:
+            extracted_result (list): The extracted result (from JSONExtractor.extract).
+
+        Returns:
+            list: The extracted result with the new keys, see `update_extracted_json`.
+        """
+        rows = self.map_dataframe(ResponseParser.to_dataframe(extracted_result))
+        ResponseParser.append_to_csv(rows, self.extracted_data_file)
+        print(f"Appended {len(rows)} post-processed rows to {self.extracted_data_file}")
+
+        # The rows are in the order of the properties, see `ResponseParser.to_dataframe`
+        mapped = rows[list(MAPPED_FIELDS)].itertuples(index=False)
+        for entry in extracted_result:
+            for composition in entry["data"].compositions:
+                for prop in composition.properties_of_composition:
+                    domain, category, std_property = next(mapped)
+                    prop_dict = prop.__dict__
+                    prop_dict["standard_property_name"] = std_property
+                    prop_dict["category"] = category
+                    prop_dict["domain"] = domain
+
+        if self.normalize_units:
+            UnitNormalizer.normalize_extracted_json(extracted_result)
+
+        self.print_match_report()
+        return extracted_result
 
     def update_extracted_json(self, extracted_result):
         """
         Updates the extracted JSON data by adding 'domain', 'category', and 'standard_property_name'
-        keys after each 'property_name' in the properties list for each composition.
+        keys after each 'property_name' in the properties list for each composition, followed by
+        'normalized_value' and 'normalized_unit' if unit normalization is enabled.
 
         Args:
             extracted_result (list): The extracted result (from JSONExtractor.extract).
@@ -120,6 +491,11 @@ class PostProcessor:
             list: The updated extracted result.
         """
         # Assuming extracted_result[0]["data"].compositions is a list of composition objects.
+        self.prefetch_embeddings(
+            prop.property_name
+            for composition in extracted_result[0]["data"].compositions
+            for prop in composition.properties_of_composition
+        )
         for composition in extracted_result[0]["data"].compositions:
             for prop in composition.properties_of_composition:
                 domain, category, std_property = self.find_closest_property(
@@ -130,5 +506,10 @@ class PostProcessor:
                 prop_dict["standard_property_name"] = std_property
                 prop_dict["category"] = category
                 prop_dict["domain"] = domain
+        if self.memo is not None:
+            self.memo.flush()
+
+        if self.normalize_units:
+            UnitNormalizer.normalize_extracted_json(extracted_result[:1])
 
         return extracted_result
@@ -1,16 +1,65 @@
+# Fixed opening of every user prompt. Together with the system prompt it forms a
+# byte-stable prefix, so Ollama can reuse the KV cache of the prefix across papers.
+USER_PROMPT_PREFIX = "Here is some information from a materials science literature:\n"
+
+# Shorter variant of the system prompt without indentation and worked example.
+COMPACT_SYSTEM_PROMPT = """You extract structured data from materials science text.
+For every material composition, report:
+- composition: the chemical composition, one entry per composition (merge all mentions).
+- processing_conditions: all processing steps with temperature, pressure, time and atmosphere, \
+separated by semicolons, or "not provided".
+- characterization: object mapping each technique (e.g. XRD, SEM) to its findings, separated by semicolons, \
+or null if none is mentioned.
+- properties_of_composition: every measured property with property_name, value (float), unit, \
+measurement_condition ("not provided" if missing) and additional_information (null if none). \
+Record repeated measurements of a property as separate entries.
+Never alter numerical values, units or measurement conditions, and never write units as Unicode escapes.
+Return only JSON of the form {"compositions": [...]} with no additional text."""
+
+# First pass of the two-pass extraction: list the compositions and where they are discussed.
+DISCOVERY_SYSTEM_PROMPT = """You index materials science text split into numbered segments like [3].
+List every distinct material composition the text reports data for (merge all mentions of the same \
+composition). For each, give the numbers of all segments that describe its processing, characterization \
+or measured properties, including segments on methods shared by several compositions.
+Return only JSON of the form {"compositions": [{"composition": "string", "segments": [int, ...]}]}."""
+
+# Second pass: extract one composition from the segments found for it.
+COMPOSITION_SYSTEM_PROMPT = """You extract structured data for ONE material composition from excerpts \
+of a materials science text. Ignore data that belongs to other compositions.
+Report:
+- composition: the composition named at the end of the user message.
+- processing_conditions: all processing steps with temperature, pressure, time and atmosphere, \
+separated by semicolons, or "not provided".
+- characterization: object mapping each technique (e.g. XRD, SEM) to its findings, separated by semicolons, \
+or null if none is mentioned.
+- properties_of_composition: every measured property with property_name, value (float), unit, \
+measurement_condition ("not provided" if missing) and additional_information (null if none). \
+Record repeated measurements of a property as separate entries.
+Never alter numerical values, units or measurement conditions, and never write units as Unicode escapes.
+Return only JSON with these four keys and no additional text."""
+
+
 class PromptGenerator:
     """
     A class for generating system and user prompts for the LLM pipeline.
     """
 
     @staticmethod
-    def generate_system_prompt() -> str:
+    def generate_system_prompt(compact: bool = False) -> str:
         """
         Generate the system prompt for guiding the LLM.
 
+        The returned text is a constant, so it is byte-identical on every call and can be
+        served from the model's prompt cache.
+
+        Args:
+            compact (bool): Return the shorter prompt without the worked example.
+
         Returns:
             str: The system prompt text.
         """
+        if compact:
+            return COMPACT_SYSTEM_PROMPT
         return """
             You are an expert in extracting scientific information from materials science text.
             Your task is to extract material compositions, their processing conditions, characterization information,
@@ -31,7 +80,7 @@ class PromptGenerator:
             Record these as a dictionary where the keys are the names of the techniques,
             and the values are the corresponding findings. If multiple findings exist for a technique,
             combine them into a single string separated by semicolons.
-            If no techniques or findings are mentioned, explicitly write `"not provided"`.
+            If no techniques or findings are mentioned, write `null`.
 
             3. **Group all properties under a single entry for each composition**: Ensure that all properties for
             the same composition are grouped together, regardless of differences in measurement conditions. Each
@@ -65,39 +114,31 @@ class PromptGenerator:
             ### Output Format
             STRICTLY follow the JSON format below to return the extracted information:
             ```json
-            {{
+            {
                 "compositions": [
-                    {{
+                    {
                         "composition": "string",
                         "processing_conditions": "string (or 'not provided' if not mentioned)",
-                        "characterization": {{
-                            "technique_1": "finding(s) (or 'not provided' if not mentioned)",
+                        "characterization": {
+                            "technique_1": "finding(s)",
                             "technique_2": "finding(s)",
                             ...
-                        }},
+                        },
                         "properties_of_composition": [
-                            {{
-                                "property_name": "string (from allowed list, closest match)",
-                                "value": float,
-                                "unit": "string",
-                                "measurement_condition": "string",
-                                "additional_information": "string (or null if not mentioned)"
-                            }}
-                        ],
-                        "non_standard_properties_of_composition": [
-                            {{
-                                "property_name": "string (not from allowed list)",
+                            {
+                                "property_name": "string",
                                 "value": float,
                                 "unit": "string",
                                 "measurement_condition": "string",
                                 "additional_information": "string (or null if not mentioned)"
-                            }}
+                            }
                         ]
-                    }},
+                    },
                     ...
                 ]
-            }}
+            }
             ```
+            If no characterization technique is mentioned, `characterization` is `null` instead of an object.
 
             ### Example Output
             For the input text: "Bi2Te3 was processed using SPS at 300°C under 50 MPa for 10 minutes. XRD showed lattice
@@ -108,37 +149,35 @@ class PromptGenerator:
 
             The output should be:
             ```json
-            {{
+            {
                 "compositions": [
-                    {{
+                    {
                         "composition": "Bi2Te3",
                         "processing_conditions": "SPS at 300°C under 50 MPa for 10 minutes",
-                        "characterization": {{
+                        "characterization": {
                             "XRD": "lattice parameter: 3.5 Å",
                             "SEM": "grain size: 50 nm"
-                        }},
+                        },
                         "properties_of_composition": [
-                            {{
+                            {
                                 "property_name": "Seebeck coefficient",
                                 "value": 200.0,
                                 "unit": "µV/K",
                                 "measurement_condition": "at 300 K in a polycrystalline state",
                                 "additional_information": "anisotropy ranging from 190 to 210 µV/K along different
                                 crystallographic axes"
-                            }}
-                        ],
-                        "non_standard_properties_of_composition": [
-                            {{
+                            },
+                            {
                                 "property_name": "ZT value",
                                 "value": 1.2,
                                 "unit": "dimensionless",
                                 "measurement_condition": "at 300 K",
                                 "additional_information": null
-                            }}
+                            }
                         ]
-                    }}
+                    }
                 ]
-            }}```
+            }```
 
             Do not include any additional text or explanation in your response."""
 
@@ -154,6 +193,19 @@ class PromptGenerator:
         Returns:
             str: The user prompt text.
         """
-        return f"""Here is some information from a materials science literature:\n{text}\n\n
+        return f"""{USER_PROMPT_PREFIX}{text}\n\n
             Extract data from it following the instructions.
             """
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """
+        Roughly estimate the number of LLM tokens in a text (about 4 characters per token).
+
+        Args:
+            text (str): The text to measure.
+
+        Returns:
+            int: Estimated token count.
+        """
+        return (len(text) + 3) // 4
@@ -0,0 +1,147 @@
+import re
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+
+# Minimum Dice similarity of character trigrams for a candidate to be checked as a near-miss.
+TRIGRAM_CANDIDATE_THRESHOLD = 0.6
+
+# Number of trigram candidates checked word by word.
+TRIGRAM_CANDIDATES = 5
+
+# Words shorter than this (and words with digits) must match exactly: one edit turns
+# '4f' into '5f' or 'bulk' into 'bull'.
+MIN_FUZZY_WORD = 5
+
+# Words longer than this may differ by two edits, shorter ones by one.
+LONG_WORD = 12
+
+
+def _singular(word: str) -> str:
+    """Strip common English plural endings from a word."""
+    if len(word) > 4 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 4 and word.endswith("sses"):
+        return word[:-2]
+    if len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+@lru_cache(maxsize=100000)
+def normalize_property_name(name: str) -> str:
+    """
+    Normalize a property name so spelling variants map to the same key: Unicode compatibility
+    forms, case, hyphens/underscores/slashes, punctuation, whitespace and plurals.
+
+    Args:
+        name (str): The property name.
+
+    Returns:
+        str: The normalized name, e.g. 'Seebeck-Coefficients' -> 'seebeck coefficient'.
+    """
+    name = unicodedata.normalize("NFKC", name).lower()
+    name = re.sub(r"[-_/‐‑–—]", " ", name)
+    name = re.sub(r"[^\w\s]", "", name)
+    return " ".join(_singular(word) for word in name.split())
+
+
+def _trigrams(text: str) -> set:
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance of two strings, stopping early once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(
+                min(
+                    previous[j] + 1,
+                    current[j - 1] + 1,
+                    previous[j - 1] + (char_a != char_b),
+                )
+            )
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+def _is_near_miss(query: str, candidate: str) -> bool:
+    """
+    Accept a candidate only if both have the same words up to small typos: short words and
+    words with digits must match exactly, others may differ by one edit (two for words longer
+    than LONG_WORD). This keeps e.g. 'direct' and 'indirect', '4f' and '5f', or 'peritectic'
+    and 'peritectoid' apart.
+    """
+    query_words, candidate_words = query.split(), candidate.split()
+    if len(query_words) != len(candidate_words):
+        return False
+    for q, c in zip(query_words, candidate_words):
+        if q == c:
+            continue
+        shortest = min(len(q), len(c))
+        if shortest < MIN_FUZZY_WORD or any(char.isdigit() for char in q + c):
+            return False
+        limit = 2 if shortest > LONG_WORD else 1
+        if _edit_distance(q, c, limit) > limit:
+            return False
+    return True
+
+
+class TrigramIndex:
+    """
+    An inverted index from character trigrams to normalized property names, used to find
+    near-miss spellings without comparing against every candidate.
+    """
+
+    def __init__(self, names: Iterable[str]):
+        """
+        Args:
+            names (Iterable[str]): Normalized candidate names.
+        """
+        self.names = list(dict.fromkeys(names))
+        self.sizes = []
+        self.postings = defaultdict(list)
+        for i, name in enumerate(self.names):
+            grams = _trigrams(name)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings[gram].append(i)
+
+    def query(self, name: str) -> Optional[Tuple[str, float]]:
+        """
+        Find the best near-miss of a normalized name.
+
+        Args:
+            name (str): Normalized query name.
+
+        Returns:
+            Optional[Tuple[str, float]]: (candidate, Dice similarity) or None if no candidate
+            passes the trigram threshold and the word-level typo check.
+        """
+        grams = _trigrams(name)
+        overlap = defaultdict(int)
+        for gram in grams:
+            for i in self.postings.get(gram, ()):
+                overlap[i] += 1
+
+        scored = sorted(
+            (
+                (2 * shared / (len(grams) + self.sizes[i]), i)
+                for i, shared in overlap.items()
+            ),
+            reverse=True,
+        )
+        for score, i in scored[:TRIGRAM_CANDIDATES]:
+            if score < TRIGRAM_CANDIDATE_THRESHOLD:
+                break
+            if _is_near_miss(name, self.names[i]):
+                return self.names[i], score
+        return None
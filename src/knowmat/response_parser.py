@@ -2,6 +2,8 @@ import os
 
 import pandas as pd
 
+from src.knowmat.extraction_table import ExtractionTable
+
 
 class ResponseParser:
     """
@@ -12,16 +14,61 @@ class ResponseParser:
     def save_to_csv(data: list, output_path: str, file_name: str) -> None:
         """
         Save the extracted data to a CSV file. Append extracted data to a CSV file if it
-        exists; otherwise, create a new file.
+        exists (see `append_to_csv`); otherwise, create a new file.
 
         Args:
-            data (list): Extracted data.
+            data (list): Extracted data, or an `ExtractionTable`.
             output_path (str): Path to save the CSV file.
             file_name (str): Name of the CSV file.
         """
         file_path = os.path.join(output_path, file_name)
-        file_exists = os.path.exists(file_path)
 
+        if isinstance(data, ExtractionTable):
+            new_data_df = data.to_pandas()
+        else:
+            new_data_df = ResponseParser.to_dataframe(data)
+
+        ResponseParser.append_to_csv(new_data_df, file_path)
+        print(f"Data appended to {file_path}")
+
+    @staticmethod
+    def append_to_csv(df: pd.DataFrame, file_path: str) -> None:
+        """
+        Append rows to a CSV file, aligned to its header, without reading or rewriting the
+        existing rows. Columns of the file missing from `df` (e.g. the post-processing
+        columns) are left empty. Only if `df` brings new columns is the file rewritten once
+        with the wider header.
+
+        Args:
+            df (pd.DataFrame): The rows to append.
+            file_path (str): Path of the CSV file; created if it does not exist.
+        """
+        if not os.path.exists(file_path):
+            df.to_csv(file_path, index=False)
+            return
+
+        existing_columns = pd.read_csv(file_path, nrows=0).columns
+        if set(df.columns) - set(existing_columns):
+            existing_df = pd.read_csv(file_path)
+            pd.concat([existing_df, df], ignore_index=True).to_csv(
+                file_path, index=False
+            )
+        else:
+            df.reindex(columns=existing_columns).to_csv(
+                file_path, mode="a", header=False, index=False
+            )
+
+    @staticmethod
+    def to_dataframe(data: list) -> pd.DataFrame:
+        """
+        Flatten extracted data into one row per property.
+
+        Args:
+            data (list): Extracted data.
+
+        Returns:
+            pd.DataFrame: The rows with the CSV columns.
+        """
         rows = []
         for entry in data:
             for comp in entry["data"].compositions:
@@ -40,7 +87,7 @@ class ResponseParser:
                     )
 
         # Convert to DataFrame
-        new_data_df = pd.DataFrame(
+        return pd.DataFrame(
             rows,
             columns=[
                 "file name",
@@ -53,14 +100,3 @@ class ResponseParser:
                 "measurement condition",
             ],
         )
-
-        # If the file already exists, append new data
-        if file_exists:
-            existing_df = pd.read_csv(file_path)
-            updated_df = pd.concat([existing_df, new_data_df], ignore_index=True)
-            updated_df.to_csv(file_path, index=False)
-        else:
-            # If the file doesn't exist, create it
-            new_data_df.to_csv(file_path, index=False)
-
-        print(f"Data appended to {file_path}")
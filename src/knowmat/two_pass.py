@@ -0,0 +1,253 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+from pydantic import BaseModel, Field
+
+from src.knowmat.llm_scheduler import BATCH
+from src.knowmat.pipeline import CompositionList, CompositionProperties, Pipeline
+from src.knowmat.prompt_generator import (
+    COMPOSITION_SYSTEM_PROMPT,
+    DISCOVERY_SYSTEM_PROMPT,
+    USER_PROMPT_PREFIX,
+    PromptGenerator,
+)
+
+# Target length of a text segment in characters (about 300 tokens). Segments end at a line
+# that closes a sentence, or at twice this length.
+SEGMENT_CHARS = 1200
+
+# Most excerpt tokens sent with one composition; later segments are dropped beyond it.
+MAX_EXCERPT_TOKENS = 3000
+
+# Per-composition calls started concurrently for one paper. The LLM scheduler still bounds
+# how many reach the server at once.
+MAX_COMPOSITION_WORKERS = 4
+
+# Statistics of the most recent paper, kept per thread for parallel extraction.
+_local = threading.local()
+
+
+class CompositionMention(BaseModel):
+    """A composition found by the discovery pass and the segments that discuss it."""
+
+    composition: str = Field(description="The chemical composition of the material.")
+    segments: List[int] = Field(
+        description="Numbers of the text segments describing the composition."
+    )
+
+
+class DiscoveredCompositions(BaseModel):
+    """Output of the discovery pass."""
+
+    compositions: List[CompositionMention] = Field(
+        description="The compositions the text reports data for."
+    )
+
+
+def segment_text(text: str, segment_chars: int = SEGMENT_CHARS) -> list:
+    """
+    Split a paper into segments of whole lines, roughly `segment_chars` long.
+
+    Args:
+        text (str): The paper text.
+        segment_chars (int): Target segment length in characters.
+
+    Returns:
+        list: The segments, in document order.
+    """
+    segments, lines, length = [], [], 0
+    for line in text.splitlines():
+        lines.append(line)
+        length += len(line) + 1
+        ends_sentence = line.rstrip().endswith((".", ":", ";"))
+        if length >= 2 * segment_chars or (length >= segment_chars and ends_sentence):
+            segments.append("\n".join(lines).strip())
+            lines, length = [], 0
+    if lines:
+        segments.append("\n".join(lines).strip())
+    return [segment for segment in segments if segment]
+
+
+class TwoPassPipeline:
+    """
+    A class to extract a paper in two passes instead of one monolithic call.
+
+    The discovery pass sends the numbered segments of the paper and only asks for the
+    compositions and the numbers of the segments that discuss them, a short output. The
+    extraction pass then asks for the `CompositionProperties` of each composition from just
+    its segments, with the composition calls running concurrently. Each call produces a
+    small output, which the smaller models truncate or garble far less often than a whole
+    `CompositionList`, and the latency of a paper is bounded by its slowest composition
+    rather than the sum of all of them.
+    """
+
+    @staticmethod
+    def last_stats() -> dict:
+        """
+        Statistics of the most recent `run_two_pass` call in the current thread.
+
+        Returns:
+            dict: Number of segments and compositions, generated tokens per pass, the
+            longest single output, failed compositions, seconds per pass, and the
+            `Pipeline.last_stats` of every call ('calls').
+        """
+        return getattr(_local, "stats", {})
+
+    @staticmethod
+    def discover(
+        segments: list, model: str, priority: int = BATCH
+    ) -> DiscoveredCompositions:
+        """
+        Run the discovery pass.
+
+        Args:
+            segments (list): The segments of the paper, see `segment_text`.
+            model (str): The LLM model to use.
+            priority (int): Scheduling lane of the call.
+
+        Returns:
+            DiscoveredCompositions: The compositions with their segment numbers.
+        """
+        numbered = "\n\n".join(
+            f"[{number}] {segment}" for number, segment in enumerate(segments, 1)
+        )
+        return Pipeline.run_structured(
+            DISCOVERY_SYSTEM_PROMPT,
+            PromptGenerator.generate_user_prompt(numbered),
+            DiscoveredCompositions,
+            model,
+            priority=priority,
+        )
+
+    @staticmethod
+    def excerpt(segments: list, numbers: list, max_tokens: int = MAX_EXCERPT_TOKENS):
+        """
+        Join the referenced segments in document order, up to `max_tokens`.
+
+        Args:
+            segments (list): The segments of the paper.
+            numbers (list): 1-based segment numbers from the discovery pass.
+            max_tokens (int): Estimated token budget of the excerpt.
+
+        Returns:
+            str: The excerpt (the whole paper if no valid number was given).
+        """
+        valid = sorted({n for n in numbers if 1 <= n <= len(segments)})
+        if not valid:
+            valid = range(1, len(segments) + 1)
+        parts, tokens = [], 0
+        for number in valid:
+            segment_tokens = PromptGenerator.estimate_tokens(segments[number - 1])
+            if parts and tokens + segment_tokens > max_tokens:
+                break
+            parts.append(segments[number - 1])
+            tokens += segment_tokens
+        return "\n\n".join(parts)
+
+    @staticmethod
+    def extract_composition(
+        composition: str, excerpt: str, model: str, priority: int = BATCH
+    ) -> CompositionProperties:
+        """
+        Run the extraction pass for one composition.
+
+        The composition name follows the excerpt, so the system prompt and the opening of the
+        user prompt stay a byte-stable prefix shared by all calls.
+
+        Args:
+            composition (str): The composition to extract.
+            excerpt (str): Its segments, see `excerpt`.
+            model (str): The LLM model to use.
+            priority (int): Scheduling lane of the call.
+
+        Returns:
+            CompositionProperties: The extracted data of the composition.
+        """
+        user_prompt = (
+            f"{USER_PROMPT_PREFIX}{excerpt}\n\n"
+            f"Extract the data of this composition: {composition}\n"
+        )
+        return Pipeline.run_structured(
+            COMPOSITION_SYSTEM_PROMPT,
+            user_prompt,
+            CompositionProperties,
+            model,
+            priority=priority,
+        )
+
+    @staticmethod
+    def run_two_pass(
+        text: str,
+        model: str,
+        max_workers: int = MAX_COMPOSITION_WORKERS,
+        priority: int = BATCH,
+    ) -> CompositionList:
+        """
+        Extract a paper with a discovery pass and concurrent per-composition calls.
+
+        A composition whose call fails is left out and reported in the statistics; a failure
+        of the discovery pass is raised.
+
+        Args:
+            text (str): The text to analyze.
+            model (str): The LLM model to use.
+            max_workers (int): Composition calls started concurrently.
+            priority (int): Scheduling lane of the calls.
+
+        Returns:
+            CompositionList: Extracted data validated with Pydantic, in discovery order.
+        """
+        start = time.perf_counter()
+        segments = segment_text(text)
+        index = TwoPassPipeline.discover(segments, model, priority=priority)
+        discovery = Pipeline.last_stats()
+        discovery_seconds = time.perf_counter() - start
+
+        # Merge repeated mentions of a composition
+        mentions = {}
+        for mention in index.compositions:
+            name = mention.composition.strip()
+            if name:
+                mentions.setdefault(name, []).extend(mention.segments)
+
+        def extract_one(item):
+            composition, numbers = item
+            excerpt = TwoPassPipeline.excerpt(segments, numbers)
+            try:
+                data = TwoPassPipeline.extract_composition(
+                    composition, excerpt, model, priority=priority
+                )
+            except Exception as e:
+                print(f"Two-pass: extraction of {composition} failed ({e})")
+                return composition, None, {}
+            # The name from the discovery pass is the one the segments were chosen for
+            data.composition = composition
+            return composition, data, Pipeline.last_stats()
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            results = list(executor.map(extract_one, mentions.items()))
+
+        outputs = [stats.get("eval_tokens", 0) for _, _, stats in results]
+        stats = {
+            "segments": len(segments),
+            "compositions": len(mentions),
+            "failed": [composition for composition, data, _ in results if data is None],
+            "discovery_tokens": discovery.get("eval_tokens", 0),
+            "extraction_tokens": sum(outputs),
+            "longest_output_tokens": max([discovery.get("eval_tokens", 0), *outputs]),
+            "discovery_seconds": discovery_seconds,
+            "seconds": time.perf_counter() - start,
+            "calls": [discovery, *(stats for _, _, stats in results if stats)],
+        }
+        _local.stats = stats
+        print(
+            f"Two-pass: {stats['compositions']} compositions from {stats['segments']} "
+            f"segments, {stats['discovery_tokens']} + {stats['extraction_tokens']} "
+            f"tokens generated (longest output {stats['longest_output_tokens']}), "
+            f"{stats['seconds']:.1f}s"
+        )
+        return CompositionList(
+            compositions=[data for _, data, _ in results if data is not None]
+        )
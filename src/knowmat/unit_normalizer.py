@@ -0,0 +1,367 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# A unit parsed into SI: value_si = value * scale + offset, with exponents of the SI base
+# dimensions (m, kg, s, K, A, mol, cd).
+ParsedUnit = namedtuple("ParsedUnit", ["scale", "offset", "dims"])
+
+BASE_DIMENSIONS = ("m", "kg", "s", "K", "A", "mol", "cd")
+
+
+def _dims(m=0, kg=0, s=0, K=0, A=0, mol=0, cd=0) -> tuple:
+    return (m, kg, s, K, A, mol, cd)
+
+
+DIMENSIONLESS = _dims()
+
+# Unit symbols with their SI scale and dimensions. Prefixes are applied on top of these.
+UNITS = {
+    "m": (1.0, _dims(m=1)),
+    "g": (1e-3, _dims(kg=1)),
+    "s": (1.0, _dims(s=1)),
+    "K": (1.0, _dims(K=1)),
+    "A": (1.0, _dims(A=1)),
+    "mol": (1.0, _dims(mol=1)),
+    "cd": (1.0, _dims(cd=1)),
+    "Hz": (1.0, _dims(s=-1)),
+    "N": (1.0, _dims(m=1, kg=1, s=-2)),
+    "Pa": (1.0, _dims(m=-1, kg=1, s=-2)),
+    "J": (1.0, _dims(m=2, kg=1, s=-2)),
+    "W": (1.0, _dims(m=2, kg=1, s=-3)),
+    "C": (1.0, _dims(s=1, A=1)),
+    "V": (1.0, _dims(m=2, kg=1, s=-3, A=-1)),
+    "ohm": (1.0, _dims(m=2, kg=1, s=-3, A=-2)),
+    "S": (1.0, _dims(m=-2, kg=-1, s=3, A=2)),
+    "F": (1.0, _dims(m=-2, kg=-1, s=4, A=2)),
+    "T": (1.0, _dims(kg=1, s=-2, A=-1)),
+    "Oe": (1e3 / (4 * np.pi), _dims(m=-1, A=1)),
+    "eV": (1.602176634e-19, _dims(m=2, kg=1, s=-2)),
+    "cal": (4.184, _dims(m=2, kg=1, s=-2)),
+    "Å": (1e-10, _dims(m=1)),
+    "L": (1e-3, _dims(m=3)),
+    "bar": (1e5, _dims(m=-1, kg=1, s=-2)),
+    "atm": (101325.0, _dims(m=-1, kg=1, s=-2)),
+    "min": (60.0, _dims(s=1)),
+    "h": (3600.0, _dims(s=1)),
+    "%": (1e-2, DIMENSIONLESS),
+    "ppm": (1e-6, DIMENSIONLESS),
+}
+
+# Whole unit symbols that would otherwise be misread as a prefix-less compound ('hPa' is
+# hectopascal, not hour*pascal). They take precedence over prefixes and splitting, and are
+# not prefixed themselves.
+UNIT_ALIASES = {
+    "hPa": (1e2, _dims(m=-1, kg=1, s=-2)),
+    "Torr": (101325.0 / 760, _dims(m=-1, kg=1, s=-2)),
+    "mmHg": (133.322387415, _dims(m=-1, kg=1, s=-2)),
+    "psi": (6894.757293168, _dims(m=-1, kg=1, s=-2)),
+    "ksi": (6894757.293168, _dims(m=-1, kg=1, s=-2)),
+    "hr": (3600.0, _dims(s=1)),
+}
+
+# Prefixes that may only be combined with the unit symbols above ("u" is the ASCII micro).
+PREFIXES = {
+    "G": 1e9,
+    "M": 1e6,
+    "k": 1e3,
+    "c": 1e-2,
+    "m": 1e-3,
+    "u": 1e-6,
+    "n": 1e-9,
+    "p": 1e-12,
+}
+
+# Whole unit strings (after cleanup) that are not built from symbols.
+SPECIAL_UNITS = {
+    "": ParsedUnit(1.0, 0.0, DIMENSIONLESS),
+    "-": ParsedUnit(1.0, 0.0, DIMENSIONLESS),
+    "dimensionless": ParsedUnit(1.0, 0.0, DIMENSIONLESS),
+    "unitless": ParsedUnit(1.0, 0.0, DIMENSIONLESS),
+    "a.u.": ParsedUnit(1.0, 0.0, DIMENSIONLESS),
+    "wt%": ParsedUnit(1e-2, 0.0, DIMENSIONLESS),
+    "at%": ParsedUnit(1e-2, 0.0, DIMENSIONLESS),
+    "°C": ParsedUnit(1.0, 273.15, _dims(K=1)),
+    "degC": ParsedUnit(1.0, 273.15, _dims(K=1)),
+}
+
+# Canonical display units per standard property. Properties not listed use SI base units.
+CANONICAL_UNITS = {
+    "seebeck coefficient": "uV/K",
+    "power factor": "uW/(cm*K^2)",
+    "values of thermal conductivity": "W/(m*K)",
+    "phonon contribution to thermal conductivity": "W/(m*K)",
+    "electronic contribution to thermal conductivity": "W/(m*K)",
+    "electrical conductivity": "S/cm",
+    "electron conductivity": "S/cm",
+    "ionic conductivity": "S/cm",
+    "electrical resistivity": "Ω*cm",
+    "electronic energy gap": "eV",
+    "energy gap for direct transition": "eV",
+    "energy gap for indirect transition": "eV",
+    "values of charge carrier concentration": "cm^-3",
+    "electron mobility": "cm^2/(V*s)",
+    "hole mobility": "cm^2/(V*s)",
+    "values of charge carrier mobility": "cm^2/(V*s)",
+    "superconducting transition temperature": "K",
+    "temperature for congruent melting": "K",
+    "decomposition temperature": "K",
+    "shear modulus": "GPa",
+    "isothermal bulk modulus": "GPa",
+    "adiabatic bulk modulus": "GPa",
+    "microhardness": "GPa",
+}
+
+_TOKEN = re.compile(
+    r"\s*(?:(?P<open>\()|(?P<close>\))|(?P<div>/)|(?P<mul>[*.]|-(?=[A-Za-z]))"
+    r"|(?P<symbol>[A-Za-zÅ%]+)(?:\^?(?P<exp>[+-]?\d+(?:\.\d+)?))?)"
+)
+
+# A leading power-of-ten multiplier, e.g. '10^19 cm^-3' or '×10^-3 S/cm'.
+_MULTIPLIER = re.compile(r"^(?:[x*]\s*)?10\^([+-]?\d+)\s*\*?\s*")
+
+_SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻⁺", "0123456789-+")
+
+
+def _clean(unit: str) -> str:
+    """Map Unicode variants of micro, minus, multiplication and superscripts to plain forms."""
+    unit = unit.strip().rstrip(".") if unit.strip() != "a.u." else "a.u."
+    unit = re.sub(r"[⁰¹²³⁴⁵⁶⁷⁸⁹⁻⁺]+", lambda m: "^" + m.group(0), unit)
+    unit = unit.translate(_SUPERSCRIPTS)
+    unit = unit.replace("wt.%", "wt%").replace("at.%", "at%")
+    for old, new in (("µ", "u"), ("μ", "u"), ("−", "-"), ("·", "*"), ("⋅", "*")):
+        unit = unit.replace(old, new)
+    unit = unit.replace("×", "*").replace("Ohm", "ohm").replace("Ω", "ohm")
+    return re.sub(r"\s+", " ", unit)
+
+
+def _resolve_symbol(symbol: str) -> Optional[tuple]:
+    """Resolve a unit symbol, possibly with a prefix, to (scale, dims)."""
+    if symbol in UNIT_ALIASES:
+        return UNIT_ALIASES[symbol]
+    if symbol in UNITS:
+        return UNITS[symbol]
+    if symbol[0] in PREFIXES and symbol[1:] in UNITS:
+        scale, dims = UNITS[symbol[1:]]
+        return PREFIXES[symbol[0]] * scale, dims
+    return None
+
+
+def _resolve_compound(symbol: str, in_denominator: bool) -> Optional[list]:
+    """
+    Resolve a symbol to a list of (scale, dims) factors. Symbols written together without a
+    separator (e.g. 'Vs' or 'mK' in 'W/mK') are split into two units when needed.
+    """
+    # 'W/mK' conventionally means W/(m*K), not W per millikelvin.
+    if not (in_denominator and symbol == "mK"):
+        unit = _resolve_symbol(symbol)
+        if unit is not None:
+            return [unit]
+    for i in range(1, len(symbol)):
+        first, second = _resolve_symbol(symbol[:i]), _resolve_symbol(symbol[i:])
+        if first is not None and second is not None:
+            return [first, second]
+    return None
+
+
+@lru_cache(maxsize=None)
+def parse_unit(unit: str) -> Optional[ParsedUnit]:
+    """
+    Parse a free-text unit string such as 'μV/K', 'W m^-1 K^-1' or 'cm²/(V·s)'.
+
+    Everything after a '/' up to the end of the enclosing group is in the denominator,
+    following the usual notation 'J/mol K' = J/(mol*K). A leading power of ten scales the
+    unit ('10^19 cm^-3' is 1e19 cm^-3). Results are cached per string.
+
+    Args:
+        unit (str): The unit string.
+
+    Returns:
+        Optional[ParsedUnit]: The parsed unit, or None if the string cannot be parsed.
+    """
+    if not isinstance(unit, str):
+        return None
+    unit = _clean(unit)
+    if unit in SPECIAL_UNITS:
+        return SPECIAL_UNITS[unit]
+    if unit.lower() in SPECIAL_UNITS:
+        return SPECIAL_UNITS[unit.lower()]
+    multiplier = _MULTIPLIER.match(unit)
+    if multiplier:
+        parsed = parse_unit(unit[multiplier.end() :])
+        if parsed is None:
+            return None
+        return ParsedUnit(
+            parsed.scale * 10.0 ** int(multiplier.group(1)), parsed.offset, parsed.dims
+        )
+
+    # Stack of groups: [scale, dims, sign of the current factors].
+    stack = [[1.0, np.zeros(len(BASE_DIMENSIONS)), 1]]
+    pos = 0
+    while pos < len(unit):
+        match = _TOKEN.match(unit, pos)
+        if match is None or match.end() == pos:
+            return None
+        pos = match.end()
+        group = stack[-1]
+        if match.group("open"):
+            stack.append([1.0, np.zeros(len(BASE_DIMENSIONS)), 1])
+        elif match.group("close"):
+            if len(stack) == 1:
+                return None
+            inner = stack.pop()
+            outer = stack[-1]
+            # A closed group may carry an exponent, e.g. '(m/s)^2'.
+            exponent = re.match(r"\^?([+-]?\d+(?:\.\d+)?)", unit[pos:])
+            power = 1.0
+            if exponent:
+                pos += exponent.end()
+                power = float(exponent.group(1))
+            outer[0] *= inner[0] ** (power * outer[2])
+            outer[1] += inner[1] * power * outer[2]
+        elif match.group("div"):
+            group[2] = -1
+        elif match.group("mul"):
+            continue
+        else:
+            factors = _resolve_compound(match.group("symbol"), group[2] < 0)
+            if factors is None:
+                return None
+            power = float(match.group("exp")) if match.group("exp") else 1.0
+            # An exponent applies to the last unit of a compound symbol ('mK^2' = m*K^2).
+            for i, (scale, dims) in enumerate(factors):
+                p = power if i == len(factors) - 1 else 1.0
+                group[0] *= scale ** (p * group[2])
+                group[1] += np.asarray(dims) * p * group[2]
+    if len(stack) != 1:
+        return None
+
+    scale, dims, _ = stack[0]
+    return ParsedUnit(scale, 0.0, tuple(float(d) for d in dims))
+
+
+def format_dims(dims: tuple) -> str:
+    """
+    Write dimensions in canonical SI base form, e.g. 'm^2*kg*s^-3*A^-1'.
+
+    Args:
+        dims (tuple): Exponents of the SI base dimensions.
+
+    Returns:
+        str: The canonical unit string ('1' for dimensionless quantities).
+    """
+    parts = []
+    for name, exponent in zip(BASE_DIMENSIONS, dims):
+        if exponent == 0:
+            continue
+        exponent = int(exponent) if float(exponent).is_integer() else exponent
+        parts.append(name if exponent == 1 else f"{name}^{exponent}")
+    return "*".join(parts) or "1"
+
+
+class UnitNormalizer:
+    """
+    A class to convert extracted property values to SI or per-property canonical units.
+    """
+
+    @staticmethod
+    def conversion(unit: str, standard_property_name: Optional[str] = None) -> tuple:
+        """
+        Find the linear conversion of a unit to its normalized unit.
+
+        Args:
+            unit (str): The extracted unit string.
+            standard_property_name (str, optional): The mapped standard property, used to pick
+                a canonical unit from `CANONICAL_UNITS`.
+
+        Returns:
+            tuple: (factor, offset, normalized_unit) with normalized = value * factor + offset,
+            or (nan, nan, None) if the unit cannot be parsed.
+        """
+        parsed = parse_unit(unit)
+        if parsed is None:
+            return np.nan, np.nan, None
+
+        target_name = (
+            CANONICAL_UNITS.get(standard_property_name.lower())
+            if isinstance(standard_property_name, str)
+            else None
+        )
+        target = parse_unit(target_name) if target_name else None
+        if target is None or target.dims != parsed.dims:
+            return parsed.scale, parsed.offset, format_dims(parsed.dims)
+        return (
+            parsed.scale / target.scale,
+            (parsed.offset - target.offset) / target.scale,
+            target_name,
+        )
+
+    @staticmethod
+    def normalize_dataframe(
+        df: pd.DataFrame,
+        value_column: str = "value",
+        unit_column: str = "unit",
+        property_column: str = "standard_property_name",
+    ) -> pd.DataFrame:
+        """
+        Add 'normalized_value' and 'normalized_unit' columns to a DataFrame of extracted properties.
+
+        Each distinct (standard property, unit) pair is parsed once; the values of the whole column
+        are then converted with one vectorized NumPy expression.
+
+        Args:
+            df (pd.DataFrame): Extracted data with value and unit columns.
+            value_column (str): Name of the value column.
+            unit_column (str): Name of the unit column.
+            property_column (str): Name of the standard property column (optional in `df`).
+
+        Returns:
+            pd.DataFrame: The same DataFrame with the two new columns.
+        """
+        units = df[unit_column].fillna("").astype(str)
+        properties = (
+            df[property_column].fillna("").astype(str)
+            if property_column in df.columns
+            else pd.Series("", index=df.index)
+        )
+        codes, uniques = pd.factorize(pd.MultiIndex.from_arrays([properties, units]))
+
+        conversions = [
+            UnitNormalizer.conversion(unit, prop or None) for prop, unit in uniques
+        ]
+        factors = np.array([c[0] for c in conversions], dtype=float)
+        offsets = np.array([c[1] for c in conversions], dtype=float)
+        labels = np.array([c[2] for c in conversions], dtype=object)
+
+        values = pd.to_numeric(df[value_column], errors="coerce").to_numpy(dtype=float)
+        df["normalized_value"] = values * factors[codes] + offsets[codes]
+        df["normalized_unit"] = labels[codes]
+        return df
+
+    @staticmethod
+    def normalize_extracted_json(extracted_result: list) -> list:
+        """
+        Add 'normalized_value' and 'normalized_unit' to every property of an extracted result.
+
+        Args:
+            extracted_result (list): The extracted result (from JSONExtractor.extract).
+
+        Returns:
+            list: The updated extracted result.
+        """
+        for entry in extracted_result:
+            for composition in entry["data"].compositions:
+                for prop in composition.properties_of_composition:
+                    factor, offset, unit = UnitNormalizer.conversion(
+                        prop.unit, getattr(prop, "standard_property_name", None)
+                    )
+                    prop_dict = prop.__dict__
+                    prop_dict["normalized_value"] = (
+                        None if unit is None else prop.value * factor + offset
+                    )
+                    prop_dict["normalized_unit"] = unit
+        return extracted_result
@@ -0,0 +1,489 @@
+import hashlib
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import List, Optional
+
+from src.knowmat.pdf_parser import ParseLimits, PDFParser
+
+# Seconds between two scans of the watched folders (polling mode, or safety rescans).
+POLL_SECONDS = 5.0
+
+# A file is processed once its size and modification time were unchanged for this long.
+SETTLE_SECONDS = 10.0
+
+# Papers waiting for a worker; the scanner blocks when the backlog is full.
+MAX_BACKLOG = 64
+
+# A failed file is retried after this many seconds, doubled after every further failure.
+RETRY_SECONDS = 60.0
+
+# Failed attempts of an unchanged file before it is given up on (until it changes).
+MAX_ATTEMPTS = 3
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file, read in 1 MB blocks."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(2**20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class IngestionLedger:
+    """
+    A persistent SQLite record of the files the ingestion service has seen, keyed by absolute
+    path, so restarts only process new or changed PDFs. Failed files are retried with
+    exponential backoff, up to MAX_ATTEMPTS times per version of the file.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Opens (and if needed creates) the ledger database.
+
+        Args:
+            db_path (str): Path to the SQLite ledger file.
+        """
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            db_path, timeout=60, isolation_level=None, check_same_thread=False
+        )
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                sha256 TEXT NOT NULL,
+                status TEXT NOT NULL,
+                error TEXT,
+                processed REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                retry_at REAL
+            )""")
+        # Ledgers written before retries were tracked
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(files)")}
+        if "attempts" not in columns:
+            self.conn.execute(
+                "ALTER TABLE files ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0"
+            )
+            self.conn.execute("ALTER TABLE files ADD COLUMN retry_at REAL")
+
+    def get(self, path: str) -> Optional[tuple]:
+        """
+        Look up a file.
+
+        Returns:
+            Optional[tuple]: (size, mtime_ns, sha256, status, attempts, retry_at), or None
+            for unseen files.
+        """
+        with self.lock:
+            return self.conn.execute(
+                """SELECT size, mtime_ns, sha256, status, attempts, retry_at
+                FROM files WHERE path = ?""",
+                (os.path.abspath(path),),
+            ).fetchone()
+
+    def record(
+        self,
+        path: str,
+        size: int,
+        mtime_ns: int,
+        sha256: str,
+        status: str,
+        error: Optional[str] = None,
+    ) -> None:
+        """Store the outcome ('done' or 'skipped') of processing a file."""
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, ?, ?, ?, 0, NULL)",
+                (
+                    os.path.abspath(path),
+                    size,
+                    mtime_ns,
+                    sha256,
+                    status,
+                    error,
+                    time.time(),
+                ),
+            )
+
+    def record_failure(
+        self, path: str, size: int, mtime_ns: int, sha256: str, error: str
+    ) -> Optional[float]:
+        """
+        Store a failed attempt and schedule the retry. Attempts are counted per content: a
+        changed file starts over.
+
+        Returns:
+            Optional[float]: Time of the next retry, or None if the file is given up on.
+        """
+        path = os.path.abspath(path)
+        now = time.time()
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT sha256, attempts FROM files WHERE path = ?", (path,)
+            ).fetchone()
+            attempts = (row[1] if row is not None and row[0] == sha256 else 0) + 1
+            retry_at = (
+                now + RETRY_SECONDS * 2 ** (attempts - 1)
+                if attempts < MAX_ATTEMPTS
+                else None
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?, 'failed', ?, ?, ?, ?)",
+                (path, size, mtime_ns, sha256, error, now, attempts, retry_at),
+            )
+        return retry_at
+
+    @staticmethod
+    def due_for_retry(known: tuple) -> bool:
+        """Whether a ledger entry (see `get`) is a failed file whose retry time has come."""
+        return known[3] == "failed" and known[5] is not None and time.time() >= known[5]
+
+    def summary(self) -> dict:
+        """
+        Count the recorded files per status.
+
+        Returns:
+            dict: Mapping of status to count.
+        """
+        with self.lock:
+            return dict(
+                self.conn.execute(
+                    "SELECT status, COUNT(*) FROM files GROUP BY status"
+                ).fetchall()
+            )
+
+
+class FolderWatcher:
+    """
+    Watches folders for PDFs that are new or changed and settled (no longer being written).
+
+    With the optional `watchdog` package, file system events (inotify, FSEvents, ...) mark
+    candidates as soon as they appear; otherwise the folders are polled. In both modes a file
+    is only reported once its size and modification time stayed the same for
+    `settle_seconds`, so partially copied files are never parsed.
+    """
+
+    def __init__(
+        self,
+        folders: List[str],
+        ledger: IngestionLedger,
+        poll_seconds: float = POLL_SECONDS,
+        settle_seconds: float = SETTLE_SECONDS,
+    ):
+        """
+        Args:
+            folders (List[str]): Folders watched recursively.
+            ledger (IngestionLedger): Record of already processed files.
+            poll_seconds (float): Seconds between scans.
+            settle_seconds (float): Seconds a file must stay unchanged before it is reported.
+        """
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.ledger = ledger
+        self.poll_seconds = poll_seconds
+        self.settle_seconds = settle_seconds
+        # path -> (size, mtime_ns, time the file was first seen with this size and mtime)
+        self.candidates = {}
+        self.in_progress = set()
+        self.lock = threading.Lock()
+        self.observer = None
+
+    def start_events(self) -> bool:
+        """
+        Subscribe to file system events if `watchdog` is installed.
+
+        Returns:
+            bool: True if events are used, False if the watcher only polls.
+        """
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            return False
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                for path in (event.src_path, getattr(event, "dest_path", "")):
+                    if path and path.lower().endswith(".pdf"):
+                        watcher.touch(path)
+
+        self.observer = Observer()
+        for folder in self.folders:
+            self.observer.schedule(Handler(), folder, recursive=True)
+        self.observer.start()
+        return True
+
+    def stop_events(self) -> None:
+        if self.observer is not None:
+            self.observer.stop()
+            self.observer.join()
+
+    def touch(self, path: str) -> None:
+        """Mark a path as a candidate (called for file system events and by scans)."""
+        with self.lock:
+            self.candidates.setdefault(os.path.abspath(path), None)
+
+    def scan(self) -> None:
+        """Add every PDF of the watched folders as a candidate."""
+        for folder in self.folders:
+            for path in PDFParser.list_pdfs(folder):
+                self.touch(path)
+
+    def settled(self) -> List[tuple]:
+        """
+        Check the candidates and return those that are settled and new or changed.
+
+        Returns:
+            List[tuple]: (path, size, mtime_ns) of the files ready to be processed.
+        """
+        now = time.monotonic()
+        ready = []
+        with self.lock:
+            paths = [p for p in self.candidates if p not in self.in_progress]
+        for path in paths:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                with self.lock:
+                    self.candidates.pop(path, None)
+                continue
+
+            signature = (stat.st_size, stat.st_mtime_ns)
+            known = self.ledger.get(path)
+            if known is not None and tuple(known[:2]) == signature:
+                # Already processed in this version; failed files return when due
+                with self.lock:
+                    self.candidates.pop(path, None)
+                if IngestionLedger.due_for_retry(known):
+                    ready.append((path, *signature))
+                continue
+
+            with self.lock:
+                previous = self.candidates.get(path)
+                if previous is None or previous[:2] != signature:
+                    # New or still being written: restart the settle timer
+                    self.candidates[path] = (*signature, now)
+                    continue
+                if now - previous[2] < self.settle_seconds:
+                    continue
+                del self.candidates[path]
+            ready.append((path, *signature))
+        return ready
+
+
+class IngestionService:
+    """
+    A long-running service that pushes new or changed PDFs through parse -> extract ->
+    post-process and appends the rows to one CSV file, with a bounded pool of workers. Rows
+    carry the absolute 'path' of their PDF, so equally named papers in different folders
+    are kept apart.
+    """
+
+    def __init__(
+        self,
+        folders: List[str],
+        output_csv: str,
+        model: str,
+        properties_file: str,
+        ledger_path: Optional[str] = None,
+        workers: int = 2,
+        poll_seconds: float = POLL_SECONDS,
+        settle_seconds: float = SETTLE_SECONDS,
+        limits: ParseLimits = ParseLimits(),
+        cache_dir: Optional[str] = None,
+    ):
+        """
+        Args:
+            folders (List[str]): Folders watched recursively.
+            output_csv (str): CSV file the post-processed rows are appended to.
+            model (str): The LLM model to use.
+            properties_file (str): Path to the properties.json used for property mapping.
+            ledger_path (str, optional): Ledger database. Defaults to '<output_csv>.ledger.db'.
+            workers (int): Papers processed concurrently.
+            poll_seconds (float): Seconds between folder scans.
+            settle_seconds (float): Seconds a file must stay unchanged before it is processed.
+            limits (ParseLimits): Parse limits, see `PDFParser.parse_pdf_bounded`.
+            cache_dir (str, optional): Directory of the property index.
+        """
+        from src.knowmat.post_processing import PostProcessor
+
+        self.output_csv = os.path.abspath(output_csv)
+        os.makedirs(os.path.dirname(self.output_csv), exist_ok=True)
+        self.model = model
+        self.workers = workers
+        self.limits = limits
+        self.ledger = IngestionLedger(ledger_path or f"{self.output_csv}.ledger.db")
+        self.watcher = FolderWatcher(
+            folders,
+            self.ledger,
+            poll_seconds=poll_seconds,
+            settle_seconds=settle_seconds,
+        )
+        self.processor = PostProcessor(
+            properties_file, self.output_csv, cache_dir=cache_dir
+        )
+        self.backlog = queue.Queue(maxsize=MAX_BACKLOG)
+        self.stop_event = threading.Event()
+        # Serializes CSV writes and the (not thread-safe) property matcher
+        self.write_lock = threading.Lock()
+
+    def process(self, path: str, size: int, mtime_ns: int) -> None:
+        """
+        Parse, extract and post-process one PDF and record the outcome in the ledger.
+        Rows of an earlier version of the same file are replaced.
+
+        Args:
+            path (str): Path to the PDF file.
+            size (int): File size when it settled.
+            mtime_ns (int): Modification time when it settled.
+        """
+        from src.knowmat.extraction_table import ExtractionTable
+        from src.knowmat.pipeline import Pipeline
+        from src.knowmat.unit_normalizer import UnitNormalizer
+
+        file_name = os.path.basename(path)
+        sha256 = file_digest(path)
+        known = self.ledger.get(path)
+        if known is not None and known[2] == sha256 and known[3] != "failed":
+            # Touched but unchanged content
+            self.ledger.record(path, size, mtime_ns, sha256, known[3])
+            return
+
+        parsed = PDFParser.parse_pdf_bounded(path, self.limits)
+        if parsed["skipped"]:
+            print(f"Skipped {file_name}: {parsed['skipped']}")
+            self.ledger.record(
+                path, size, mtime_ns, sha256, "skipped", parsed["skipped"]
+            )
+            return
+
+        data = Pipeline.run_pipeline(
+            PDFParser.read_text(parsed, cleanup=True, max_chars=self.limits.max_chars),
+            self.model,
+        )
+        table = ExtractionTable()
+        table.add(file_name, data)
+        with self.write_lock:
+            self.processor.map_table(table)
+            rows = UnitNormalizer.normalize_dataframe(
+                table.to_pandas(categorical=False)
+            )
+            rows.insert(1, "path", path)
+            self.write_rows(rows, replace_path=path if known else None)
+        self.ledger.record(path, size, mtime_ns, sha256, "done")
+        print(f"Ingested {file_name} ({len(rows)} rows)")
+
+    def write_rows(self, rows, replace_path: Optional[str] = None) -> None:
+        """
+        Append rows to the output CSV, aligned to its header. With `replace_path`, the rows
+        of that PDF are removed first (the CSV is rewritten only in this case).
+
+        Args:
+            rows (pd.DataFrame): Post-processed rows.
+            replace_path (str, optional): Absolute path of the PDF whose rows are replaced.
+        """
+        import pandas as pd
+
+        from src.knowmat.response_parser import ResponseParser
+
+        if replace_path is None or not os.path.exists(self.output_csv):
+            ResponseParser.append_to_csv(rows, self.output_csv)
+            return
+
+        existing = pd.read_csv(self.output_csv)
+        if "path" in existing.columns:
+            existing = existing[existing["path"] != replace_path]
+        else:
+            # Written before rows carried their path
+            existing = existing[existing["file name"] != os.path.basename(replace_path)]
+        pd.concat([existing, rows], ignore_index=True).to_csv(
+            self.output_csv, index=False
+        )
+
+    def worker(self) -> None:
+        while True:
+            item = self.backlog.get()
+            if item is None:
+                break
+            path = item[0]
+            try:
+                self.process(*item)
+            except Exception as e:
+                try:
+                    stat = os.stat(path)
+                    retry_at = self.ledger.record_failure(
+                        path,
+                        stat.st_size,
+                        stat.st_mtime_ns,
+                        file_digest(path),
+                        str(e),
+                    )
+                except OSError:
+                    retry_at = None
+                retry = (
+                    f"retrying in {retry_at - time.time():.0f}s"
+                    if retry_at is not None
+                    else "giving up until it changes"
+                )
+                print(f"Error ingesting {os.path.basename(path)} ({retry}): {e}")
+            finally:
+                with self.watcher.lock:
+                    self.watcher.in_progress.discard(path)
+
+    def run(self, once: bool = False) -> None:
+        """
+        Watch the folders and process new or changed PDFs until interrupted.
+
+        Args:
+            once (bool): Process the files present now (after they settle) and return.
+        """
+        threads = [
+            threading.Thread(target=self.worker, daemon=True)
+            for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        events = self.watcher.start_events()
+        print(
+            f"Watching {', '.join(self.watcher.folders)} "
+            f"({'file system events' if events else 'polling'}, {self.workers} workers)"
+        )
+
+        try:
+            # With events, the periodic scans only catch changes missed by the observer.
+            scan_every = 12 if events else 1
+            tick = 0
+            while not self.stop_event.is_set():
+                if tick % scan_every == 0:
+                    self.watcher.scan()
+                tick += 1
+                for item in self.watcher.settled():
+                    with self.watcher.lock:
+                        self.watcher.in_progress.add(item[0])
+                    self.backlog.put(item)
+                if once:
+                    with self.watcher.lock:
+                        pending = self.watcher.candidates or self.watcher.in_progress
+                    if not pending and self.backlog.empty():
+                        break
+                self.stop_event.wait(
+                    min(self.watcher.poll_seconds, self.watcher.settle_seconds)
+                )
+        except KeyboardInterrupt:
+            print("Stopping after the papers in progress...")
+        finally:
+            self.watcher.stop_events()
+            # Drop the papers still waiting; they are picked up again on the next start
+            while not self.backlog.empty():
+                self.backlog.get_nowait()
+            for _ in threads:
+                self.backlog.put(None)
+            for thread in threads:
+                thread.join()
+            print(f"Ingestion ledger: {self.ledger.summary()}")
@@ -0,0 +1,380 @@
+import argparse
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Optional
+
+from src.knowmat.pdf_parser import PDFParser
+from src.knowmat.pipeline import CompositionList, Pipeline
+from src.knowmat.response_parser import ResponseParser
+
+# Seconds a claimed paper stays reserved for a worker without a lease renewal.
+LEASE_SECONDS = 600
+
+# A paper is marked as failed after this many unsuccessful claims.
+MAX_ATTEMPTS = 3
+
+
+def _connect(db_path: str) -> sqlite3.Connection:
+    """
+    Open a SQLite database in autocommit mode with the rollback journal. WAL mode needs
+    shared memory between the processes and is unsafe on network file systems (NFS, SMB),
+    where the queue of a multi-node run lives.
+    """
+    conn = sqlite3.connect(db_path, timeout=60, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=DELETE")
+    return conn
+
+
+class WorkQueue:
+    """
+    A durable SQLite work queue that shards PDFs across extraction workers.
+
+    Workers claim papers with a time-limited lease. Papers whose lease expires (e.g. because the
+    worker crashed) are handed out again, up to `max_attempts` times.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        lease_seconds: int = LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        """
+        Opens (and if needed creates) the queue database.
+
+        Args:
+            db_path (str): Path to the SQLite queue file, on storage shared by all workers.
+            lease_seconds (int): How long a claim stays valid without renewal.
+            max_attempts (int): Number of claims before a paper is marked as failed.
+        """
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.conn = _connect(db_path)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS tasks (
+                id INTEGER PRIMARY KEY,
+                path TEXT UNIQUE NOT NULL,
+                file_name TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                worker TEXT,
+                lease_expires REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                error TEXT
+            )""")
+
+    def enqueue_folder(self, folder_path: str) -> int:
+        """
+        Add every PDF in a folder (recursively) to the queue. Already queued paths are skipped.
+
+        Args:
+            folder_path (str): Path to the folder containing PDF files.
+
+        Returns:
+            int: Number of newly queued papers.
+        """
+        paths = [os.path.abspath(path) for path in PDFParser.list_pdfs(folder_path)]
+        before = self.conn.total_changes
+        self.conn.execute("BEGIN IMMEDIATE")
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO tasks (path, file_name) VALUES (?, ?)",
+            [(path, os.path.basename(path)) for path in paths],
+        )
+        self.conn.execute("COMMIT")
+        return self.conn.total_changes - before
+
+    def claim(self, worker_id: str) -> Optional[dict]:
+        """
+        Claim the next pending paper, or one whose lease has expired.
+
+        Args:
+            worker_id (str): Identifier of the claiming worker.
+
+        Returns:
+            Optional[dict]: The claimed task (id, path, file_name), or None if nothing is left.
+        """
+        now = time.time()
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Expired leases that used up all attempts are given up on.
+            self.conn.execute(
+                """UPDATE tasks SET status = 'failed', error = 'lease expired'
+                WHERE status = 'leased' AND lease_expires < ? AND attempts >= ?""",
+                (now, self.max_attempts),
+            )
+            row = self.conn.execute(
+                """SELECT id, path, file_name FROM tasks
+                WHERE status = 'pending' OR (status = 'leased' AND lease_expires < ?)
+                ORDER BY attempts, id LIMIT 1""",
+                (now,),
+            ).fetchone()
+            if row is not None:
+                self.conn.execute(
+                    """UPDATE tasks SET status = 'leased', worker = ?, lease_expires = ?,
+                    attempts = attempts + 1 WHERE id = ?""",
+                    (worker_id, now + self.lease_seconds, row[0]),
+                )
+            self.conn.execute("COMMIT")
+        except Exception:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        if row is None:
+            return None
+        return {"id": row[0], "path": row[1], "file_name": row[2]}
+
+    def renew(self, task_id: int, worker_id: str) -> bool:
+        """
+        Extend the lease of a claimed paper.
+
+        Returns:
+            bool: False if the lease was lost to another worker.
+        """
+        cursor = self.conn.execute(
+            """UPDATE tasks SET lease_expires = ?
+            WHERE id = ? AND worker = ? AND status = 'leased'""",
+            (time.time() + self.lease_seconds, task_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def complete(self, task_id: int, worker_id: str) -> bool:
+        """
+        Mark a claimed paper as done.
+
+        Returns:
+            bool: False if the lease was lost to another worker (nothing is changed).
+        """
+        cursor = self.conn.execute(
+            """UPDATE tasks SET status = 'done', error = NULL
+            WHERE id = ? AND worker = ? AND status = 'leased'""",
+            (task_id, worker_id),
+        )
+        return cursor.rowcount == 1
+
+    def fail(self, task_id: int, worker_id: str, error: str) -> None:
+        """Release a claimed paper after an error so it can be retried."""
+        self.conn.execute(
+            """UPDATE tasks SET
+                status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END,
+                error = ?
+            WHERE id = ? AND worker = ? AND status = 'leased'""",
+            (self.max_attempts, error, task_id, worker_id),
+        )
+
+    def progress(self) -> dict:
+        """
+        Count the papers per status.
+
+        Returns:
+            dict: Mapping of status ('pending', 'leased', 'done', 'failed') to count.
+        """
+        rows = self.conn.execute(
+            "SELECT status, COUNT(*) FROM tasks GROUP BY status"
+        ).fetchall()
+        return dict(rows)
+
+
+class ResultStore:
+    """
+    A SQLite store of extraction results, keyed by PDF path so stores written by different
+    workers or nodes can be merged without duplicates.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Opens (and if needed creates) the result database.
+
+        Args:
+            db_path (str): Path to the SQLite result file.
+        """
+        self.db_path = db_path
+        self.conn = _connect(db_path)
+        self.conn.execute("""CREATE TABLE IF NOT EXISTS results (
+                path TEXT PRIMARY KEY,
+                file_name TEXT NOT NULL,
+                model TEXT NOT NULL,
+                worker TEXT,
+                data TEXT NOT NULL,
+                finished REAL NOT NULL
+            )""")
+
+    def add(
+        self, path: str, file_name: str, model: str, worker: str, data: CompositionList
+    ) -> None:
+        """Store (or replace) the extraction result of one paper."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?)",
+            (path, file_name, model, worker, data.model_dump_json(), time.time()),
+        )
+
+    def merge(self, other_db_path: str) -> int:
+        """
+        Merge the results of another store into this one. For papers present in both, the
+        more recent result wins.
+
+        Args:
+            other_db_path (str): Path to the other SQLite result file.
+
+        Returns:
+            int: Number of rows inserted or replaced.
+        """
+        before = self.conn.total_changes
+        self.conn.execute("ATTACH DATABASE ? AS other", (other_db_path,))
+        try:
+            self.conn.execute("""INSERT OR REPLACE INTO results
+                SELECT o.* FROM other.results AS o
+                LEFT JOIN results AS r ON r.path = o.path
+                WHERE r.path IS NULL OR o.finished > r.finished""")
+        finally:
+            self.conn.execute("DETACH DATABASE other")
+        return self.conn.total_changes - before
+
+    def records(self) -> list:
+        """
+        Load all results in the format returned by `JSONExtractor.extract`.
+
+        Returns:
+            list: List of dictionaries with file names and validated `CompositionList` data.
+        """
+        rows = self.conn.execute(
+            "SELECT file_name, data FROM results ORDER BY path"
+        ).fetchall()
+        return [
+            {"file_name": file_name, "data": CompositionList.model_validate_json(data)}
+            for file_name, data in rows
+        ]
+
+
+def run_worker(
+    queue_path: str,
+    model: str,
+    host: Optional[str] = None,
+    results_path: Optional[str] = None,
+    worker_id: Optional[str] = None,
+    lease_seconds: int = LEASE_SECONDS,
+) -> int:
+    """
+    Claim and extract papers from the queue until it is empty.
+
+    While a paper is being extracted, a background thread keeps renewing its lease, so only papers
+    of crashed workers expire and get retried. A worker whose lease was lost (e.g. after a long
+    stall) drops its result: the paper belongs to the worker that claimed it again, and only
+    that worker stores a result for it.
+
+    Args:
+        queue_path (str): Path to the SQLite queue file.
+        model (str): The LLM model to use.
+        host (str, optional): Ollama server of this worker. Defaults to the local server.
+        results_path (str, optional): Result store of this worker. Defaults to the queue file.
+        worker_id (str, optional): Worker identifier. Defaults to '<hostname>-<random>'.
+        lease_seconds (int): Lease duration for claimed papers.
+
+    Returns:
+        int: Number of papers extracted by this worker.
+    """
+    worker_id = worker_id or f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+    queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+    store = ResultStore(results_path or queue_path)
+
+    num_done = 0
+    while True:
+        task = queue.claim(worker_id)
+        if task is None:
+            break
+
+        stop = threading.Event()
+        lost = threading.Event()
+
+        def heartbeat(task_id=task["id"]):
+            # SQLite connections are bound to their thread, so the heartbeat opens its own.
+            heartbeat_queue = WorkQueue(queue_path, lease_seconds=lease_seconds)
+            while not stop.wait(lease_seconds / 3):
+                if not heartbeat_queue.renew(task_id, worker_id):
+                    lost.set()
+                    break
+
+        thread = threading.Thread(target=heartbeat, daemon=True)
+        thread.start()
+        try:
+            text = PDFParser.parse_pdf(task["path"])
+            data = Pipeline.run_pipeline(text, model, host=host)
+            # Renewing confirms the lease and keeps it valid while the result is stored
+            if lost.is_set() or not queue.renew(task["id"], worker_id):
+                print(
+                    f"[{worker_id}] Lease of {task['file_name']} was lost, "
+                    "dropping the result"
+                )
+                continue
+            store.add(task["path"], task["file_name"], model, worker_id, data)
+            queue.complete(task["id"], worker_id)
+            num_done += 1
+            print(f"[{worker_id}] Extracted {task['file_name']}")
+        except Exception as e:
+            queue.fail(task["id"], worker_id, str(e))
+            print(f"[{worker_id}] Error extracting data from {task['file_name']}: {e}")
+        finally:
+            stop.set()
+            thread.join()
+
+    print(f"[{worker_id}] Queue empty, extracted {num_done} papers. {queue.progress()}")
+    return num_done
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Distributed KnowMat extraction with a SQLite work queue."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    enqueue = subparsers.add_parser("enqueue", help="Queue all PDFs in a folder.")
+    enqueue.add_argument("queue", help="Path to the queue database.")
+    enqueue.add_argument("folder", help="Folder with PDF files.")
+
+    worker = subparsers.add_parser("worker", help="Extract papers from the queue.")
+    worker.add_argument("queue", help="Path to the queue database.")
+    worker.add_argument("--model", default="llama3.1:8b-instruct-fp16")
+    worker.add_argument("--host", help="Ollama server of this worker.")
+    worker.add_argument("--results", help="Result database (default: the queue).")
+    worker.add_argument("--lease-seconds", type=int, default=LEASE_SECONDS)
+
+    status = subparsers.add_parser("status", help="Show queue progress.")
+    status.add_argument("queue", help="Path to the queue database.")
+
+    merge = subparsers.add_parser("merge", help="Merge result databases.")
+    merge.add_argument("results", help="Result database to merge into.")
+    merge.add_argument("others", nargs="+", help="Result databases to merge.")
+
+    export = subparsers.add_parser("export", help="Write merged results to CSV.")
+    export.add_argument("results", help="Result database.")
+    export.add_argument("output_path", help="Folder for the CSV file.")
+    export.add_argument("output_name", help="Name of the CSV file.")
+
+    args = parser.parse_args()
+    if args.command == "enqueue":
+        queue = WorkQueue(args.queue)
+        print(f"Queued {queue.enqueue_folder(args.folder)} new papers.")
+    elif args.command == "worker":
+        run_worker(
+            args.queue,
+            args.model,
+            host=args.host,
+            results_path=args.results,
+            lease_seconds=args.lease_seconds,
+        )
+    elif args.command == "status":
+        print(WorkQueue(args.queue).progress())
+    elif args.command == "merge":
+        store = ResultStore(args.results)
+        for other in args.others:
+            print(f"Merged {store.merge(other)} results from {other}")
+    elif args.command == "export":
+        records = ResultStore(args.results).records()
+        os.makedirs(args.output_path, exist_ok=True)
+        ResponseParser.save_to_csv(records, args.output_path, args.output_name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from src.knowmat.ann_index import MIN_IVF_SIZE, IVFIndex
+
+
+def normalized(vectors):
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+def clustered_vectors(n, dim=32, clusters=64, noise=0.3, seed=0):
+    """Synthetic embeddings: normalized points around random cluster centers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim))
+    points = centers[rng.integers(clusters, size=n)] + rng.normal(0, noise, (n, dim))
+    return normalized(points)
+
+
+def exact_search(vectors, queries, k):
+    return np.argsort(-(queries @ vectors.T), axis=1)[:, :k]
+
+
+@pytest.fixture(scope="module")
+def vectors():
+    return clustered_vectors(2 * MIN_IVF_SIZE + 100)
+
+
+@pytest.fixture(scope="module")
+def queries(vectors):
+    rng = np.random.default_rng(1)
+    sample = vectors[rng.choice(len(vectors), 200, replace=False)]
+    return normalized(sample + rng.normal(0, 0.05, sample.shape))
+
+
+def test_ivf_recall_against_brute_force(vectors, queries):
+    index = IVFIndex(vectors)
+    assert len(index.centroids) == int(np.sqrt(len(vectors)))
+    k = 5
+    _, ids = index.search(queries, k)
+    exact = exact_search(vectors, queries, k)
+    recall = np.mean([len(set(a) & set(e)) / k for a, e in zip(ids, exact)])
+    assert recall >= 0.9
+    assert index.recall(queries, k) == pytest.approx(recall)
+    assert index.estimate_recall(k=k) >= 0.9
+
+
+def test_search_returns_sorted_scores_of_the_returned_ids(vectors, queries):
+    index = IVFIndex(vectors)
+    scores, ids = index.search(queries[:10], k=3)
+    assert np.all(np.diff(scores, axis=1) <= 0)
+    expected = np.einsum("qd,qkd->qk", queries[:10], vectors[ids])
+    assert np.allclose(scores, expected, atol=1e-5)
+
+
+def test_small_collections_are_searched_exactly():
+    vectors = clustered_vectors(MIN_IVF_SIZE - 1)
+    index = IVFIndex(vectors)
+    assert len(index.centroids) == 0
+    scores, ids = index.search(vectors[:20], k=3)
+    assert np.array_equal(ids, exact_search(vectors, vectors[:20], 3))
+    assert np.allclose(scores[:, 0], 1.0, atol=1e-5)
+    assert index.estimate_recall() == 1.0
+
+
+def test_missing_neighbours_are_padded():
+    index = IVFIndex(clustered_vectors(2))
+    scores, ids = index.search(clustered_vectors(1, seed=3)[0], k=4)
+    assert ids.shape == (1, 4)
+    assert list(ids[0, 2:]) == [-1, -1]
+    assert np.all(np.isneginf(scores[0, 2:]))
+
+
+def test_save_and_load_round_trip(tmp_path, vectors, queries):
+    index = IVFIndex(vectors, n_probe=4)
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = IVFIndex.load(path)
+    assert loaded.n_probe == 4
+    for expected, actual in zip(index.search(queries, 5), loaded.search(queries, 5)):
+        assert np.array_equal(expected, actual)
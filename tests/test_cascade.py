@@ -0,0 +1,127 @@
+import pytest
+from pydantic import ValidationError
+
+from src.knowmat import cascade
+from src.knowmat.cascade import CascadePipeline, model_cost
+from src.knowmat.pipeline import CompositionList
+
+MODELS = ["small:1b", "medium:8b", "large:70b"]
+
+
+def extraction(properties=1, conditions="Annealed at 600 K"):
+    return CompositionList.model_validate(
+        {
+            "compositions": [
+                {
+                    "composition": "Bi2Te3",
+                    "processing_conditions": conditions,
+                    "characterization": None,
+                    "properties_of_composition": [
+                        {
+                            "property_name": "Seebeck coefficient",
+                            "value": 200.0,
+                            "unit": "uV/K",
+                            "measurement_condition": "300 K",
+                            "additional_information": None,
+                        }
+                    ]
+                    * properties,
+                }
+            ]
+        }
+    )
+
+
+def invalid_output():
+    try:
+        CompositionList.model_validate_json('{"compositions": [{}]}')
+    except ValidationError as e:
+        return e
+
+
+@pytest.fixture
+def stub_models(monkeypatch):
+    """Replaces the LLM calls by the outputs (or errors) given per model."""
+    outputs, calls = {}, []
+
+    def run_pipeline(text, model, priority=None):
+        calls.append(model)
+        output = outputs[model]
+        if isinstance(output, Exception):
+            raise output
+        return output
+
+    monkeypatch.setattr(cascade.Pipeline, "run_pipeline", run_pipeline)
+    return outputs, calls
+
+
+def test_model_cost():
+    assert model_cost("llama3.1:8b-instruct-fp16") == 8.0
+    assert model_cost("llama3.2:3b") == 3.0
+    assert model_cost("custom") == 1.0
+
+
+def test_assess():
+    assert CascadePipeline.assess(extraction()) is None
+    assert CascadePipeline.assess(CompositionList(compositions=[])) == (
+        "no compositions extracted"
+    )
+    assert CascadePipeline.assess(extraction(), min_properties=2) == (
+        "only 1 properties extracted"
+    )
+    assert CascadePipeline.assess(extraction(conditions="Not provided.")) is not None
+
+
+def test_first_accepted_result_stops_the_cascade(stub_models):
+    outputs, calls = stub_models
+    outputs.update({model: extraction() for model in MODELS})
+    CascadePipeline.run_cascade("short paper", MODELS)
+    routing = CascadePipeline.last_routing()
+    assert calls == ["small:1b"]
+    assert routing["final_model"] == "small:1b"
+    assert routing["cost_saved"] == 69.0
+
+
+def test_rejected_and_invalid_results_escalate(stub_models):
+    outputs, calls = stub_models
+    outputs.update(
+        {
+            "small:1b": invalid_output(),
+            "medium:8b": CompositionList(compositions=[]),
+            "large:70b": extraction(),
+        }
+    )
+    CascadePipeline.run_cascade("short paper", MODELS)
+    routing = CascadePipeline.last_routing()
+    assert calls == MODELS
+    assert routing["final_model"] == "large:70b"
+    assert routing["reasons"][0].startswith("small:1b: validation failed")
+
+
+def test_largest_valid_result_is_kept_when_all_are_rejected(stub_models):
+    outputs, _ = stub_models
+    outputs.update(
+        {
+            "small:1b": CompositionList(compositions=[]),
+            "medium:8b": extraction(properties=1),
+            "large:70b": invalid_output(),
+        }
+    )
+    result = CascadePipeline.run_cascade("short paper", MODELS, min_properties=2)
+    assert len(result.compositions) == 1
+    assert CascadePipeline.last_routing()["final_model"] == "medium:8b"
+
+
+def test_transport_errors_are_not_escalated(stub_models):
+    outputs, calls = stub_models
+    outputs.update({model: ConnectionError("refused") for model in MODELS})
+    with pytest.raises(ConnectionError):
+        CascadePipeline.run_cascade("short paper", MODELS)
+    assert calls == ["small:1b"]
+
+
+def test_long_papers_skip_the_smallest_model(stub_models):
+    outputs, calls = stub_models
+    outputs.update({model: extraction() for model in MODELS})
+    CascadePipeline.run_cascade("word " * 1000, MODELS, long_paper_tokens=10)
+    assert calls == ["medium:8b"]
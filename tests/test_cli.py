@@ -0,0 +1,97 @@
+import fitz
+import pandas as pd
+
+from src.knowmat import json_extractor
+from src.knowmat.cli import finished_papers, main
+from src.knowmat.pipeline import CompositionList
+
+
+def write_pdf(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+    doc.close()
+
+
+def stub_extraction(monkeypatch):
+    calls = []
+
+    def run_pipeline(text, model, priority=None):
+        calls.append(text.strip())
+        return CompositionList.model_validate(
+            {
+                "compositions": [
+                    {
+                        "composition": text.strip(),
+                        "processing_conditions": None,
+                        "characterization": None,
+                        "properties_of_composition": [
+                            {
+                                "property_name": "ZT",
+                                "value": 1.0,
+                                "unit": "",
+                                "measurement_condition": None,
+                                "additional_information": None,
+                            }
+                        ],
+                    }
+                ]
+            }
+        )
+
+    monkeypatch.setattr(json_extractor.Pipeline, "run_pipeline", run_pipeline)
+    monkeypatch.setattr(json_extractor.Pipeline, "last_stats", lambda: {})
+    return calls
+
+
+def run(tmp_path, *inputs, resume=False):
+    main(
+        [
+            "run",
+            "--input",
+            *(str(path) for path in inputs),
+            "--output",
+            str(tmp_path / "out" / "extracted.csv"),
+            "--history",
+            str(tmp_path / "throughput.json"),
+            "--no-postprocess",
+            "--workers",
+            "1",
+            *(["--resume"] if resume else []),
+        ]
+    )
+
+
+def test_finished_papers_resolves_paths(tmp_path):
+    output = tmp_path / "out" / "extracted.csv"
+    output.parent.mkdir()
+    pd.DataFrame(
+        {
+            "file name": ["a.pdf", "b.pdf", "old.pdf"],
+            "path": ["../in/a.pdf", str(tmp_path / "watched" / "b.pdf"), None],
+        }
+    ).to_csv(output, index=False)
+    assert finished_papers(str(output), "csv") == {
+        str(tmp_path / "in" / "a.pdf"),
+        str(tmp_path / "watched" / "b.pdf"),
+        "old.pdf",
+    }
+    assert finished_papers(str(tmp_path / "missing.csv"), "csv") == set()
+
+
+def test_resume_tells_apart_equally_named_papers(tmp_path, monkeypatch):
+    calls = stub_extraction(monkeypatch)
+    first, second = tmp_path / "a" / "paper.pdf", tmp_path / "b" / "paper.pdf"
+    write_pdf(first, "Bi2Te3")
+    write_pdf(second, "PbTe")
+
+    run(tmp_path, first)
+    run(tmp_path, first, second, resume=True)
+    assert calls == ["Bi2Te3", "PbTe"]
+    rows = pd.read_csv(tmp_path / "out" / "extracted.csv")
+    assert rows["path"].tolist() == ["../a/paper.pdf", "../b/paper.pdf"]
+    assert rows["composition"].tolist() == ["Bi2Te3", "PbTe"]
+
+    run(tmp_path, first, second, resume=True)
+    assert len(calls) == 2
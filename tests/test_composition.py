@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+from src.knowmat.composition import (
+    CompositionIndex,
+    canonicalize_composition,
+    canonicalize_series,
+    clean_formula,
+    parse_formula,
+)
+
+
+@pytest.mark.parametrize(
+    "composition",
+    [
+        "Bi2Te3",
+        "Bi$_2$Te$_3$",
+        "Bi_{2}Te_{3}",
+        "Bi<sub>2</sub>Te<sub>3</sub>",
+        "Bi₂Te₃",
+        "Te3Bi2",
+    ],
+)
+def test_spellings_share_a_key(composition):
+    assert canonicalize_composition(composition) == "Bi2Te3"
+
+
+def test_parentheses_and_fractions():
+    assert parse_formula("(Bi0.5Sb1.5)Te3") == {"Bi": 0.5, "Sb": 1.5, "Te": 3.0}
+    assert parse_formula("Ca(OH)2") == {"Ca": 1.0, "O": 2.0, "H": 2.0}
+    assert canonicalize_composition("[Bi0.5Sb1.5]Te3") == "Bi0.5Sb1.5Te3"
+
+
+def test_non_formulas_fall_back_to_cleaned_text():
+    assert parse_formula("Cu-doped Bi2Te3") is None
+    assert parse_formula("Xx2O3") is None
+    assert canonicalize_composition("Cu-doped  Bi$_2$Te$_3$") == "Cu-doped Bi2Te3"
+    assert canonicalize_composition(None) == ""
+
+
+def test_clean_formula():
+    assert clean_formula(" Bi$_{2}$ Te$_3$ ") == "Bi2Te3"
+
+
+def test_canonicalize_series_keeps_index():
+    series = pd.Series(["Te3Bi2", None, "Bi2Te3"], index=[5, 6, 7], name="composition")
+    result = canonicalize_series(series)
+    assert result.tolist() == ["Bi2Te3", "", "Bi2Te3"]
+    assert result.index.tolist() == [5, 6, 7]
+
+
+def test_composition_index_groups_variants():
+    index = CompositionIndex()
+    assert index.add("Bi2Te3") == index.add("Te3Bi2") == 0
+    assert index.add("PbTe") == 1
+    assert index.get("Bi$_2$Te$_3$") == 0
+    assert index.get("SnSe") is None
+    assert len(index) == 2
+    assert index.variants[0] == {"Bi2Te3", "Te3Bi2"}
@@ -0,0 +1,105 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.knowmat.consensus import ConsensusAggregator
+
+
+def run_rows(model, run, rows):
+    """Rows of one run file: (composition, property name, value, unit) tuples."""
+    frame = pd.DataFrame(
+        rows, columns=["composition", "property name", "value", "unit"]
+    )
+    frame["file name"] = "a.pdf"
+    frame["measurement condition"] = "At 300 K."
+    frame["model"] = model
+    frame["run"] = run
+    return frame
+
+
+def consensus_of(*frames):
+    runs = ConsensusAggregator.align(pd.concat(frames, ignore_index=True))
+    return ConsensusAggregator.aggregate(runs).set_index(["model", "property"])
+
+
+def test_agreement_is_the_share_of_a_models_runs():
+    consensus = consensus_of(
+        run_rows(
+            "small", 1, [("Bi2Te3", "ZT", 1.0, ""), ("Bi2Te3", "Seebeck", 200, "")]
+        ),
+        run_rows("small", 2, [("Te3Bi2", "zt ", 1.0, "")]),
+        run_rows(
+            "large", 1, [("Bi2Te3", "ZT", 1.1, ""), ("Bi2Te3", "Seebeck", 210, "")]
+        ),
+    )
+    assert consensus.loc[("small", "zt"), "agreement"] == 1.0
+    assert consensus.loc[("small", "seebeck"), "agreement"] == 0.5
+    assert consensus.loc[("large", "zt"), "agreement"] == 1.0
+    # Each model keeps its own values
+    assert consensus.loc[("small", "zt"), "majority_value"] == 1.0
+    assert consensus.loc[("large", "zt"), "majority_value"] == 1.1
+
+
+def test_values_agree_up_to_significant_digits():
+    consensus = consensus_of(
+        run_rows("small", 1, [("Bi2Te3", "ZT", 0.91002, "")]),
+        run_rows("small", 2, [("Bi2Te3", "ZT", 0.91, "")]),
+        run_rows("small", 3, [("Bi2Te3", "ZT", 0.95, "")]),
+    )
+    row = consensus.loc[("small", "zt")]
+    assert row["majority_value"] == 0.91
+    assert row["majority_share"] == pytest.approx(2 / 3)
+    assert row["median"] == pytest.approx(0.91002)
+
+
+def test_normalized_values_are_compared_across_units():
+    first = run_rows("small", 1, [("Bi2Te3", "Seebeck coefficient", 0.2, "mV/K")])
+    second = run_rows("small", 2, [("Bi2Te3", "Seebeck coefficient", 200, "uV/K")])
+    first["normalized_value"], second["normalized_value"] = 200.0, 200.0
+    row = consensus_of(first, second).loc[("small", "seebeck coefficient")]
+    assert row["runs_present"] == 2
+    assert row["majority_share"] == 1.0
+    assert row["std"] == 0.0
+
+
+def test_standard_names_align_different_spellings():
+    first = run_rows("small", 1, [("Bi2Te3", "thermopower", 200, "uV/K")])
+    second = run_rows("small", 2, [("Bi2Te3", "Seebeck coefficient", 200, "uV/K")])
+    first["standard_property_name"] = "Seebeck coefficient"
+    second["standard_property_name"] = "Seebeck coefficient"
+    consensus = consensus_of(first, second)
+    assert consensus.loc[("small", "seebeck coefficient"), "agreement"] == 1.0
+
+
+def test_property_reported_by_one_model_only():
+    consensus = consensus_of(
+        run_rows("small", 1, [("Bi2Te3", "ZT", 1.0, "")]),
+        run_rows(
+            "large", 1, [("Bi2Te3", "ZT", 1.0, ""), ("Bi2Te3", "Hardness", 2, "GPa")]
+        ),
+        run_rows("large", 2, [("Bi2Te3", "ZT", 1.0, "")]),
+    )
+    assert ("small", "hardness") not in consensus.index
+    row = consensus.loc[("large", "hardness")]
+    assert row["agreement"] == 0.5
+    assert row["majority_share"] == 1.0
+    assert np.isnan(row["std"])
+
+
+def test_run_writes_consensus_and_report(tmp_path):
+    for run in (1, 2):
+        rows = run_rows("qwen3:8b", run, [("Bi2Te3", "ZT", 1.0, "")])
+        rows.drop(columns=["model", "run"]).to_csv(
+            tmp_path / f"extracted_qwen3:8b_run{run}.csv", index=False
+        )
+    (tmp_path / "extracted_notes.csv").write_text("ignored\n")
+    consensus, report = ConsensusAggregator.run(str(tmp_path))
+    assert len(consensus) == 1
+    assert report.loc[0, "model"] == "qwen3:8b"
+    assert report.loc[0, "share_in_all_runs"] == 1.0
+    assert (tmp_path / "stability_report.csv").exists()
+
+
+def test_load_runs_without_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        ConsensusAggregator.load_runs(str(tmp_path))
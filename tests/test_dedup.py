@@ -0,0 +1,103 @@
+import threading
+import time
+
+import pytest
+
+from src.knowmat import json_extractor
+from src.knowmat.dedup import DuplicateIndex
+from src.knowmat.json_extractor import JSONExtractor
+from src.knowmat.pipeline import CompositionList
+
+PAPER = " ".join(f"word{i} of the thermoelectric paper" for i in range(300))
+
+
+@pytest.fixture
+def index(tmp_path):
+    return DuplicateIndex(str(tmp_path / "dedup.sqlite"))
+
+
+def test_near_duplicates_are_found(index):
+    signature = index.signature(PAPER)
+    index.add("preprint.pdf", signature, "{}", 12.0)
+    revised = PAPER.replace("word7 ", "changed ")
+    duplicate = index.query(index.signature(revised))
+    assert duplicate["file_name"] == "preprint.pdf"
+    assert duplicate["similarity"] >= 0.8 and not duplicate["pending"]
+    other = " ".join(f"token{i} about superconductors" for i in range(300))
+    assert index.query(index.signature(other)) is None
+
+
+def test_reserve_is_atomic(index):
+    signature = index.signature(PAPER)
+    duplicate, reservation = index.reserve("a.pdf", signature)
+    assert duplicate is None and reservation is not None
+    duplicate, second = index.reserve("b.pdf", signature)
+    assert second is None and duplicate["pending"]
+    index.finish(reservation, "{}", 3.0)
+    duplicate, _ = index.reserve("b.pdf", signature)
+    assert not duplicate["pending"] and duplicate["data"] == "{}"
+
+
+def test_released_reservation_lets_a_duplicate_take_over(index):
+    signature = index.signature(PAPER)
+    _, reservation = index.reserve("a.pdf", signature)
+    index.release(reservation)
+    assert len(index) == 0
+    duplicate, reservation = index.reserve("b.pdf", signature)
+    assert duplicate is None and reservation is not None
+
+
+def test_wait_returns_when_finished(index):
+    signature = index.signature(PAPER)
+    _, reservation = index.reserve("a.pdf", signature)
+    threading.Timer(0.1, index.finish, (reservation, "{}", 1.0)).start()
+    start = time.monotonic()
+    index.wait(reservation, timeout=5)
+    assert time.monotonic() - start < 2
+
+
+def test_concurrent_duplicates_are_extracted_once(index, monkeypatch):
+    calls = []
+
+    def slow_extraction(text, model, priority=None):
+        calls.append(text)
+        time.sleep(0.2)
+        return CompositionList(compositions=[])
+
+    monkeypatch.setattr(json_extractor.PDFParser, "parse_pdf", lambda source: source)
+    monkeypatch.setattr(json_extractor.Pipeline, "run_pipeline", slow_extraction)
+    monkeypatch.setattr(json_extractor.Pipeline, "last_stats", lambda: {})
+
+    results = JSONExtractor.extract_documents(
+        [("a.pdf", PAPER), ("b.pdf", PAPER)], "model", max_workers=2, dedup=index
+    )
+    assert len(calls) == 1
+    assert [result["file_name"] for result in results] == ["a.pdf", "b.pdf"]
+    assert sum("duplicate_of" in result["stats"] for result in results) == 1
+
+
+def test_cascade_report_counts_reused_duplicates(index, monkeypatch):
+    calls = []
+
+    def cascade(text, models, priority=None):
+        calls.append(text)
+        return CompositionList(compositions=[])
+
+    monkeypatch.setattr(json_extractor.PDFParser, "parse_pdf", lambda source: source)
+    monkeypatch.setattr(json_extractor.CascadePipeline, "run_cascade", cascade)
+    monkeypatch.setattr(
+        json_extractor.CascadePipeline,
+        "last_routing",
+        lambda: {"final_model": "large:8b", "cost_saved": 3.0},
+    )
+    monkeypatch.setattr(json_extractor.Pipeline, "last_stats", lambda: {})
+
+    results = JSONExtractor.extract_documents(
+        [("a.pdf", PAPER), ("b.pdf", PAPER)],
+        "model",
+        cascade_models=["small:1b", "large:8b"],
+        dedup=index,
+    )
+    assert len(calls) == 1
+    assert [result["file_name"] for result in results] == ["a.pdf", "b.pdf"]
+    assert "routing" not in results[1]["stats"]
@@ -0,0 +1,69 @@
+import os
+import sys
+from types import ModuleType, SimpleNamespace
+
+import pytest
+
+from src.knowmat import embedding_backend
+from src.knowmat.embedding_backend import load_embedding_model, parity_check
+
+PROPERTIES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "src",
+    "knowmat",
+    "properties.json",
+)
+
+
+@pytest.fixture
+def fake_torch(monkeypatch):
+    """Stand-ins for torch and sentence_transformers that record how the model is built."""
+    calls = {"threads": [], "models": []}
+    torch = ModuleType("torch")
+    torch.set_num_threads = calls["threads"].append
+    torch.nn = SimpleNamespace(Linear=object)
+    torch.qint8 = "qint8"
+    torch.quantization = SimpleNamespace(quantize_dynamic=lambda model, *a, **k: model)
+    sentence_transformers = ModuleType("sentence_transformers")
+
+    class SentenceTransformer:
+        def __init__(self, name, **kwargs):
+            calls["models"].append(kwargs)
+
+        def eval(self):
+            return self
+
+    sentence_transformers.SentenceTransformer = SentenceTransformer
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    monkeypatch.setitem(sys.modules, "sentence_transformers", sentence_transformers)
+    return calls
+
+
+def test_torch_backend_keeps_defaults(fake_torch):
+    load_embedding_model("torch")
+    assert fake_torch["threads"] == []
+    assert "device" not in fake_torch["models"][0]
+
+
+def test_int8_backend_runs_on_the_cpu(fake_torch, monkeypatch):
+    monkeypatch.setattr(embedding_backend, "default_threads", lambda: 3)
+    load_embedding_model("int8")
+    assert fake_torch["threads"] == [3]
+    assert fake_torch["models"][0]["device"] == "cpu"
+
+
+def test_unknown_backend():
+    with pytest.raises(ValueError):
+        load_embedding_model("tensorrt")
+
+
+@pytest.mark.parametrize("backend", ["int8", "onnx"])
+def test_parity_with_full_precision(backend):
+    pytest.importorskip("sentence_transformers")
+    if backend == "onnx":
+        pytest.importorskip("onnxruntime")
+    from src.knowmat.post_processing import PostProcessor
+
+    candidates = PostProcessor(PROPERTIES_FILE, None, memo=False).candidates
+    report = parity_check(candidates, backend)
+    assert report["passed"], report["failures"][:10]
@@ -0,0 +1,64 @@
+import pandas as pd
+import pytest
+
+from src.knowmat.evaluation import TIMINGS_FILE, Evaluator, evaluate_paper
+
+
+def rows(*values):
+    return pd.DataFrame(
+        values, columns=["composition", "property name", "value", "unit"]
+    )
+
+
+def test_exact_match():
+    gold = rows(("Bi2Te3", "seebeck coefficient", 200, "μV/K"))
+    counts = evaluate_paper(gold.copy(), gold, 0.05)
+    assert counts == {
+        "composition": (1, 1, 1),
+        "property": (1, 1, 1),
+        "value": (1, 1, 1),
+        "unit": (1, 1, 1),
+    }
+
+
+def test_assignment_prefers_matching_values():
+    # Greedy pairing in row order would give both predictions the wrong partner
+    gold = rows(
+        ("Bi2Te3", "seebeck coefficient", 100, "uV/K"),
+        ("Bi2Te3", "seebeck coefficient", 200, "uV/K"),
+    )
+    predicted = rows(
+        ("Te3Bi2", "seebeck coefficient", 0.2, "mV/K"),
+        ("Bi$_2$Te$_3$", "seebeck coefficient", 101, "uV/K"),
+    )
+    counts = evaluate_paper(predicted, gold, 0.05)
+    assert counts["property"] == (2, 2, 2)
+    assert counts["value"] == (2, 2, 2)
+
+
+def test_rows_of_other_compositions_do_not_pair():
+    gold = rows(("Bi2Te3", "seebeck coefficient", 200, "uV/K"))
+    predicted = rows(("PbTe", "seebeck coefficient", 200, "uV/K"))
+    counts = evaluate_paper(predicted, gold, 0.05)
+    assert counts["composition"] == (0, 1, 1)
+    assert counts["property"] == (0, 1, 1)
+
+
+def test_evaluate_runs_deduplicates_timings(tmp_path):
+    gold_dir = tmp_path / "gold"
+    gold_dir.mkdir()
+    rows(("Bi2Te3", "seebeck coefficient", 200, "uV/K")).to_csv(
+        gold_dir / "paper.csv", index=False
+    )
+    run = rows(("Bi2Te3", "seebeck coefficient", 200, "uV/K"))
+    run.insert(0, "file name", "paper.pdf")
+    run.to_csv(tmp_path / "extracted_llama_run1.csv", index=False)
+    pd.DataFrame(
+        [["llama", 1, 1, 10.0], ["llama", 1, 1, 4.0]],
+        columns=["model", "run", "papers", "seconds"],
+    ).to_csv(tmp_path / TIMINGS_FILE, index=False)
+
+    report = Evaluator.evaluate_runs(str(tmp_path), str(gold_dir), max_workers=1)
+    assert len(report) == 1
+    assert report.loc[0, "seconds_per_paper"] == 4.0
+    assert report.loc[0, "property_f1"] == pytest.approx(1.0)
@@ -0,0 +1,130 @@
+import pandas as pd
+import pytest
+
+from src.knowmat.extraction_table import ExtractionTable, StringPool
+from src.knowmat.pipeline import CompositionList
+from src.knowmat.response_parser import ResponseParser
+
+
+def prop(name, value, unit="K", condition=None):
+    return {
+        "property_name": name,
+        "value": value,
+        "unit": unit,
+        "measurement_condition": condition,
+        "additional_information": None,
+    }
+
+
+PAPERS = {
+    "a.pdf": {
+        "compositions": [
+            {
+                "composition": "Bi2Te3",
+                "processing_conditions": "Annealed at 600 K",
+                "characterization": {"XRD": "single phase"},
+                "properties_of_composition": [
+                    prop("Seebeck coefficient", 200.0, "uV/K", "300 K"),
+                    prop("ZT", 0.9, ""),
+                ],
+            },
+            {
+                "composition": "PbTe",
+                "processing_conditions": None,
+                "characterization": None,
+                "properties_of_composition": [prop("ZT", 1.2, "")],
+            },
+        ]
+    },
+    "b.pdf": {
+        "compositions": [
+            {
+                "composition": "Bi2Te3",
+                "processing_conditions": "Annealed at 600 K",
+                "characterization": {"XRD": "single phase"},
+                "properties_of_composition": [prop("Melting point", 858.0)],
+            }
+        ]
+    },
+}
+
+
+@pytest.fixture
+def records():
+    return [
+        {
+            "file_name": file_name,
+            "data": CompositionList.model_validate(data),
+            "stats": {"seconds": 1.0},
+        }
+        for file_name, data in PAPERS.items()
+    ]
+
+
+@pytest.fixture
+def table(records):
+    table = ExtractionTable()
+    for record in records:
+        table.add(record["file_name"], record["data"], record["stats"])
+    return table
+
+
+def test_string_pool_interns_values():
+    pool = StringPool()
+    assert pool.intern("a") == pool.intern("a") == 0
+    assert pool.intern("b") == 1
+    assert pool.intern(None) == -1
+    assert pool.intern({"x": 1}, key="x") == pool.intern({"x": 1}, key="x") == 2
+    assert len(pool) == 3
+
+
+def test_sizes(table):
+    assert len(table) == 4
+    assert table.num_compositions == 3
+    assert table.file_names() == ["a.pdf", "b.pdf"]
+    assert len(table.pools["composition"]) == 2
+    assert table.nbytes() > 0
+
+
+def test_to_pandas_matches_the_list_of_dicts_output(table, records):
+    expected = ResponseParser.to_dataframe(records)
+    for categorical in (True, False):
+        df = table.to_pandas(categorical=categorical)
+        assert list(df.columns) == list(expected.columns)
+        assert df.to_csv(index=False) == expected.to_csv(index=False)
+    assert isinstance(table.to_pandas()["composition"].dtype, pd.CategoricalDtype)
+
+
+def test_to_records_round_trip(table, records):
+    assert table.to_records() == records
+
+
+def test_add_json(records):
+    table = ExtractionTable()
+    table.add_json("a.pdf", records[0]["data"].model_dump_json())
+    assert table.to_records()[0]["data"] == records[0]["data"]
+    assert table.to_records()[0]["stats"] == {}
+
+
+def test_to_arrow(table, records):
+    pytest.importorskip("pyarrow")
+    arrow = table.to_arrow()
+    assert arrow.num_rows == 4
+    assert arrow.column_names == list(ResponseParser.to_dataframe(records).columns)
+    assert arrow.column("composition").to_pylist() == [
+        "Bi2Te3",
+        "Bi2Te3",
+        "PbTe",
+        "Bi2Te3",
+    ]
+    assert arrow.column("measurement condition").to_pylist()[1] is None
+    assert arrow.column("value").to_pylist() == [200.0, 0.9, 1.2, 858.0]
+
+
+def test_paths_add_a_column_after_the_file_name(records):
+    table = ExtractionTable()
+    table.add("a.pdf", records[0]["data"], path="x/a.pdf")
+    table.add("a.pdf", records[0]["data"], path="y/a.pdf")
+    df = table.to_pandas(categorical=False)
+    assert list(df.columns[:3]) == ["file name", "path", "composition"]
+    assert df["path"].tolist() == ["x/a.pdf"] * 3 + ["y/a.pdf"] * 3
@@ -0,0 +1,119 @@
+import threading
+
+import pytest
+
+from src.knowmat.job_order import (
+    lpt_order,
+    merge_composition_lists,
+    simulate_makespan,
+    split_text,
+)
+from src.knowmat.json_extractor import JSONExtractor
+from src.knowmat.pipeline import CompositionList, Pipeline
+from src.knowmat.prompt_generator import PromptGenerator
+
+TEXT = "\n".join(
+    f"Sentence {i} about Bi2Te3 and its Seebeck coefficient." for i in range(200)
+)
+
+
+def composition(name, properties, processing=None, characterization=None):
+    return {
+        "composition": name,
+        "processing_conditions": processing,
+        "characterization": characterization,
+        "properties_of_composition": [
+            {
+                "property_name": prop,
+                "value": 1.0,
+                "unit": "K",
+                "measurement_condition": None,
+                "additional_information": None,
+            }
+            for prop in properties
+        ],
+    }
+
+
+def test_lpt_order_starts_the_longest_first():
+    assert lpt_order([3, 9, 1, 9]) == [1, 3, 0, 2]
+
+
+def test_simulate_makespan():
+    makespan, loads = simulate_makespan([1, 1, 1, 3], workers=2)
+    assert makespan == 4
+    assert sorted(loads) == [2, 4]
+    weights = [1, 1, 1, 3]
+    makespan, _ = simulate_makespan([weights[i] for i in lpt_order(weights)], 2)
+    assert makespan == 3
+
+
+def test_simulate_makespan_with_more_workers_than_jobs():
+    assert simulate_makespan([2.0], workers=8) == (2.0, [2.0])
+    assert simulate_makespan([], workers=4) == (0.0, [0.0])
+
+
+def test_split_text_keeps_the_document_in_order_within_budget():
+    chunks = split_text(TEXT, max_tokens=500)
+    assert len(chunks) > 1
+    assert "\n".join(chunks) == TEXT
+    assert all(PromptGenerator.estimate_tokens(chunk) <= 600 for chunk in chunks)
+
+
+def test_merge_combines_entries_of_the_same_composition():
+    first = CompositionList.model_validate(
+        {
+            "compositions": [
+                composition(
+                    "Bi2Te3", ["Seebeck coefficient"], "Not provided", {"XRD": "a"}
+                ),
+                composition("PbTe", ["ZT"]),
+            ]
+        }
+    )
+    second = CompositionList.model_validate(
+        {
+            "compositions": [
+                composition(
+                    " Bi2Te3", ["ZT"], "Annealed at 600 K", {"XRD": "b", "SEM": "c"}
+                )
+            ]
+        }
+    )
+    merged = merge_composition_lists([first, second]).compositions
+    assert [comp.composition for comp in merged] == ["Bi2Te3", "PbTe"]
+    bi2te3 = merged[0]
+    assert [p.property_name for p in bi2te3.properties_of_composition] == [
+        "Seebeck coefficient",
+        "ZT",
+    ]
+    assert bi2te3.processing_conditions == "Annealed at 600 K"
+    assert bi2te3.characterization == {"XRD": "a; b", "SEM": "c"}
+    # The inputs are not modified
+    assert len(first.compositions[0].properties_of_composition) == 1
+
+
+def test_extract_chunked_sums_stats_missing_in_some_chunks(monkeypatch):
+    local = threading.local()
+
+    def run_pipeline(chunk, model, priority=None):
+        local.stats = {"model": model, "prompt_tokens_evaluated": 10}
+        if "Sentence 0 " not in chunk:
+            local.stats["eval_tokens"] = 5
+        return CompositionList(compositions=[])
+
+    monkeypatch.setattr(Pipeline, "run_pipeline", staticmethod(run_pipeline))
+    monkeypatch.setattr(Pipeline, "last_stats", staticmethod(lambda: local.stats))
+    chunks = len(split_text(TEXT, 500))
+    _, stats = JSONExtractor.extract_chunked(TEXT, "qwen3:8b", 500)
+    assert stats["chunks"] == chunks
+    assert stats["prompt_tokens_evaluated"] == 10 * chunks
+    assert stats["eval_tokens"] == 5 * (chunks - 1)
+    assert len(stats["calls"]) == chunks
+
+
+def test_split_tokens_cannot_be_combined_with_a_cascade():
+    with pytest.raises(ValueError):
+        JSONExtractor.extract_documents(
+            [], "qwen3:8b", cascade_models=["a", "b"], split_tokens=1000
+        )
@@ -0,0 +1,114 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from src.knowmat import llm_scheduler
+from src.knowmat.llm_scheduler import INTERACTIVE, LLMScheduler
+
+
+def make_scheduler(**kwargs):
+    kwargs.setdefault("requests_per_second", 1e6)
+    kwargs.setdefault("burst", 1e6)
+    return LLMScheduler(**kwargs)
+
+
+def test_limit_grows_additively():
+    scheduler = make_scheduler(max_in_flight=4)
+    for _ in range(20):
+        scheduler._admit(INTERACTIVE)
+        scheduler._release(1.0, 1.0)
+    assert scheduler.limit == 4.0
+
+
+def test_failure_halves_limit():
+    scheduler = make_scheduler(max_in_flight=8)
+    scheduler.limit = 6.0
+    scheduler._admit(INTERACTIVE)
+    scheduler._release(None, 1.0)
+    assert scheduler.limit == 3.0
+    assert scheduler.errors == 1
+
+
+def test_slow_call_halves_limit():
+    scheduler = make_scheduler(max_in_flight=8, latency_tolerance=2.0)
+    scheduler._admit(INTERACTIVE)
+    scheduler._release(1.0, 1.0)
+    scheduler.limit = 8.0
+    scheduler._admit(INTERACTIVE)
+    scheduler._release(3.0, 1.0)
+    assert scheduler.limit == 4.0
+
+
+def test_latency_is_normalized_by_cost():
+    scheduler = make_scheduler(max_in_flight=8)
+    scheduler._admit(INTERACTIVE)
+    scheduler._release(1.0, 100.0)
+    scheduler.limit = 8.0
+    # Ten times the latency for ten times the tokens is not congestion
+    scheduler._admit(INTERACTIVE)
+    scheduler._release(10.0, 1000.0)
+    assert scheduler.limit == 8.0
+
+
+def test_lucky_call_does_not_pin_the_baseline():
+    scheduler = make_scheduler(max_in_flight=8)
+    scheduler._admit(INTERACTIVE)
+    scheduler._release(0.1, 1.0)
+    for _ in range(100):
+        scheduler._admit(INTERACTIVE)
+        scheduler._release(1.0, 1.0)
+    assert scheduler.baseline_latency > 0.5
+    assert scheduler.limit == 8.0
+
+
+def test_call_uses_measured_cost(monkeypatch):
+    scheduler = make_scheduler()
+    costs = []
+    monkeypatch.setattr(scheduler, "_release", lambda latency, cost: costs.append(cost))
+    result = scheduler.call(
+        lambda: SimpleNamespace(eval_count=42),
+        cost=1000,
+        measure=lambda response: response.eval_count,
+    )
+    assert result.eval_count == 42
+    assert costs == [42]
+
+
+def test_call_retries_then_raises(monkeypatch):
+    monkeypatch.setattr(llm_scheduler.time, "sleep", lambda seconds: None)
+    scheduler = make_scheduler(max_retries=2)
+    calls = []
+
+    def failing():
+        calls.append(1)
+        raise RuntimeError("timeout")
+
+    with pytest.raises(RuntimeError):
+        scheduler.call(failing)
+    assert len(calls) == 3
+    assert scheduler.stats()["in_flight"] == 0
+
+
+def test_interactive_requests_go_first():
+    scheduler = make_scheduler(max_in_flight=1)
+    scheduler._admit(INTERACTIVE)
+    order = []
+
+    def request(priority, name):
+        scheduler._admit(priority)
+        order.append(name)
+        scheduler._release(1.0, 1.0)
+
+    batch = threading.Thread(target=request, args=(llm_scheduler.BATCH, "batch"))
+    batch.start()
+    while not scheduler.waiting:
+        pass
+    interactive = threading.Thread(target=request, args=(INTERACTIVE, "interactive"))
+    interactive.start()
+    while len(scheduler.waiting) < 2:
+        pass
+    scheduler._release(1.0, 1.0)
+    batch.join()
+    interactive.join()
+    assert order == ["interactive", "batch"]
@@ -0,0 +1,42 @@
+from src.knowmat.mapping_memo import LOOKUP_BATCH, MappingMemo, memo_version
+
+
+def test_put_is_written_on_flush(tmp_path):
+    memo = MappingMemo(str(tmp_path / "memo.sqlite"), "v1")
+    memo.put("zt", "thermoelectric", "figure of merit", "ZT", 0.91)
+    assert memo.lookup(["zt"]) == {}
+    assert memo.flush() == 1
+    assert memo.lookup(["zt", "other"]) == {
+        "zt": ("thermoelectric", "figure of merit", "ZT", 0.91)
+    }
+    assert (memo.hits, memo.misses) == (1, 2)
+
+
+def test_versions_are_separate_and_kept(tmp_path):
+    path = str(tmp_path / "memo.sqlite")
+    first = MappingMemo(path, "v1")
+    first.put("zt", None, None, None, 0.2)
+    first.flush()
+    assert MappingMemo(path, "v2").lookup(["zt"]) == {}
+    reopened = MappingMemo(path, "v1")
+    assert reopened.lookup(["zt"])["zt"] == (None, None, None, 0.2)
+    assert len(reopened) == 1
+
+
+def test_lookup_batches_large_requests(tmp_path):
+    memo = MappingMemo(str(tmp_path / "memo.sqlite"), "v1")
+    names = [f"name {i}" for i in range(LOOKUP_BATCH * 2 + 7)]
+    for name in names:
+        memo.put(name, None, None, None, 0.0)
+    memo.flush()
+    assert len(memo.lookup(names)) == len(names)
+
+
+def test_version_follows_properties_and_model(tmp_path):
+    properties = tmp_path / "properties.json"
+    properties.write_text('{"a": 1}')
+    version = memo_version(str(properties), "model/torch")
+    assert version == memo_version(str(properties), "model/torch")
+    assert version != memo_version(str(properties), "model/int8")
+    properties.write_text('{"a": 2}')
+    assert version != memo_version(str(properties), "model/torch")
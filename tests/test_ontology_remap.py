@@ -0,0 +1,100 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.knowmat.ontology_remap import OntologyRemapper, diff_ontology
+from src.knowmat.property_matcher import _trigrams
+
+OLD = {"thermal": {"transport": ["Thermal conductivity", "Seebeck coefficient"]}}
+NEW = {
+    "thermal": {"transport": ["Thermal conductivity"]},
+    "electrical": {
+        "transport": ["Seebeck coefficient", "Electrical conductivity"],
+    },
+}
+
+
+def make_remapper(tmp_path, old_properties=OLD, new_properties=NEW):
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    old.write_text(json.dumps(old_properties))
+    new.write_text(json.dumps(new_properties))
+    return OntologyRemapper(str(old), str(new), cache_dir=str(tmp_path))
+
+
+class TrigramModel:
+    """Stands in for the SentenceTransformer: normalized hashed character trigrams."""
+
+    def encode(self, names, **kwargs):
+        vectors = np.zeros((len(names), 256), dtype=np.float32)
+        for row, name in enumerate(names):
+            for gram in _trigrams(name):
+                vectors[row, hash(gram) % 256] += 1.0
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def test_diff_ontology():
+    old = {"a": ("d", "c", "A"), "b": ("d", "c", "B"), "c": ("d", "c", "C")}
+    new = {"a": ("d", "c", "A"), "b": ("e", "c", "B"), "d": ("d", "c", "D")}
+    assert diff_ontology(old, new) == {"added": ["d"], "removed": ["c"], "moved": ["b"]}
+
+
+def test_remap_files_updates_moved_and_new_rows(tmp_path):
+    csv_path = tmp_path / "extracted.csv"
+    pd.DataFrame(
+        {
+            "property name": ["Electrical conductivity", "Seebeck coefficient"],
+            "value": [100.0, 200.0],
+            "unit": ["S/m", "uV/K"],
+            "domain": [np.nan, np.nan],
+            "category": [np.nan, np.nan],
+            "standard_property_name": [np.nan, np.nan],
+            "normalized_value": [100.0, 200.0],
+            "normalized_unit": [np.nan, np.nan],
+        }
+    ).to_csv(csv_path, index=False)
+
+    report = make_remapper(tmp_path).remap_files([str(csv_path)])
+    assert report["changed_rows"] == {str(csv_path): 2}
+    result = pd.read_csv(csv_path)
+    assert result["domain"].tolist() == ["electrical", "electrical"]
+    assert result["standard_property_name"].tolist() == [
+        "Electrical conductivity",
+        "Seebeck coefficient",
+    ]
+    # Normalized again to the canonical units of the new standard properties
+    assert result["normalized_unit"].tolist() == ["S/cm", "uV/K"]
+    assert np.allclose(result["normalized_value"], [1.0, 200.0])
+
+
+def test_dry_run_leaves_files_untouched(tmp_path):
+    csv_path = tmp_path / "extracted.csv"
+    pd.DataFrame(
+        {
+            "property name": ["Thermal conductivity"],
+            "domain": ["old"],
+            "category": ["old"],
+            "standard_property_name": ["Thermal conductivity"],
+        }
+    ).to_csv(csv_path, index=False)
+    before = csv_path.read_text()
+    report = make_remapper(tmp_path).remap_files([str(csv_path)], dry_run=True)
+    assert report["changed_rows"] == {str(csv_path): 1}
+    assert csv_path.read_text() == before
+
+
+def test_memoized_match_that_was_removed_is_rematched(tmp_path):
+    remapper = make_remapper(
+        tmp_path, new_properties={"thermal": {"transport": ["Thermal conductivity"]}}
+    )
+    remapper.new._model = TrigramModel()
+    # The memo of the old ontology has a match that was removed, while the file (mapped
+    # with another memo) has one that still exists
+    remapper.old_memo.put(
+        "thermopower", "thermal", "transport", "Seebeck coefficient", 0.8
+    )
+    remapper.old_memo.flush()
+    remapped = remapper.remap_names({"thermopower": "Thermal conductivity"})
+    assert remapper.stats["rematched"] == 1
+    assert remapper.stats["compared"] == 0
+    assert remapped["thermopower"][2] != "Seebeck coefficient"
@@ -0,0 +1,50 @@
+import fitz
+
+from src.knowmat.pdf_parser import ParseLimits, PDFParser
+
+
+def make_pdf(path, pages, line="Bi2Te3 has a Seebeck coefficient of 200 uV/K."):
+    doc = fitz.open()
+    for page_num in range(pages):
+        doc.new_page().insert_text((50, 72), f"Page {page_num}. {line}")
+    doc.save(path)
+    doc.close()
+    return str(path)
+
+
+def test_bounded_parse_matches_parse_pdf(tmp_path):
+    path = make_pdf(tmp_path / "paper.pdf", 3)
+    parsed = PDFParser.parse_pdf_bounded(path)
+    assert parsed["pages"] == 3 and not parsed["truncated"]
+    assert PDFParser.read_text(parsed) == PDFParser.parse_pdf(path)
+
+
+def test_page_cap_skips(tmp_path):
+    path = make_pdf(tmp_path / "paper.pdf", 3)
+    parsed = PDFParser.parse_pdf_bounded(path, ParseLimits(max_pages=2))
+    assert parsed["skipped"] and PDFParser.read_text(parsed) is None
+
+
+def test_spilled_text_is_read_back_and_removed(tmp_path):
+    path = make_pdf(tmp_path / "paper.pdf", 3)
+    limits = ParseLimits(spill_chars=10, spill_dir=str(tmp_path), page_window=1)
+    parsed = PDFParser.parse_pdf_bounded(path, limits)
+    assert parsed["text"] is None and parsed["spill_path"]
+    text = PDFParser.read_text(parsed, cleanup=True)
+    assert text == PDFParser.parse_pdf(path)
+    assert not (tmp_path / parsed["spill_path"]).exists()
+
+
+def test_text_past_max_chars_is_dropped(tmp_path):
+    path = make_pdf(tmp_path / "paper.pdf", 20)
+    limits = ParseLimits(spill_chars=10, spill_dir=str(tmp_path), max_chars=120)
+    parsed = PDFParser.parse_pdf_bounded(path, limits)
+    assert parsed["truncated"] and parsed["pages"] < 20
+    text = PDFParser.read_text(parsed, cleanup=True, max_chars=limits.max_chars)
+    assert len(text) <= 120
+    assert text.startswith("Page 0.")
+
+
+def test_read_text_bounds_in_memory_text():
+    parsed = {"text": "x" * 50, "spill_path": None}
+    assert PDFParser.read_text(parsed, max_chars=10) == "x" * 10
@@ -0,0 +1,55 @@
+import json
+
+from src.knowmat.planner import ThroughputHistory
+
+STATS = {
+    "model": "qwen3:8b",
+    "prompt_tokens_estimated": 100,
+    "prompt_tokens_evaluated": 80,
+    "prefill_seconds": 0.1,
+    "eval_tokens": 20,
+    "eval_seconds": 1.0,
+}
+
+
+def test_save_merges_concurrent_histories(tmp_path):
+    path = str(tmp_path / "throughput.json")
+    first, second = ThroughputHistory(path), ThroughputHistory(path)
+    first.record(STATS)
+    second.record(STATS)
+    second.record(STATS)
+    first.save()
+    second.save()
+    # Saving again does not add the same calls twice
+    first.save()
+    totals = ThroughputHistory(path).models["qwen3:8b"]
+    assert totals["calls"] == 3
+    assert totals["eval_tokens"] == 60
+    assert second.models == ThroughputHistory(path).models
+
+
+def test_record_ignores_calls_without_stats(tmp_path):
+    history = ThroughputHistory(str(tmp_path / "throughput.json"))
+    history.record({"model": "qwen3:8b"})
+    history.save()
+    assert history.models == {}
+
+
+def test_unreadable_file_starts_empty(tmp_path):
+    path = tmp_path / "throughput.json"
+    path.write_text('{"qwen3:8b": {"calls"')
+    history = ThroughputHistory(str(path))
+    assert history.models == {}
+    history.record(STATS)
+    history.save()
+    assert json.loads(path.read_text())["qwen3:8b"]["calls"] == 1
+    assert [p.name for p in tmp_path.glob("*.tmp")] == []
+
+
+def test_papers_with_several_calls_count_each_call(tmp_path):
+    history = ThroughputHistory(str(tmp_path / "throughput.json"))
+    chunked = {**STATS, "eval_tokens": 40, "chunks": 2, "calls": [STATS, STATS]}
+    history.record(chunked)
+    totals = history.models["qwen3:8b"]
+    assert totals["calls"] == 2
+    assert totals["eval_tokens"] == 40
@@ -0,0 +1,72 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from src.knowmat.post_processing import PostProcessor
+
+PROPERTIES = {
+    "thermal properties": {"transport": ["Thermal conductivity", "Seebeck coefficient"]}
+}
+
+
+def write_csv(path, names, mapped):
+    rows = pd.DataFrame(
+        {
+            "file name": "a.pdf",
+            "composition": "Bi2Te3",
+            "property name": names,
+            "value": 1.0,
+            "unit": "W/mK",
+        }
+    )
+    for column, values in mapped.items():
+        rows[column] = values
+    rows.to_csv(path, index=False)
+
+
+def make_processor(tmp_path, csv_path):
+    properties = tmp_path / "properties.json"
+    properties.write_text(json.dumps(PROPERTIES))
+    return PostProcessor(
+        str(properties), str(csv_path), cache_dir=str(tmp_path), memo=False
+    )
+
+
+def test_incremental_fills_all_nan_mapped_columns(tmp_path):
+    csv_path = tmp_path / "extracted.csv"
+    nan = [np.nan, np.nan]
+    write_csv(
+        csv_path,
+        ["thermal conductivity", "Seebeck coefficients"],
+        {
+            "domain": nan,
+            "category": nan,
+            "standard_property_name": nan,
+            "normalized_value": nan,
+            "normalized_unit": nan,
+        },
+    )
+    make_processor(tmp_path, csv_path).process_extracted_data(incremental=True)
+    result = pd.read_csv(csv_path)
+    assert result["standard_property_name"].tolist() == [
+        "Thermal conductivity",
+        "Seebeck coefficient",
+    ]
+    assert result["domain"].tolist() == ["thermal properties"] * 2
+
+
+def test_incremental_maps_only_new_rows(tmp_path):
+    csv_path = tmp_path / "extracted.csv"
+    write_csv(
+        csv_path,
+        ["thermal conductivity", "thermal conductivity"],
+        {
+            "domain": ["kept", np.nan],
+            "category": ["kept", np.nan],
+            "standard_property_name": ["kept", np.nan],
+        },
+    )
+    make_processor(tmp_path, csv_path).process_extracted_data(incremental=True)
+    result = pd.read_csv(csv_path)
+    assert result["standard_property_name"].tolist() == ["kept", "Thermal conductivity"]
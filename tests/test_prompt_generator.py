@@ -0,0 +1,33 @@
+import json
+import re
+
+from src.knowmat.pipeline import CompositionList
+from src.knowmat.prompt_generator import USER_PROMPT_PREFIX, PromptGenerator
+
+
+def json_blocks(prompt):
+    return re.findall(r"```json\s*(.*?)```", prompt, flags=re.S)
+
+
+def test_example_output_is_valid():
+    example = json_blocks(PromptGenerator.generate_system_prompt())[-1]
+    # The example wraps a long string over two lines, hence strict=False
+    parsed = json.loads(example, strict=False)
+    CompositionList.model_validate(parsed)
+
+
+def test_format_notes_stay_outside_the_template():
+    template = json_blocks(PromptGenerator.generate_system_prompt())[0]
+    assert re.search(r"[}\]]\s*\(", template) is None
+
+
+def test_prompts_share_a_stable_prefix():
+    first = PromptGenerator.generate_user_prompt("Bi2Te3")
+    second = PromptGenerator.generate_user_prompt("PbTe")
+    assert first.startswith(USER_PROMPT_PREFIX) and second.startswith(
+        USER_PROMPT_PREFIX
+    )
+    assert (
+        PromptGenerator.generate_system_prompt()
+        == PromptGenerator.generate_system_prompt()
+    )
@@ -0,0 +1,121 @@
+import os
+
+import pytest
+
+from src.knowmat.post_processing import PostProcessor
+from src.knowmat.property_matcher import (
+    TrigramIndex,
+    _edit_distance,
+    _is_near_miss,
+    normalize_property_name,
+)
+
+PROPERTIES_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "src",
+    "knowmat",
+    "properties.json",
+)
+
+
+@pytest.fixture(scope="module")
+def processor():
+    return PostProcessor(PROPERTIES_FILE, None, memo=False)
+
+
+@pytest.mark.parametrize(
+    "name, normalized",
+    [
+        ("Seebeck-Coefficients", "seebeck coefficient"),
+        ("Hall  mobility", "hall mobility"),
+        ("energy_densities", "energy density"),
+        ("ＺＴ value", "zt value"),
+        ("thermal/electrical conductivity", "thermal electrical conductivity"),
+        ("stress", "stress"),
+        ("modulus", "modulus"),
+    ],
+)
+def test_normalize_property_name(name, normalized):
+    assert normalize_property_name(name) == normalized
+
+
+def test_edit_distance_stops_at_the_limit():
+    assert _edit_distance("coefficient", "coeficient", 2) == 1
+    assert _edit_distance("kitten", "sitting", 3) == 3
+    assert _edit_distance("kitten", "sitting", 1) == 2
+    assert _edit_distance("a", "abcdef", 2) == 3
+
+
+@pytest.mark.parametrize(
+    "query, candidate",
+    [
+        ("seebeck coeficient", "seebeck coefficient"),
+        ("thermal conductivty", "thermal conductivity"),
+        ("magnetoresistance anisotrophy", "magnetoresistance anisotropy"),
+    ],
+)
+def test_typos_are_near_misses(query, candidate):
+    assert _is_near_miss(query, candidate)
+
+
+@pytest.mark.parametrize(
+    "query, candidate",
+    [
+        ("direct energy gap", "indirect energy gap"),
+        ("average number of 4f electron", "average number of 5f electron"),
+        (
+            "temperature for peritectic formation",
+            "temperature for peritectoid formation",
+        ),
+        ("bulk modulus", "bull modulus"),
+        ("seebeck coefficient", "seebeck"),
+    ],
+)
+def test_different_words_are_not_near_misses(query, candidate):
+    assert not _is_near_miss(query, candidate)
+
+
+def test_trigram_index_finds_the_closest_spelling():
+    index = TrigramIndex(
+        ["seebeck coefficient", "thermal conductivity", "hall mobility"]
+    )
+    name, score = index.query("seebeck coeficient")
+    assert name == "seebeck coefficient"
+    assert 0.6 <= score < 1.0
+    assert index.query("thermal conductivity") == ("thermal conductivity", 1.0)
+    assert index.query("magnetic susceptibility") is None
+
+
+def test_trigram_index_rejects_near_misses_with_other_digits():
+    index = TrigramIndex(["average number of 5f electron"])
+    assert index.query("average number of 4f electron") is None
+
+
+@pytest.mark.parametrize(
+    "name, tier, standard",
+    [
+        ("seebeck coefficient", "exact", "seebeck coefficient"),
+        ("seebeck-coefficients", "normalized", "seebeck coefficient"),
+        ("seebeck coeficient", "trigram", "seebeck coefficient"),
+    ],
+)
+def test_lexical_tiers(processor, name, tier, standard):
+    candidate, score, matched_tier = processor.match_lexical(name)
+    assert matched_tier == tier
+    assert processor.property_lookup[candidate][2] == standard
+    assert (score < 1.0) == (tier == "trigram")
+
+
+@pytest.mark.parametrize(
+    "name, other",
+    [
+        ("average number of 4f electron", "average number of 5f electrons"),
+        (
+            "temperature for peritectic formations",
+            "temperature for peritectoid formation",
+        ),
+    ],
+)
+def test_lexical_tiers_keep_distinct_properties_apart(processor, name, other):
+    candidate, _, _ = processor.match_lexical(name)
+    assert candidate != other
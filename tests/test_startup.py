@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.knowmat.cli import HEAVY_MODULES
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Invocations that only build the parser or print help.
+LIGHT_COMMANDS = [
+    "--help",
+    *(
+        f"{command} --help"
+        for command in (
+            "parse",
+            "extract",
+            "postprocess",
+            "run",
+            "remap",
+            "convert",
+            "plan",
+            "watch",
+            "bench",
+        )
+    ),
+]
+
+
+def loaded_modules(code: str) -> set:
+    """Runs `code` in a fresh interpreter and returns the modules it imported."""
+    probe = f"{code}\nimport json, sys\nprint('LOADED=' + json.dumps(sorted(sys.modules)))\n"
+    result = subprocess.run(
+        [sys.executable, "-c", probe],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(json.loads(result.stdout.rsplit("LOADED=", 1)[1]))
+
+
+def test_importing_the_cli_is_light():
+    loaded = loaded_modules("import src.knowmat.cli")
+    assert set(HEAVY_MODULES).isdisjoint(loaded)
+
+
+@pytest.mark.parametrize("command", LIGHT_COMMANDS)
+def test_no_heavy_imports(command):
+    # Run the CLI in-process in a fresh interpreter and list what it imported
+    loaded = loaded_modules(
+        "import sys\n"
+        "from src.knowmat.cli import main\n"
+        f"sys.argv = ['knowmat', *{command.split()!r}]\n"
+        "try:\n"
+        "    main()\n"
+        "except SystemExit:\n"
+        "    pass"
+    )
+    heavy = set(HEAVY_MODULES) & loaded
+    assert not heavy, f"{command} imported {sorted(heavy)}"
+
+
+def test_module_entry_point_prints_help():
+    result = subprocess.run(
+        [sys.executable, "-m", "src.knowmat", "--help"],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+    )
+    assert result.returncode == 0
+    assert "usage: knowmat" in result.stdout
@@ -0,0 +1,91 @@
+import threading
+
+import pytest
+
+from src.knowmat import two_pass
+from src.knowmat.json_extractor import JSONExtractor
+from src.knowmat.pipeline import CompositionProperties
+from src.knowmat.planner import ThroughputHistory
+from src.knowmat.two_pass import (
+    DiscoveredCompositions,
+    TwoPassPipeline,
+    segment_text,
+)
+
+TEXT = "\n".join(
+    f"Sentence {i} about Bi2Te3 and its Seebeck coefficient." for i in range(100)
+)
+
+
+def test_segments_keep_whole_lines_in_order():
+    segments = segment_text(TEXT, segment_chars=300)
+    assert len(segments) > 1
+    assert "\n".join(segments) == TEXT
+    assert all(len(segment) < 2 * 300 for segment in segments)
+
+
+def test_excerpt_joins_referenced_segments_in_order():
+    segments = ["first", "second", "third"]
+    assert TwoPassPipeline.excerpt(segments, [3, 1, 3]) == "first\n\nthird"
+
+
+def test_excerpt_falls_back_to_all_segments():
+    segments = ["first", "second"]
+    assert TwoPassPipeline.excerpt(segments, [7]) == "first\n\nsecond"
+
+
+def test_two_pass_cannot_be_combined_with_a_cascade():
+    with pytest.raises(ValueError):
+        JSONExtractor.extract_documents(
+            [], "model", cascade_models=["small", "large"], two_pass=True
+        )
+
+
+def test_two_pass_stats_list_every_call(tmp_path, monkeypatch):
+    local = threading.local()
+
+    def call_stats(tokens):
+        local.stats = {
+            "model": "qwen3:8b",
+            "prompt_tokens_estimated": 100,
+            "prompt_tokens_evaluated": 100,
+            "prefill_seconds": 0.1,
+            "eval_tokens": tokens,
+            "eval_seconds": 1.0,
+        }
+
+    def discover(segments, model, priority=None):
+        call_stats(30)
+        return DiscoveredCompositions.model_validate(
+            {
+                "compositions": [
+                    {"composition": name, "segments": [1]}
+                    for name in ("Bi2Te3", "PbTe")
+                ]
+            }
+        )
+
+    def extract_composition(composition, excerpt, model, priority=None):
+        call_stats(50)
+        return CompositionProperties(
+            composition=composition,
+            processing_conditions=None,
+            characterization=None,
+            properties_of_composition=[],
+        )
+
+    monkeypatch.setattr(TwoPassPipeline, "discover", staticmethod(discover))
+    monkeypatch.setattr(
+        TwoPassPipeline, "extract_composition", staticmethod(extract_composition)
+    )
+    monkeypatch.setattr(two_pass.Pipeline, "last_stats", lambda: local.stats)
+
+    result = TwoPassPipeline.run_two_pass(TEXT, "qwen3:8b")
+    stats = TwoPassPipeline.last_stats()
+    assert len(result.compositions) == 2
+    assert [call["eval_tokens"] for call in stats["calls"]] == [30, 50, 50]
+
+    history = ThroughputHistory(str(tmp_path / "throughput.json"))
+    history.record({"calls": stats["calls"], "two_pass": stats})
+    assert history.models["qwen3:8b"]["calls"] == 3
+    assert history.models["qwen3:8b"]["eval_tokens"] == 130
@@ -0,0 +1,65 @@
+import math
+
+import pandas as pd
+import pytest
+
+from src.knowmat.unit_normalizer import UnitNormalizer, format_dims, parse_unit
+
+
+@pytest.mark.parametrize(
+    "unit, scale, dims",
+    [
+        ("μV/K", 1e-6, "m^2*kg*s^-3*K^-1*A^-1"),
+        ("W m^-1 K^-1", 1.0, "m*kg*s^-3*K^-1"),
+        ("W/mK", 1.0, "m*kg*s^-3*K^-1"),
+        ("cm²/(V·s)", 1e-4, "kg^-1*s^2*A"),
+        ("J/mol K", 1.0, "m^2*kg*s^-2*K^-1*mol^-1"),
+        ("GPa", 1e9, "m^-1*kg*s^-2"),
+        ("hPa", 1e2, "m^-1*kg*s^-2"),
+        ("h", 3600.0, "s"),
+        ("10^19 cm^-3", 1e25, "m^-3"),
+        ("×10⁻³ S/cm", 1e-1, "m^-3*kg^-1*s^3*A^2"),
+        ("wt.%", 1e-2, "1"),
+    ],
+)
+def test_parse_unit(unit, scale, dims):
+    parsed = parse_unit(unit)
+    assert parsed is not None
+    assert math.isclose(parsed.scale, scale, rel_tol=1e-9)
+    assert format_dims(parsed.dims) == dims
+
+
+@pytest.mark.parametrize("unit", ["furlongs", "m/(s", "10^x m", None])
+def test_unparseable_units(unit):
+    assert parse_unit(unit) is None
+
+
+def test_celsius_offset():
+    factor, offset, unit = UnitNormalizer.conversion("°C")
+    assert (25 * factor + offset, unit) == (298.15, "K")
+
+
+def test_canonical_unit_of_property():
+    factor, offset, unit = UnitNormalizer.conversion(
+        "10^19 cm^-3", "values of charge carrier concentration"
+    )
+    assert unit == "cm^-3"
+    assert math.isclose(factor, 1e19) and offset == 0
+
+
+def test_canonical_unit_needs_matching_dimensions():
+    assert UnitNormalizer.conversion("K", "microhardness")[2] == "K"
+
+
+def test_normalize_dataframe():
+    df = pd.DataFrame(
+        {
+            "value": ["200", "0.2", "n/a"],
+            "unit": ["μV/K", "mV/K", "K"],
+            "standard_property_name": ["Seebeck coefficient"] * 2 + [None],
+        }
+    )
+    UnitNormalizer.normalize_dataframe(df)
+    assert df["normalized_value"].iloc[:2].tolist() == pytest.approx([200, 200])
+    assert df["normalized_unit"].tolist() == ["uV/K", "uV/K", "K"]
+    assert math.isnan(df["normalized_value"].iloc[2])
@@ -0,0 +1,94 @@
+import os
+from types import SimpleNamespace
+
+import pandas as pd
+
+from src.knowmat import watcher
+from src.knowmat.watcher import (
+    MAX_ATTEMPTS,
+    FolderWatcher,
+    IngestionLedger,
+    IngestionService,
+)
+
+
+def write_pdf(folder, name="paper.pdf", content=b"%PDF-1.4 a"):
+    folder.mkdir(parents=True, exist_ok=True)
+    path = folder / name
+    path.write_bytes(content)
+    return str(path)
+
+
+def test_ledger_is_keyed_by_absolute_path(tmp_path, monkeypatch):
+    ledger = IngestionLedger(str(tmp_path / "ledger.db"))
+    first = write_pdf(tmp_path / "a")
+    second = write_pdf(tmp_path / "b")
+    ledger.record(first, 1, 1, "x", "done")
+    assert ledger.get(second) is None
+    monkeypatch.chdir(tmp_path)
+    assert ledger.get(os.path.join("a", "paper.pdf"))[3] == "done"
+
+
+def test_failures_back_off_then_give_up(tmp_path, monkeypatch):
+    ledger = IngestionLedger(str(tmp_path / "ledger.db"))
+    now = [1000.0]
+    monkeypatch.setattr(watcher.time, "time", lambda: now[0])
+
+    delays = []
+    for _ in range(MAX_ATTEMPTS):
+        retry_at = ledger.record_failure("/p/a.pdf", 1, 1, "x", "boom")
+        delays.append(None if retry_at is None else retry_at - now[0])
+    assert delays[:-1] == [
+        watcher.RETRY_SECONDS * 2**i for i in range(MAX_ATTEMPTS - 1)
+    ]
+    assert delays[-1] is None
+    assert not IngestionLedger.due_for_retry(ledger.get("/p/a.pdf"))
+
+    # Changed content starts over
+    assert ledger.record_failure("/p/a.pdf", 2, 2, "y", "boom") is not None
+    assert ledger.get("/p/a.pdf")[4] == 1
+    ledger.record("/p/a.pdf", 2, 2, "y", "done")
+    assert ledger.get("/p/a.pdf")[4:] == (0, None)
+
+
+def test_failed_file_is_retried_when_due(tmp_path, monkeypatch):
+    ledger = IngestionLedger(str(tmp_path / "ledger.db"))
+    path = write_pdf(tmp_path / "a")
+    stat = os.stat(path)
+    folder_watcher = FolderWatcher([str(tmp_path)], ledger, settle_seconds=0)
+
+    retry_at = ledger.record_failure(path, stat.st_size, stat.st_mtime_ns, "x", "boom")
+    folder_watcher.scan()
+    assert folder_watcher.settled() == []
+
+    monkeypatch.setattr(watcher.time, "time", lambda: retry_at + 1)
+    folder_watcher.scan()
+    assert folder_watcher.settled() == [(path, stat.st_size, stat.st_mtime_ns)]
+
+
+def test_same_names_in_different_folders(tmp_path):
+    ledger = IngestionLedger(str(tmp_path / "ledger.db"))
+    first = write_pdf(tmp_path / "a")
+    second = write_pdf(tmp_path / "b")
+    folder_watcher = FolderWatcher([str(tmp_path)], ledger, settle_seconds=0)
+    folder_watcher.scan()
+    folder_watcher.settled()  # starts the settle timers
+    assert sorted(item[0] for item in folder_watcher.settled()) == [first, second]
+
+
+def test_replacing_rows_keeps_equally_named_papers(tmp_path):
+    output_csv = str(tmp_path / "out.csv")
+    service = SimpleNamespace(output_csv=output_csv)
+
+    def rows(path, value):
+        return pd.DataFrame(
+            {"file name": ["paper.pdf"], "path": [path], "value": [value]}
+        )
+
+    IngestionService.write_rows(service, rows("/a/paper.pdf", 1))
+    IngestionService.write_rows(service, rows("/b/paper.pdf", 2))
+    IngestionService.write_rows(
+        service, rows("/a/paper.pdf", 3), replace_path="/a/paper.pdf"
+    )
+    result = pd.read_csv(output_csv).sort_values("path")
+    assert result["value"].tolist() == [3, 2]
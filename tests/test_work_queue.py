@@ -0,0 +1,100 @@
+from src.knowmat import work_queue
+from src.knowmat.pipeline import CompositionList
+from src.knowmat.work_queue import ResultStore, WorkQueue
+
+
+def make_queue(tmp_path, names=("a.pdf", "b.pdf"), **kwargs):
+    folder = tmp_path / "papers"
+    folder.mkdir()
+    for name in names:
+        (folder / name).write_bytes(b"%PDF-1.4")
+    queue = WorkQueue(str(tmp_path / "queue.sqlite"), **kwargs)
+    assert queue.enqueue_folder(str(folder)) == len(names)
+    return queue
+
+
+def expire(queue, task_id):
+    queue.conn.execute("UPDATE tasks SET lease_expires = 0 WHERE id = ?", (task_id,))
+
+
+def test_rollback_journal(tmp_path):
+    queue = make_queue(tmp_path)
+    mode = queue.conn.execute("PRAGMA journal_mode").fetchone()[0]
+    assert mode == "delete"
+
+
+def test_enqueue_is_idempotent(tmp_path):
+    queue = make_queue(tmp_path)
+    assert queue.enqueue_folder(str(tmp_path / "papers")) == 0
+    assert queue.progress() == {"pending": 2}
+
+
+def test_claims_are_exclusive(tmp_path):
+    queue = make_queue(tmp_path)
+    first, second = queue.claim("w1"), queue.claim("w2")
+    assert first["id"] != second["id"]
+    assert queue.claim("w3") is None
+    assert queue.progress() == {"leased": 2}
+
+
+def test_expired_lease_is_claimed_again(tmp_path):
+    queue = make_queue(tmp_path, names=("a.pdf",))
+    task = queue.claim("w1")
+    expire(queue, task["id"])
+    assert queue.claim("w2")["id"] == task["id"]
+    # The first worker has lost the lease and can no longer renew or complete it
+    assert not queue.renew(task["id"], "w1")
+    assert not queue.complete(task["id"], "w1")
+    assert queue.renew(task["id"], "w2")
+    assert queue.complete(task["id"], "w2")
+    assert queue.progress() == {"done": 1}
+
+
+def test_fail_retries_then_gives_up(tmp_path):
+    queue = make_queue(tmp_path, names=("a.pdf",), max_attempts=2)
+    task = queue.claim("w1")
+    queue.fail(task["id"], "w1", "boom")
+    assert queue.progress() == {"pending": 1}
+    task = queue.claim("w1")
+    queue.fail(task["id"], "w1", "boom")
+    assert queue.progress() == {"failed": 1}
+    assert queue.claim("w1") is None
+
+
+def test_expired_lease_fails_after_max_attempts(tmp_path):
+    queue = make_queue(tmp_path, names=("a.pdf",), max_attempts=1)
+    task = queue.claim("w1")
+    expire(queue, task["id"])
+    assert queue.claim("w2") is None
+    assert queue.progress() == {"failed": 1}
+
+
+def test_worker_drops_result_of_lost_lease(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path, names=("a.pdf",))
+    queue_path = queue.db_path
+
+    def stalled_extraction(text, model, host=None):
+        # Another worker claims the paper while this one stalls
+        other = WorkQueue(queue_path)
+        expire(other, 1)
+        assert other.claim("other")["id"] == 1
+        return CompositionList(compositions=[])
+
+    monkeypatch.setattr(work_queue.PDFParser, "parse_pdf", lambda path: "text")
+    monkeypatch.setattr(work_queue.Pipeline, "run_pipeline", stalled_extraction)
+
+    assert work_queue.run_worker(queue_path, "model", worker_id="w1") == 0
+    assert queue.progress() == {"leased": 1}
+    assert ResultStore(queue_path).records() == []
+
+
+def test_merge_keeps_latest_result(tmp_path):
+    first = ResultStore(str(tmp_path / "first.sqlite"))
+    second = ResultStore(str(tmp_path / "second.sqlite"))
+    empty = CompositionList(compositions=[])
+    first.add("/p/a.pdf", "a.pdf", "old", "w1", empty)
+    second.add("/p/a.pdf", "a.pdf", "new", "w2", empty)
+    second.add("/p/b.pdf", "b.pdf", "new", "w2", empty)
+    assert first.merge(second.db_path) == 2
+    models = dict(first.conn.execute("SELECT file_name, model FROM results"))
+    assert models == {"a.pdf": "new", "b.pdf": "new"}